@@ -1,774 +1,312 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from scipy.stats import chi2
-import random
-
-# Configuración de la página
-st.set_page_config(
-    page_title="Analizador de Reglas de Asociación",
-    page_icon="📊",
-    layout="wide",
-    initial_sidebar_state="expanded"
+import os
+
+import association_engine as engine
+from association_engine import (
+    DEFAULT_ALPHAS, FISHER_MIN_EXPECTED, INGEST_CHUNK_ROWS, MAX_ITEM_PROBABILITY, NATIVE_EXTENSION,
+    P_VALUE_CORRECTIONS, PREVIEW_ROWS, RANKING_METRICS, SPARSE_DENSITY_THRESHOLD,
+    all_pairs_to_frame, append_transactions, calculate_all_pairs_from_counts,
+    calculate_all_pairs_parallel, calculate_density, copy_count_state, counts_from_data,
+    generate_itemset_rules, generate_synthetic_baskets, index_support, ingest_file_counts, ingest_long_file_counts,
+    is_sparse_data, mine_frequent_itemsets, native_to_frame, parse_alphas, parse_dependencies,
+    preview_data, rank_top_pairs, update_counts_for_new_version, validate_data, write_native_dataset
+)
+from charts import (
+    create_all_rules_chart, create_chi_square_visualization, create_contingency_heatmap,
+    create_dependency_factors_chart, create_frequency_chart, create_metrics_chart, create_scatter_plot
 )
+from dataset_store import registry_stats, share_dataset, share_native_dataset
+from instrumentation import span, spans_to_json, spans_to_prometheus, start_recording, stop_recording
+from job_runner import CANCELLED, DONE, JobRunner
+from recommender import DEFAULT_TOP_CONSEQUENTS, RECOMMENDATION_METRICS, Recommender, build_rule_index
+from result_cache import ResultCache, dataset_fingerprint, make_key
+from styles import CUSTOM_CSS, PAGE_CONFIG
+from upload_cache import DEFAULT_CACHE_DIR, UploadCache
 
-# CSS mejorado SIN los divs problemáticos
-st.markdown("""
-<style>
-    /* Estilos base */
-    .main-header {
-        font-size: 3rem;
-        color: #1f77b4 !important;
-        text-align: center;
-        margin-bottom: 2rem;
-        text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
-    }
-    
-    /* Tarjetas de métricas - MODO CLARO */
-    .metric-card {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%) !important;
-        padding: 1rem !important;
-        border-radius: 10px !important;
-        color: white !important;
-        text-align: center !important;
-        margin: 0.5rem 0 !important;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1) !important;
-    }
-    
-    .metric-card h1, 
-    .metric-card h2, 
-    .metric-card h3,
-    .metric-card * {
-        color: white !important;
-        margin: 0.2rem 0 !important;
-    }
-    
-    /* Cajas de éxito - MODO CLARO */
-    .success-box {
-        background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%) !important;
-        padding: 1rem !important;
-        border-radius: 10px !important;
-        color: white !important;
-        margin: 1rem 0 !important;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1) !important;
-    }
-    
-    .success-box *,
-    .success-box strong {
-        color: white !important;
-    }
-    
-    /* Cajas de advertencia - MODO CLARO */
-    .warning-box {
-        background: linear-gradient(135deg, #fa709a 0%, #fee140 100%) !important;
-        padding: 1rem !important;
-        border-radius: 10px !important;
-        color: white !important;
-        margin: 1rem 0 !important;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1) !important;
-    }
-    
-    .warning-box *,
-    .warning-box strong {
-        color: white !important;
-    }
-    
-    /* MODO OSCURO - Detección automática */
-    @media (prefers-color-scheme: dark) {
-        .main-header {
-            color: #4fc3f7 !important;
-        }
-    }
-    
-    /* Pestañas */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 2px;
-    }
-    
-    .stTabs [data-baseweb="tab"] {
-        height: 50px !important;
-        padding-left: 20px !important;
-        padding-right: 20px !important;
-        border-radius: 10px 10px 0px 0px !important;
-        transition: all 0.3s ease !important;
-    }
-    
-    .stTabs [aria-selected="true"] {
-        background-color: #1f77b4 !important;
-        color: white !important;
-    }
-    
-    /* Asegurar que los gráficos tengan fondo transparente */
-    .js-plotly-plot {
-        background: transparent !important;
-    }
-    
-    .plotly {
-        background: transparent !important;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Configuración de la página y CSS (construidos una vez por proceso en styles.py)
+st.set_page_config(**PAGE_CONFIG)
+st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+
+# Segundos entre actualizaciones de la barra de avance de los trabajos en segundo plano
+JOB_POLL_SECONDS = 0.5
 
-# Funciones auxiliares (mantener las mismas)
+# Límites de la tabla de entrada manual
+MANUAL_MAX_ITEMS = 100
+MANUAL_MAX_ROWS = 100_000
+
+# Funciones auxiliares (los cálculos viven en association_engine.py)
 @st.cache_data
 def generate_sample_data(n_items=6, n_instances=100, seed=42):
     """Genera datos de ejemplo con correlaciones realistas"""
-    np.random.seed(seed)
-    random.seed(seed)
-    
-    items = ['Pan', 'Leche', 'Huevos', 'Mantequilla', 'Queso', 'Jamón', 'Yogurt', 'Cereal'][:n_items]
-    data = []
-    
-    # Probabilidades base para cada item
-    base_probs = [0.7, 0.6, 0.4, 0.4, 0.3, 0.3, 0.35, 0.25][:n_items]
-    
-    for i in range(n_instances):
-        transaction = []
-        for j, item in enumerate(items):
-            prob = base_probs[j]
-            
-            # Añadir correlaciones realistas
-            if item == 'Mantequilla' and len(transaction) > 0 and transaction[0] == 1:  # Pan
-                prob += 0.3
-            elif item == 'Jamón' and len(transaction) > 4 and len(transaction) > 4 and transaction[4] == 1:  # Queso
-                prob += 0.4
-            elif item == 'Yogurt' and len(transaction) > 1 and transaction[1] == 1:  # Leche
-                prob += 0.2
-            
-            prob = min(prob, 0.95)  # Limitar probabilidad máxima
-            transaction.append(1 if random.random() < prob else 0)
-        
-        data.append(transaction)
-    
-    return pd.DataFrame(data, columns=items)
-
-def validate_data(data):
-    """Valida que los datos sean correctos"""
-    if data is None or data.empty:
-        return False, "No hay datos para validar"
-    
-    # Verificar que hay al menos 2 columnas
-    if len(data.columns) < 2:
-        return False, "Se necesitan al menos 2 items para el análisis"
-    
-    # Verificar que hay al menos 5 filas
-    if len(data) < 5:
-        return False, "Se necesitan al menos 5 instancias para el análisis"
-    
-    # Verificar valores binarios
-    for col in data.columns:
-        unique_vals = data[col].dropna().unique()
-        if not all(val in [0, 1] for val in unique_vals):
-            return False, f"La columna '{col}' contiene valores no binarios"
-    
-    return True, "Datos válidos"
-
-def calculate_dependency_factors(a, b, c, d, n):
-    """
-    Calcula los 4 factores de dependencia usando la fórmula: FD = P(A∩B) / (P(A) × P(B))
-    
-    Tabla de contingencia CORREGIDA:
-                Item2=1    Item2=0    Total
-    Item1=1        a         b        a+b
-    Item1=0        c         d        c+d
-    Total        a+c       b+d        n
-    
-    Donde:
-    - a = Item1=1 ∩ Item2=1
-    - b = Item1=1 ∩ Item2=0  
-    - c = Item1=0 ∩ Item2=1
-    - d = Item1=0 ∩ Item2=0
-    """
-    
-    if n == 0:
-        return {
-            'fd_1_1': 0, 'fd_1_0': 0, 'fd_0_1': 0, 'fd_0_0': 0,
-            'probabilities': {}, 'formulas': {}, 'contingency_mapping': {}
-        }
-    
-    # Calcular probabilidades marginales
-    p_item1_1 = (a + b) / n  # P(Item1=1)
-    p_item1_0 = (c + d) / n  # P(Item1=0)
-    p_item2_1 = (a + c) / n  # P(Item2=1)
-    p_item2_0 = (b + d) / n  # P(Item2=0)
-    
-    # Calcular probabilidades conjuntas
-    p_both_1_1 = a / n  # P(Item1=1 ∩ Item2=1)
-    p_1_0 = b / n        # P(Item1=1 ∩ Item2=0)
-    p_0_1 = c / n        # P(Item1=0 ∩ Item2=1)
-    p_both_0_0 = d / n   # P(Item1=0 ∩ Item2=0)
-    
-    # Calcular factores de dependencia: FD = P(A∩B) / (P(A) × P(B))
-    fd_1_1 = p_both_1_1 / (p_item1_1 * p_item2_1) if (p_item1_1 * p_item2_1) > 0 else 0
-    fd_1_0 = p_1_0 / (p_item1_1 * p_item2_0) if (p_item1_1 * p_item2_0) > 0 else 0
-    fd_0_1 = p_0_1 / (p_item1_0 * p_item2_1) if (p_item1_0 * p_item2_1) > 0 else 0
-    fd_0_0 = p_both_0_0 / (p_item1_0 * p_item2_0) if (p_item1_0 * p_item2_0) > 0 else 0
-    
-    return {
-        'fd_1_1': fd_1_1,  # Item1=1, Item2=1
-        'fd_1_0': fd_1_0,  # Item1=1, Item2=0
-        'fd_0_1': fd_0_1,  # Item1=0, Item2=1
-        'fd_0_0': fd_0_0,  # Item1=0, Item2=0
-        'probabilities': {
-            'p_item1_1': p_item1_1,
-            'p_item1_0': p_item1_0,
-            'p_item2_1': p_item2_1,
-            'p_item2_0': p_item2_0,
-            'p_both_1_1': p_both_1_1,
-            'p_1_0': p_1_0,
-            'p_0_1': p_0_1,
-            'p_both_0_0': p_both_0_0
-        },
-        'formulas': {
-            'fd_1_1_formula': f"{p_both_1_1:.3f} / ({p_item1_1:.3f} × {p_item2_1:.3f})",
-            'fd_1_0_formula': f"{p_1_0:.3f} / ({p_item1_1:.3f} × {p_item2_0:.3f})",
-            'fd_0_1_formula': f"{p_0_1:.3f} / ({p_item1_0:.3f} × {p_item2_1:.3f})",
-            'fd_0_0_formula': f"{p_both_0_0:.3f} / ({p_item1_0:.3f} × {p_item2_0:.3f})"
-        },
-        'contingency_mapping': {
-            'a': a,  # Item1=1, Item2=1
-            'b': b,  # Item1=1, Item2=0
-            'c': c,  # Item1=0, Item2=1
-            'd': d   # Item1=0, Item2=0
-        },
-        'verification': {
-            'example_calculation': f"FD(1,1) = P(1∩1)/[P(1)×P(1)] = ({a}/{n}) / [({a+b}/{n}) × ({a+c}/{n})] = {p_both_1_1:.3f} / ({p_item1_1:.3f} × {p_item2_1:.3f}) = {fd_1_1:.3f}"
-        }
-    }
-
-def interpret_dependency_factors(fd_results, item1, item2):
-    """Genera interpretaciones contextuales de los factores de dependencia"""
-    interpretations = []
-    
-    fd_1_1 = fd_results['fd_1_1']
-    fd_1_0 = fd_results['fd_1_0']
-    fd_0_1 = fd_results['fd_0_1']
-    fd_0_0 = fd_results['fd_0_0']
-    
-    # Interpretación principal
-    if fd_0_1 > fd_1_1:
-        if fd_0_1 > 1.2:
-            interpretations.append(f"📈 **Comprar {item2} disminuye la compra de {item1}** (FD(~{item1}|{item2}) = {fd_0_1:.3f} > FD({item1}|{item2}) = {fd_1_1:.3f})")
-        else:
-            interpretations.append(f"⚠️ **Comprar {item2} tiende a disminuir la compra de {item1}** (FD(~{item1}|{item2}) = {fd_0_1:.3f})")
-    elif fd_1_1 > fd_0_1:
-        if fd_1_1 > 1.2:
-            interpretations.append(f"📈 **Comprar {item2} aumenta la compra de {item1}** (FD({item1}|{item2}) = {fd_1_1:.3f} > FD(~{item1}|{item2}) = {fd_0_1:.3f})")
-        else:
-            interpretations.append(f"✅ **Comprar {item2} tiende a aumentar la compra de {item1}** (FD({item1}|{item2}) = {fd_1_1:.3f})")
-    else:
-        interpretations.append(f"⚪ **Comprar {item2} no afecta significativamente la compra de {item1}** (FD ≈ {fd_1_1:.3f})")
-    
-    # Interpretación secundaria
-    if fd_0_0 > fd_1_0:
-        interpretations.append(f"📉 **NO comprar {item2} disminuye la compra de {item1}** (FD(~{item1}|~{item2}) = {fd_0_0:.3f} > FD({item1}|~{item2}) = {fd_1_0:.3f})")
-    elif fd_1_0 > fd_0_0:
-        interpretations.append(f"📈 **NO comprar {item2} aumenta la compra de {item1}** (FD({item1}|~{item2}) = {fd_1_0:.3f} > FD(~{item1}|~{item2}) = {fd_0_0:.3f})")
-    
-    # Análisis detallado
-    interpretations.append("---")
-    interpretations.append("**Análisis detallado por celda:**")
-    
-    if fd_1_1 > 1.2:
-        interpretations.append(f"✅ **Fuerte asociación positiva** entre {item1}=1 y {item2}=1 (FD = {fd_1_1:.3f})")
-    elif fd_1_1 < 0.8:
-        interpretations.append(f"❌ **Asociación negativa** entre {item1}=1 y {item2}=1 (FD = {fd_1_1:.3f})")
-    else:
-        interpretations.append(f"⚪ **Independencia** entre {item1}=1 y {item2}=1 (FD = {fd_1_1:.3f})")
-    
-    if fd_0_1 > 1.2:
-        interpretations.append(f"⚠️ **Cuando se compra {item2}, es más probable NO comprar {item1}** (FD = {fd_0_1:.3f})")
-    elif fd_0_1 < 0.8:
-        interpretations.append(f"✅ **Cuando se compra {item2}, es menos probable NO comprar {item1}** (FD = {fd_0_1:.3f})")
-    
-    return interpretations
+    return engine.generate_sample_data(n_items, n_instances, seed)
 
-def calculate_metrics(data, item1, item2):
-    """Calcula todas las métricas de asociación con manejo de errores - CORREGIDO"""
+def calculate_metrics(data, item1, item2, **test_options):
+    """Calcula todas las métricas de asociación con manejo de errores"""
     try:
-        # CORRECCIÓN: Crear tabla de contingencia con el orden correcto
-        # item1 en filas, item2 en columnas
-        contingency = pd.crosstab(data[item1], data[item2], margins=True)
-        
-        # Asegurar que tenemos todas las categorías (0 y 1)
-        for val in [0, 1]:
-            if val not in contingency.index:
-                contingency.loc[val] = 0
-            if val not in contingency.columns:
-                contingency[val] = 0
-        
-        # Reordenar para mostrar 1 primero, luego 0
-        contingency = contingency.reindex([1, 0, 'All'])
-        contingency = contingency.reindex(columns=[1, 0, 'All'])
-        
-        # Recalcular totales después del reordenamiento
-        for i in [1, 0]:
-            contingency.loc[i, 'All'] = contingency.loc[i, 1] + contingency.loc[i, 0]
-            contingency.loc['All', i] = contingency.loc[1, i] + contingency.loc[0, i]
-        contingency.loc['All', 'All'] = contingency.loc[1, 'All'] + contingency.loc[0, 'All']
-        
-        # Extraer valores CORRECTOS según la tabla estándar
-        a = contingency.loc[1, 1]  # Item1=1, Item2=1 (celda superior izquierda)
-        b = contingency.loc[1, 0]  # Item1=1, Item2=0 (celda superior derecha)
-        c = contingency.loc[0, 1]  # Item1=0, Item2=1 (celda inferior izquierda)
-        d = contingency.loc[0, 0]  # Item1=0, Item2=0 (celda inferior derecha)
-        n = contingency.loc['All', 'All']
-        
-        # Calcular métricas básicas
-        conf_1_to_2 = a / (a + b) if (a + b) > 0 else 0
-        conf_2_to_1 = a / (a + c) if (a + c) > 0 else 0
-        cov_1 = (a + b) / n if n > 0 else 0
-        cov_2 = (a + c) / n if n > 0 else 0
-        
-        # Factor de dependencia ANTIGUO
-        expected_a = (a + b) * (a + c) / n if n > 0 else 0
-        dependency_factor_old = (a - expected_a) / expected_a if expected_a > 0 else 0
-        
-        # NUEVOS Factores de dependencia
-        dependency_factors = calculate_dependency_factors(a, b, c, d, n)
-        
-        # Interpretaciones contextuales
-        interpretations = interpret_dependency_factors(dependency_factors, item1, item2)
-        
-        # Chi-cuadrado
-        denominator = (a + b) * (c + d) * (a + c) * (b + d)
-        chi2_stat = n * (a * d - b * c) ** 2 / denominator if denominator > 0 else 0
-        
-        # Valores críticos
-        critical_values = {
-            '95%': 3.841,
-            '99%': 6.635,
-            '99.99%': 10.828
-        }
-        
-        # Determinar significancia
-        significance = []
-        for level, critical in critical_values.items():
-            if chi2_stat > critical:
-                significance.append(level)
-        
-        # Todas las reglas de asociación
-        all_rules = calculate_all_association_rules(a, b, c, d, n, item1, item2)
-        
-        return {
-            'contingency': contingency,
-            'a': int(a), 'b': int(b), 'c': int(c), 'd': int(d), 'n': int(n),
-            'conf_1_to_2': float(conf_1_to_2),
-            'conf_2_to_1': float(conf_2_to_1),
-            'cov_1': float(cov_1),
-            'cov_2': float(cov_2),
-            'dependency_factor': float(dependency_factor_old),
-            'dependency_factors': dependency_factors,
-            'dependency_interpretations': interpretations,
-            'chi2_stat': float(chi2_stat),
-            'critical_values': critical_values,
-            'significance': significance,
-            'all_rules': all_rules
-        }
+        return engine.calculate_metrics(data, item1, item2, **test_options)
     
     except Exception as e:
         st.error(f"Error calculando métricas: {str(e)}")
         return None
 
-def calculate_all_association_rules(a, b, c, d, n, item1, item2):
-    """Calcula todas las 8 reglas de asociación posibles"""
-    
-    rules = []
-    
-    # Reglas para item1 → item2
-    cb_1_1 = a / n if n > 0 else 0
-    cf_1_1 = a / (a + b) if (a + b) > 0 else 0
-    rules.append({
-        'rule': f'Si ({item1}=1) Entonces {item2}=1',
-        'coverage': cb_1_1,
-        'confidence': cf_1_1,
-        'support': a,
-        'total': a + b,
-        'formula': f'({a}/{a + b})' if (a + b) > 0 else '(0/0)'
-    })
-    
-    cb_1_0 = b / n if n > 0 else 0
-    cf_1_0 = b / (a + b) if (a + b) > 0 else 0
-    rules.append({
-        'rule': f'Si ({item1}=1) Entonces {item2}=0',
-        'coverage': cb_1_0,
-        'confidence': cf_1_0,
-        'support': b,
-        'total': a + b,
-        'formula': f'({b}/{a + b})' if (a + b) > 0 else '(0/0)'
-    })
-    
-    cb_0_1 = c / n if n > 0 else 0
-    cf_0_1 = c / (c + d) if (c + d) > 0 else 0
-    rules.append({
-        'rule': f'Si ({item1}=0) Entonces {item2}=1',
-        'coverage': cb_0_1,
-        'confidence': cf_0_1,
-        'support': c,
-        'total': c + d,
-        'formula': f'({c}/{c + d})' if (c + d) > 0 else '(0/0)'
-    })
-    
-    cb_0_0 = d / n if n > 0 else 0
-    cf_0_0 = d / (c + d) if (c + d) > 0 else 0
-    rules.append({
-        'rule': f'Si ({item1}=0) Entonces {item2}=0',
-        'coverage': cb_0_0,
-        'confidence': cf_0_0,
-        'support': d,
-        'total': c + d,
-        'formula': f'({d}/{c + d})' if (c + d) > 0 else '(0/0)'
-    })
-    
-    # Reglas para item2 → item1
-    cb_2_1 = a / n if n > 0 else 0
-    cf_2_1 = a / (a + c) if (a + c) > 0 else 0
-    rules.append({
-        'rule': f'Si ({item2}=1) Entonces {item1}=1',
-        'coverage': cb_2_1,
-        'confidence': cf_2_1,
-        'support': a,
-        'total': a + c,
-        'formula': f'({a}/{a + c})' if (a + c) > 0 else '(0/0)'
-    })
-    
-    cb_2_0 = c / n if n > 0 else 0
-    cf_2_0 = c / (a + c) if (a + c) > 0 else 0
-    rules.append({
-        'rule': f'Si ({item2}=1) Entonces {item1}=0',
-        'coverage': cb_2_0,
-        'confidence': cf_2_0,
-        'support': c,
-        'total': a + c,
-        'formula': f'({c}/{a + c})' if (a + c) > 0 else '(0/0)'
-    })
-    
-    cb_0_2 = b / n if n > 0 else 0
-    cf_0_2 = b / (b + d) if (b + d) > 0 else 0
-    rules.append({
-        'rule': f'Si ({item2}=0) Entonces {item1}=1',
-        'coverage': cb_0_2,
-        'confidence': cf_0_2,
-        'support': b,
-        'total': b + d,
-        'formula': f'({b}/{b + d})' if (b + d) > 0 else '(0/0)'
-    })
-    
-    cb_0_0_2 = d / n if n > 0 else 0
-    cf_0_0_2 = d / (b + d) if (b + d) > 0 else 0
-    rules.append({
-        'rule': f'Si ({item2}=0) Entonces {item1}=0',
-        'coverage': cb_0_0_2,
-        'confidence': cf_0_0_2,
-        'support': d,
-        'total': b + d,
-        'formula': f'({d}/{b + d})' if (b + d) > 0 else '(0/0)'
-    })
-    
-    return rules
-
-def create_contingency_heatmap(contingency_table, item1, item2):
-    """Crea heatmap de la tabla de contingencia"""
+def calculate_metrics_from_index(index, item1, item2, **test_options):
+    """Calcula las métricas de un par desde el índice invertido, con manejo de errores"""
     try:
-        data_matrix = contingency_table.iloc[:-1, :-1].values
-        
-        fig = go.Figure(data=go.Heatmap(
-            z=data_matrix,
-            x=[f'{item2}=1', f'{item2}=0'],
-            y=[f'{item1}=1', f'{item1}=0'],
-            colorscale='Blues',
-            text=data_matrix,
-            texttemplate="%{text}",
-            textfont={"size": 20},
-            hoverongaps=False,
-            showscale=True
-        ))
-        
-        fig.update_layout(
-            title=f'Tabla de Contingencia: {item1} vs {item2}',
-            xaxis_title=item2,
-            yaxis_title=item1,
-            font=dict(size=14),
-            height=400,
-            width=500,
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)'
-        )
-        
-        return fig
+        return engine.calculate_metrics_from_index(index, item1, item2, **test_options)
     
     except Exception as e:
-        st.error(f"Error creando heatmap: {str(e)}")
-        return go.Figure()
+        st.error(f"Error calculando métricas: {str(e)}")
+        return None
 
-def create_metrics_chart(metrics, item1, item2):
-    """Crea gráfico de métricas"""
+def calculate_metrics_from_counts(counts, item1, item2, **test_options):
+    """Calcula las métricas de un par desde los conteos acumulados, con manejo de errores"""
     try:
-        categories = [
-            f'Confianza<br>{item1}→{item2}',
-            f'Confianza<br>{item2}→{item1}',
-            f'Cobertura<br>{item1}',
-            f'Cobertura<br>{item2}'
-        ]
-        
-        values = [
-            metrics['conf_1_to_2'],
-            metrics['conf_2_to_1'],
-            metrics['cov_1'],
-            metrics['cov_2']
-        ]
-        
-        colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4']
-        
-        fig = go.Figure(data=[
-            go.Bar(
-                x=categories,
-                y=values,
-                marker_color=colors,
-                text=[f'{v:.3f}' for v in values],
-                textposition='auto',
-            )
-        ])
-        
-        fig.update_layout(
-            title='Métricas de Asociación',
-            yaxis_title='Valor',
-            yaxis=dict(range=[0, 1]),
-            font=dict(size=12),
-            height=400,
-            showlegend=False,
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)'
-        )
-        
-        return fig
+        return engine.calculate_metrics_from_counts(counts, item1, item2, **test_options)
     
     except Exception as e:
-        st.error(f"Error creando gráfico de métricas: {str(e)}")
-        return go.Figure()
+        st.error(f"Error calculando métricas: {str(e)}")
+        return None
 
-def create_dependency_factors_chart(dependency_factors, item1, item2):
-    """Crea gráfico con los 4 factores de dependencia - CORREGIDO"""
-    try:
-        # CORRECCIÓN: Organizar según la tabla de contingencia estándar
-        categories = [
-            f'{item1}=1<br>{item2}=1',  # a
-            f'{item1}=1<br>{item2}=0',  # b
-            f'{item1}=0<br>{item2}=1',  # c
-            f'{item1}=0<br>{item2}=0'   # d
-        ]
-        
-        values = [
-            dependency_factors['fd_1_1'],  # a: Item1=1, Item2=1
-            dependency_factors['fd_1_0'],  # b: Item1=1, Item2=0
-            dependency_factors['fd_0_1'],  # c: Item1=0, Item2=1
-            dependency_factors['fd_0_0']   # d: Item1=0, Item2=0
-        ]
-        
-        colors = []
-        for val in values:
-            if val > 1.2:
-                colors.append('#4CAF50')  # Verde - Asociación positiva fuerte
-            elif val < 0.8:
-                colors.append('#F44336')  # Rojo - Asociación negativa fuerte
-            else:
-                colors.append('#9E9E9E')  # Gris - Independencia
-        
-        fig = go.Figure(data=[
-            go.Bar(
-                x=categories,
-                y=values,
-                marker_color=colors,
-                text=[f'{v:.3f}' for v in values],
-                textposition='auto',
-            )
-        ])
-        
-        fig.add_hline(y=1, line_dash="dash", line_color="black", 
-                      annotation_text="Independencia (FD = 1)")
-        
-        fig.update_layout(
-            title=f'Factores de Dependencia: {item1} vs {item2}',
-            yaxis_title='Factor de Dependencia',
-            font=dict(size=12),
-            height=400,
-            showlegend=False,
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)'
-        )
-        
-        return fig
-    
-    except Exception as e:
-        st.error(f"Error creando gráfico de factores de dependencia: {str(e)}")
-        return go.Figure()
+def set_dataset(data=None, counts=None, shared=None):
+    """
+    Reemplaza el dataset activo y descarta resultados anteriores.
 
-def create_all_rules_chart(all_rules):
-    """Crea gráfico con todas las reglas de asociación"""
-    try:
-        rule_names = [rule['rule'].replace(' Entonces ', '→').replace('Si (', '').replace(')', '') for rule in all_rules]
-        confidences = [rule['confidence'] for rule in all_rules]
-        coverages = [rule['coverage'] for rule in all_rules]
-        
-        fig = go.Figure()
-        
-        fig.add_trace(go.Bar(
-            name='Confianza',
-            x=rule_names,
-            y=confidences,
-            marker_color='#FF6B6B',
-            text=[f'{v:.1%}' for v in confidences],
-            textposition='auto',
-        ))
-        
-        fig.add_trace(go.Bar(
-            name='Cobertura',
-            x=rule_names,
-            y=coverages,
-            marker_color='#4ECDC4',
-            text=[f'{v:.1%}' for v in coverages],
-            textposition='auto',
-        ))
-        
-        fig.update_layout(
-            title='Todas las Reglas de Asociación',
-            xaxis_title='Reglas',
-            yaxis_title='Valor',
-            yaxis=dict(range=[0, 1]),
-            barmode='group',
-            font=dict(size=10),
-            height=500,
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            xaxis_tickangle=-45
-        )
-        
-        return fig
-    
-    except Exception as e:
-        st.error(f"Error creando gráfico de todas las reglas: {str(e)}")
-        return go.Figure()
+    data son las transacciones (puede ser None si solo hay conteos) y counts
+    los conteos de co-ocurrencia; si no se indican, se construyen la primera
+    vez que se necesitan (get_active_counts). Las transacciones se guardan en
+    formato compacto y compartido (dataset_store): las sesiones con el mismo
+    contenido usan el mismo DataFrame de solo lectura. shared permite pasar un
+    dataset ya compartido (por ejemplo, un archivo nativo abierto con mmap).
+    """
+    if shared is None and data is not None:
+        with span('Almacenamiento compartido', rows=len(data)):
+            shared = share_dataset(data)
+    if shared is not None:
+        data = shared.data
+    st.session_state.shared = shared
+    st.session_state.data = data
+    st.session_state.counts = counts
+    st.session_state.all_pairs_results = None
+    st.session_state.parallel_pairs = None
+    st.session_state.top_pairs = None
+    st.session_state.loaded_upload = None
+    # Los trabajos del dataset anterior se cancelan si ninguna otra sesión los espera
+    for job_id, _ in st.session_state.get('jobs', {}).values():
+        get_job_runner().cancel(job_id)
+    st.session_state.jobs = {}
+    st.session_state.fingerprint = shared.fingerprint if shared is not None else None
 
-def create_scatter_plot(data, item1, item2):
-    """Crea gráfico de dispersión con jitter"""
-    try:
-        np.random.seed(42)
-        x_jitter = data[item1] + np.random.normal(0, 0.05, len(data))
-        y_jitter = data[item2] + np.random.normal(0, 0.05, len(data))
-        
-        colors = []
-        for _, row in data.iterrows():
-            if row[item1] == 1 and row[item2] == 1:
-                colors.append('Ambos=1')
-            elif row[item1] == 1 and row[item2] == 0:
-                colors.append(f'{item1}=1, {item2}=0')
-            elif row[item1] == 0 and row[item2] == 1:
-                colors.append(f'{item1}=0, {item2}=1')
+def get_active_counts():
+    """Conteos del dataset activo; se construyen una sola vez y luego se actualizan por diferencias"""
+    if st.session_state.counts is None and st.session_state.data is not None:
+        with span('Conteos de co-ocurrencia', rows=len(st.session_state.data)):
+            shared = st.session_state.get('shared')
+            # Los conteos compartidos son de solo lectura; las actualizaciones trabajan sobre una copia
+            if shared is not None and shared.data is st.session_state.data:
+                st.session_state.counts = shared.counts()
             else:
-                colors.append('Ambos=0')
-        
-        fig = px.scatter(
-            x=x_jitter, y=y_jitter,
-            color=colors,
-            title=f'Distribución de Datos: {item1} vs {item2}',
-            labels={'x': item1, 'y': item2},
-            color_discrete_map={
-                'Ambos=1': '#FF6B6B',
-                f'{item1}=1, {item2}=0': '#4ECDC4',
-                f'{item1}=0, {item2}=1': '#45B7D1',
-                'Ambos=0': '#96CEB4'
-            }
-        )
-        
-        fig.update_layout(
-            height=400,
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)'
-        )
-        fig.update_xaxes(range=[-0.3, 1.3], tickvals=[0, 1])
-        fig.update_yaxes(range=[-0.3, 1.3], tickvals=[0, 1])
-        
-        return fig
-    
-    except Exception as e:
-        st.error(f"Error creando gráfico de dispersión: {str(e)}")
-        return go.Figure()
+                st.session_state.counts = counts_from_data(st.session_state.data)
+    return st.session_state.counts
 
-def create_chi_square_visualization(chi2_stat, critical_values):
-    """Crea visualización de la prueba Chi-cuadrado"""
-    try:
-        x = np.linspace(0, max(15, chi2_stat + 2), 1000)
-        y = chi2.pdf(x, df=1)
-        
-        fig = go.Figure()
-        
-        fig.add_trace(go.Scatter(
-            x=x, y=y,
-            mode='lines',
-            name='Distribución χ²',
-            line=dict(color='blue', width=2)
+def deferred_counts():
+    """
+    Función sin argumentos que devuelve los conteos del dataset activo, para
+    construirlos dentro de un trabajo en segundo plano y no en el script.
+
+    Si la sesión ya tiene conteos, los devuelve tal cual; si no, los construye
+    al llamarla (los del dataset compartido quedan guardados para las demás
+    sesiones y para get_active_counts).
+    """
+    counts = st.session_state.counts
+    data = st.session_state.data
+    shared = st.session_state.get('shared')
+    if counts is not None:
+        return lambda: counts
+    if shared is not None and shared.data is data:
+        return shared.counts
+    return lambda: counts_from_data(data)
+
+@st.cache_resource
+def get_result_cache():
+    """
+    Caché de resultados del proceso, compartida por todas las sesiones.
+
+    Con la variable de entorno RESULT_CACHE_DIR se activa además el nivel en disco,
+    que sobrevive a reinicios del servidor.
+    """
+    return ResultCache(disk_dir=os.environ.get('RESULT_CACHE_DIR') or None)
+
+@st.cache_resource
+def get_job_runner():
+    """Pool de trabajos en segundo plano del proceso, compartido por todas las sesiones"""
+    return JobRunner()
+
+@st.cache_resource
+def get_upload_cache():
+    """
+    Carpeta de archivos Excel ya convertidos, compartida por todas las sesiones
+    (variable de entorno UPLOAD_CACHE_DIR; por defecto, en la carpeta temporal).
+    """
+    return UploadCache(os.environ.get('UPLOAD_CACHE_DIR') or DEFAULT_CACHE_DIR)
+
+@st.cache_resource(max_entries=4)
+def get_recommender(fingerprint, metric, top_consequents, _counts):
+    """
+    Recomendador de canastas del dataset con esa huella, compartido por todas
+    las sesiones; el índice de reglas se construye una vez por huella y métrica.
+    """
+    with span('Índice de recomendaciones'):
+        return Recommender(build_rule_index(_counts, metric=metric, top_consequents=top_consequents))
+
+def get_dataset_fingerprint():
+    """Huella del dataset activo; se calcula una vez por versión del dataset"""
+    if st.session_state.get('fingerprint') is None:
+        source = st.session_state.data if st.session_state.data is not None else st.session_state.counts
+        if source is None:
+            return None
+        with span('Huella del dataset', rows=len(source) if source is st.session_state.data else None):
+            st.session_state.fingerprint = dataset_fingerprint(source)
+    return st.session_state.fingerprint
+
+def validate_active_data():
+    """validate_data del dataset activo; se calcula una vez por huella y no en cada rerun"""
+    fingerprint = get_dataset_fingerprint()
+    validation = st.session_state.get('validation')
+    if validation is None or validation[0] != fingerprint:
+        with span('Validación', rows=len(st.session_state.data)):
+            validation = (fingerprint, validate_data(st.session_state.data))
+        st.session_state.validation = validation
+    return validation[1]
+
+def show_dataframe(frame, stage, **kwargs):
+    """st.dataframe medido como span (la serialización ocurre dentro de la llamada)"""
+    with span(f'st.dataframe: {stage}', rows=len(frame)):
+        return st.dataframe(frame, **kwargs)
+
+def render_performance_panel(spans):
+    """Panel "Rendimiento" de la barra lateral con los spans del último rerun"""
+    with st.sidebar.expander("⏱️ Rendimiento", expanded=True):
+        if not spans:
+            st.caption("No se midieron etapas en este rerun")
+            return
+        st.dataframe(pd.DataFrame([
+            {
+                'Etapa': '· ' * record['depth'] + record['name'],
+                'ms': round(record['seconds'] * 1000, 2),
+                'Filas': record['rows'],
+                'Δ memoria (MiB)': round(record['memory_delta_bytes'] / 2 ** 20, 2)
+            }
+            for record in spans
+        ]), use_container_width=True, hide_index=True)
+        total = sum(record['seconds'] for record in spans if record['depth'] == 0)
+        st.caption(f"Total medido: {total * 1000:.1f} ms")
+        jobs = get_job_runner().stats()
+        st.caption("Trabajos en segundo plano: " + (
+            ", ".join(f"{count} {status}" for status, count in jobs.items() if count) or "ninguno"
         ))
-        
-        if chi2_stat > 0:
-            fig.add_vline(
-                x=chi2_stat,
-                line_dash="dash",
-                line_color="red",
-                annotation_text=f"χ² calculado = {chi2_stat:.3f}",
-                annotation_position="top"
-            )
-        
-        colors = ['orange', 'purple', 'green']
-        for i, (level, critical) in enumerate(critical_values.items()):
-            fig.add_vline(
-                x=critical,
-                line_dash="dot",
-                line_color=colors[i],
-                annotation_text=f"{level}: {critical}",
-                annotation_position="top"
-            )
-        
-        fig.update_layout(
-            title='Prueba Chi-Cuadrado',
-            xaxis_title='Valor χ²',
-            yaxis_title='Densidad',
-            height=400,
-            showlegend=True,
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)'
-        )
-        
-        return fig
-    
-    except Exception as e:
-        st.error(f"Error creando visualización Chi-cuadrado: {str(e)}")
-        return go.Figure()
+        store = registry_stats()
+        st.caption(f"Datasets compartidos en el proceso: {store['datasets']} ({store['bytes'] / 2 ** 20:.1f} MiB)")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("JSON", spans_to_json(spans), "rendimiento.json", "application/json")
+        with col2:
+            st.download_button("Prometheus", spans_to_prometheus(spans), "rendimiento.prom", "text/plain")
 
-def create_frequency_chart(data):
-    """Crea gráfico de frecuencias por item"""
+def run_app():
+    """Ejecuta main() y, si el panel de Rendimiento está activo, mide las etapas del rerun"""
+    recording = st.session_state.get('performance_panel', False)
+    if recording:
+        start_recording()
     try:
-        freq_data = data.sum().sort_values(ascending=False)
-        
-        fig = px.bar(
-            x=freq_data.index,
-            y=freq_data.values,
-            title="Frecuencia de cada Item",
-            labels={'x': 'Items', 'y': 'Frecuencia'},
-            color=freq_data.values,
-            color_continuous_scale='viridis'
-        )
-        fig.update_layout(
-            height=400,
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)'
-        )
-        return fig
-    
-    except Exception as e:
-        st.error(f"Error creando gráfico de frecuencias: {str(e)}")
-        return go.Figure()
+        with span('Rerun completo'):
+            main()
+    finally:
+        if recording:
+            render_performance_panel(stop_recording())
+
+def cached_result(name, compute, *params):
+    """Devuelve el resultado guardado para (dataset, cálculo, parámetros) o lo calcula y lo guarda"""
+    with span(f'Cálculo: {name}'):
+        key = make_key(get_dataset_fingerprint(), name, *params)
+        return get_result_cache().get_or_compute(key, compute)
+
+def start_job(slot, name, compute, *params):
+    """
+    Lanza en segundo plano un cálculo de todo el catálogo.
+
+    Si el resultado ya está en la caché se guarda de inmediato en
+    st.session_state[slot]; si no, se lanza el trabajo (o se comparte el de otra
+    sesión con la misma llave) y su id y su llave quedan en st.session_state.jobs
+    hasta que collect_job recoge el resultado. compute recibe el callback de avance.
+    """
+    key = make_key(get_dataset_fingerprint(), name, *params)
+    cache = get_result_cache()
+    missing = object()
+    result = cache.get(key, missing)
+    if result is not missing:
+        st.session_state[slot] = result
+        return
+
+    def run(progress):
+        # El resultado se guarda aunque la sesión que lo pidió ya no exista
+        result = compute(progress)
+        cache.put(key, result)
+        return result
+
+    st.session_state[slot] = None
+    st.session_state.jobs[slot] = (get_job_runner().submit(key, name, run).id, key)
+
+def collect_job(slot, label):
+    """
+    Muestra el avance del trabajo de slot y, cuando termina, guarda su
+    resultado en st.session_state[slot]. Devuelve True mientras sigue corriendo.
+    """
+    if slot not in st.session_state.jobs:
+        return False
+    job_id, key = st.session_state.jobs[slot]
+    job = get_job_runner().get(job_id)
+    if job is not None and not job.is_finished:
+        job_progress(slot, label)
+        return True
+
+    del st.session_state.jobs[slot]
+    if job is None:
+        # El registro de trabajos ya lo olvidó, pero el resultado puede seguir en la caché
+        result = get_result_cache().get(key)
+        if result is not None:
+            st.session_state[slot] = result
+        else:
+            st.warning(f"El cálculo de {label} ya no está disponible; vuelve a lanzarlo")
+        return False
+    if job.status == DONE:
+        result = get_result_cache().get(job.key)
+        st.session_state[slot] = result if result is not None else job.result
+    elif job.status == CANCELLED:
+        st.info(f"Cálculo de {label} cancelado")
+    else:
+        st.error(f"Error calculando {label}: {job.error}")
+    # El resultado ya está en la caché y en la sesión: el trabajo no lo retiene más
+    get_job_runner().release(job.id)
+    return False
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def job_progress(slot, label):
+    """Barra de avance que se actualiza sola (sin rerun completo) hasta que el trabajo termina"""
+    job_id, _ = st.session_state.jobs.get(slot, (None, None))
+    job = get_job_runner().get(job_id)
+    if job is None or job.is_finished:
+        st.rerun()
+    if job.total:
+        text = f"⏳ {label}: {job.done:,} de {job.total:,} bloques ({job.elapsed():.0f} s)"
+    else:
+        text = f"⏳ {label}: {job.status} ({job.elapsed():.0f} s)"
+    st.progress(job.fraction() or 0.0, text=text)
+    if st.button("✖️ Cancelar", key=f"cancel_{slot}"):
+        get_job_runner().cancel(job.id)
+        del st.session_state.jobs[slot]
+        st.rerun()
 
 # Interfaz principal
 def main():
@@ -782,6 +320,20 @@ def main():
         st.session_state.current_metrics = None
     if 'current_items' not in st.session_state:
         st.session_state.current_items = None
+    if 'all_pairs_results' not in st.session_state:
+        st.session_state.all_pairs_results = None
+    if 'counts' not in st.session_state:
+        st.session_state.counts = None
+    if 'fingerprint' not in st.session_state:
+        st.session_state.fingerprint = None
+    if 'top_pairs' not in st.session_state:
+        st.session_state.top_pairs = None
+    if 'shared' not in st.session_state:
+        st.session_state.shared = None
+    if 'parallel_pairs' not in st.session_state:
+        st.session_state.parallel_pairs = None
+    if 'jobs' not in st.session_state:
+        st.session_state.jobs = {}
     
     # Sidebar para configuración
     with st.sidebar:
@@ -789,14 +341,20 @@ def main():
         
         data_option = st.radio(
             "Selecciona el método de carga:",
-            ["📁 Cargar archivo Excel", "🎲 Generar datos aleatorios", "✏️ Entrada manual"]
+            ["📁 Cargar archivo Excel", "🗂️ Archivo grande (CSV/Parquet/Arrow)", "🎲 Generar datos aleatorios", "✏️ Entrada manual"]
         )
         
         if st.button("🗑️ Limpiar Datos"):
-            st.session_state.data = None
+            set_dataset(None)
             st.session_state.current_metrics = None
             st.session_state.current_items = None
             st.rerun()
+        
+        st.checkbox(
+            "⏱️ Mostrar panel de Rendimiento",
+            key='performance_panel',
+            help="Mide tiempo, filas y memoria de cada etapa del rerun (sin costo cuando está desactivado)"
+        )
     
     # Pestañas principales
     tab1, tab2, tab3, tab4 = st.tabs(["📥 Carga de Datos", "🔍 Análisis", "📊 Visualizaciones", "📋 Reporte"])
@@ -811,32 +369,102 @@ def main():
                 help="El archivo debe contener datos binarios (0 y 1)"
             )
             
-            if uploaded_file is not None:
+            append_upload = st.session_state.data is not None and st.checkbox(
+                "➕ Agregar como nuevas instancias a los datos actuales",
+                help="Solo se procesan las filas nuevas; los conteos existentes se actualizan por diferencias"
+            )
+            
+            # Evitar volver a cargar (o agregar) el mismo archivo en cada rerun
+            upload_key = (uploaded_file.name, uploaded_file.size, append_upload) if uploaded_file is not None else None
+            
+            if uploaded_file is not None and upload_key != st.session_state.get('loaded_upload'):
                 try:
-                    data = pd.read_excel(uploaded_file)
-                    
-                    is_valid, message = validate_data(data)
-                    if not is_valid:
+                    # Cada archivo distinto se lee una sola vez; si ya se convirtió, se abre con mmap
+                    with span('Lectura de Excel') as record:
+                        native, report, message = get_upload_cache().convert(uploaded_file, uploaded_file.name)
+                        if record is not None and native is not None:
+                            record['rows'] = native['n']
+                    if native is None:
                         st.error(f"Error en los datos: {message}")
                         return
                     
-                    non_binary_cols = []
-                    for col in data.columns:
-                        unique_vals = data[col].dropna().unique()
-                        if not all(val in [0, 1] for val in unique_vals):
-                            non_binary_cols.append(col)
-                    
-                    if non_binary_cols:
-                        st.warning(f"Las siguientes columnas contienen valores no binarios y serán convertidas: {', '.join(non_binary_cols)}")
-                        for col in non_binary_cols:
-                            data[col] = (data[col] > 0).astype(int)
+                    converted = report[report['Convertida']]
+                    if not converted.empty:
+                        st.warning(f"Las siguientes columnas contienen valores no binarios o nulos y fueron convertidas: {', '.join(map(str, converted['Item']))}")
+                        with st.expander("📋 Reporte de conversión"):
+                            st.dataframe(converted, use_container_width=True, hide_index=True)
                     
-                    st.session_state.data = data
+                    if append_upload:
+                        current = st.session_state.data
+                        data = native_to_frame(native)
+                        missing = [col for col in current.columns if col not in data.columns]
+                        if missing:
+                            st.error(f"El archivo no contiene los items: {', '.join(map(str, missing))}")
+                            return
+                        counts = st.session_state.counts
+                        combined, counts = append_transactions(
+                            current, copy_count_state(counts) if counts is not None else None, data
+                        )
+                        set_dataset(combined, counts)
+                    else:
+                        with span('Almacenamiento compartido', rows=native['n']):
+                            set_dataset(shared=share_native_dataset(native))
+                    st.session_state.loaded_upload = upload_key
                     st.markdown('<div class="success-box"><strong>✅ Datos cargados correctamente</strong></div>', unsafe_allow_html=True)
                     
                 except Exception as e:
                     st.error(f"Error al cargar el archivo: {str(e)}")
         
+        elif data_option == "🗂️ Archivo grande (CSV/Parquet/Arrow)":
+            st.write("Lee un archivo local por bloques y acumula solo los conteos de co-ocurrencia, sin cargar todas las transacciones en memoria. "
+                     f"Los archivos en formato nativo ({NATIVE_EXTENSION}) se abren completos con mmap y con sus conteos ya calculados.")
+            
+            file_path = st.text_input(f"Ruta del archivo (.csv, .parquet, .arrow, {NATIVE_EXTENSION})")
+            file_layout = st.radio(
+                "Formato de los datos",
+                ["Ancho (una columna 0/1 por item)", "Largo (una fila por transacción e item)"],
+                horizontal=True
+            )
+            if file_layout.startswith("Largo"):
+                col1, col2 = st.columns(2)
+                with col1:
+                    transaction_col = st.text_input("Columna de transacción", "ticket_id")
+                with col2:
+                    item_col = st.text_input("Columna de item", "sku")
+            chunk_rows = st.number_input("Filas por bloque", 10_000, 5_000_000, INGEST_CHUNK_ROWS, step=50_000)
+            append_file = st.session_state.data is None and st.session_state.counts is not None and st.checkbox(
+                "➕ Sumar a los conteos actuales (carga incremental)"
+            )
+            
+            if st.button("🗂️ Procesar Archivo", type="primary", disabled=not file_path):
+                try:
+                    if file_path.lower().endswith(NATIVE_EXTENSION):
+                        with span('Apertura de archivo nativo'):
+                            set_dataset(shared=share_native_dataset(file_path))
+                        st.markdown('<div class="success-box"><strong>✅ Archivo abierto correctamente</strong></div>', unsafe_allow_html=True)
+                    else:
+                        progress_text = st.empty()
+                        report_progress = lambda rows: progress_text.write(f"⏳ {rows:,} filas procesadas")
+                        base_counts = copy_count_state(st.session_state.counts) if append_file else None
+                        with span('Ingesta por bloques') as record:
+                            if file_layout.startswith("Largo"):
+                                counts = ingest_long_file_counts(
+                                    file_path, transaction_col, item_col,
+                                    chunk_rows=chunk_rows,
+                                    progress=report_progress,
+                                    counts=base_counts
+                                )
+                            else:
+                                counts = ingest_file_counts(
+                                    file_path, chunk_rows=chunk_rows, progress=report_progress, counts=base_counts
+                                )
+                            if record is not None:
+                                record['rows'] = counts['n']
+                        set_dataset(None, counts)
+                        st.markdown('<div class="success-box"><strong>✅ Archivo procesado correctamente</strong></div>', unsafe_allow_html=True)
+                except Exception as e:
+                    st.error(f"Error al procesar el archivo: {str(e)}")
+        
         elif data_option == "🎲 Generar datos aleatorios":
             col1, col2 = st.columns(2)
             
@@ -847,36 +475,64 @@ def main():
             
             if st.button("🎲 Generar Datos", type="primary"):
                 try:
-                    st.session_state.data = generate_sample_data(n_items, n_instances)
+                    set_dataset(generate_sample_data(n_items, n_instances))
                     st.markdown('<div class="success-box"><strong>✅ Datos generados correctamente</strong></div>', unsafe_allow_html=True)
                 except Exception as e:
                     st.error(f"Error generando datos: {str(e)}")
+            
+            # Generador a gran escala para pruebas de carga
+            with st.expander("🏭 Generador a gran escala", expanded=False):
+                col1, col2, col3 = st.columns(3)
+                
+                with col1:
+                    big_items = st.number_input("Número de items", 2, 20000, 1000, step=100, key="synthetic_items")
+                with col2:
+                    big_instances = st.number_input("Número de instancias", 10, 10_000_000, 1_000_000, step=100_000, key="synthetic_instances")
+                with col3:
+                    seed = st.number_input("Semilla", 0, 2**32 - 1, 42, key="synthetic_seed")
+                
+                mean_prob = st.slider("Probabilidad base promedio", 0.001, 0.5, 0.01, format="%.3f", key="synthetic_prob")
+                dependencies_text = st.text_area(
+                    "Dependencias (una por línea: antecedente, consecuente, lift)",
+                    value="Item_1, Item_2, 3.0\nItem_2, Item_3, 2.5",
+                    key="synthetic_dependencies"
+                )
+                
+                if st.button("🏭 Generar Datos Sintéticos"):
+                    try:
+                        rng = np.random.default_rng(seed)
+                        base_probs = np.clip(rng.exponential(mean_prob, big_items), 0.0001, MAX_ITEM_PROBABILITY)
+                        with st.spinner("Generando transacciones..."), span('Generación sintética', rows=big_instances):
+                            data = generate_synthetic_baskets(
+                                big_items, big_instances,
+                                base_probs=base_probs,
+                                dependencies=parse_dependencies(dependencies_text),
+                                seed=seed,
+                                sparse=mean_prob < SPARSE_DENSITY_THRESHOLD
+                            )
+                        set_dataset(data)
+                        st.markdown('<div class="success-box"><strong>✅ Datos sintéticos generados correctamente</strong></div>', unsafe_allow_html=True)
+                    except Exception as e:
+                        st.error(f"Error generando datos sintéticos: {str(e)}")
         
         elif data_option == "✏️ Entrada manual":
             col1, col2 = st.columns(2)
             
             with col1:
-                n_items = st.slider("Número de items", 2, 8, 4, key="manual_items")
+                n_items = st.number_input("Número de items", 2, MANUAL_MAX_ITEMS, 4, key="manual_items")
             with col2:
-                n_instances = st.slider("Número de instancias", 5, 50, 10, key="manual_instances")
+                n_instances = st.number_input("Número de instancias", 1, MANUAL_MAX_ROWS, 10, step=10, key="manual_instances")
             
             if 'manual_data_initialized' not in st.session_state:
                 st.session_state.manual_data_initialized = False
                 st.session_state.manual_data = None
             
             if st.button("📝 Crear Tabla Manual", key="create_manual_table"):
-                items = [f"Item_{i+1}" for i in range(n_items)]
-                
-                manual_data = []
-                for i in range(n_instances):
-                    row = [0] * n_items
-                    manual_data.append(row)
-                
+                # Una sola matriz respalda toda la tabla; version renueva el editor al reemplazarla
                 st.session_state.manual_data = {
-                    'data': manual_data,
-                    'items': items,
-                    'n_items': n_items,
-                    'n_instances': n_instances
+                    'data': np.zeros((n_instances, n_items), dtype=np.uint8),
+                    'items': [f"Item_{i+1}" for i in range(n_items)],
+                    'version': 0
                 }
                 st.session_state.manual_data_initialized = True
                 st.rerun()
@@ -886,82 +542,85 @@ def main():
                 
                 manual_info = st.session_state.manual_data
                 items = manual_info['items']
-                n_items = manual_info['n_items']
-                n_instances = manual_info['n_instances']
                 
                 with st.form("manual_data_form", clear_on_submit=False):
-                    st.write("**Instrucciones:** Selecciona 0 o 1 para cada celda")
+                    st.write("**Instrucciones:** Escribe 0 o 1 en cada celda. Puedes pegar un bloque copiado de Excel (Ctrl+V) y agregar o quitar instancias al final de la tabla.")
                     
-                    updated_data = []
+                    edited = st.data_editor(
+                        pd.DataFrame(manual_info['data'], columns=items),
+                        column_config={
+                            item: st.column_config.NumberColumn(item, min_value=0, max_value=1, step=1, default=0)
+                            for item in items
+                        },
+                        num_rows="dynamic",
+                        use_container_width=True,
+                        key=f"manual_editor_{manual_info['version']}"
+                    )
                     
-                    header_cols = st.columns([1] + [1] * n_items)
-                    header_cols[0].write("**Instancia**")
-                    for j, item in enumerate(items):
-                        header_cols[j+1].write(f"**{item}**")
+                    st.write("**Llenado masivo:**")
+                    col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
                     
-                    for i in range(n_instances):
-                        cols = st.columns([1] + [1] * n_items)
-                        cols[0].write(f"Inst {i+1}")
-                        
-                        row = []
-                        for j in range(n_items):
-                            current_value = manual_info['data'][i][j] if i < len(manual_info['data']) and j < len(manual_info['data'][i]) else 0
-                            
-                            value = cols[j+1].selectbox(
-                                f"",
-                                options=[0, 1],
-                                index=current_value,
-                                key=f"manual_item_{i}_{j}",
-                                label_visibility="collapsed"
-                            )
-                            row.append(value)
-                        updated_data.append(row)
+                    with col1:
+                        fill_items = st.multiselect("Items", items, default=items, key="manual_fill_items")
+                    with col2:
+                        fill_from = st.number_input("Desde instancia", 1, MANUAL_MAX_ROWS, 1, key="manual_fill_from")
+                    with col3:
+                        fill_to = st.number_input("Hasta instancia", 1, MANUAL_MAX_ROWS, len(manual_info['data']), key="manual_fill_to")
+                    with col4:
+                        fill_value = st.selectbox("Valor", [1, 0], key="manual_fill_value")
                     
-                    col1, col2, col3 = st.columns([1, 1, 1])
+                    col1, col2, col3, col4 = st.columns(4)
                     
                     with col1:
-                        if st.form_submit_button("💾 Guardar Datos", type="primary"):
-                            try:
-                                df = pd.DataFrame(updated_data, columns=items)
-                                st.session_state.data = df
-                                
-                                st.session_state.manual_data_initialized = False
-                                st.session_state.manual_data = None
-                                
-                                st.success("✅ Datos guardados correctamente")
-                                st.rerun()
-                                
-                            except Exception as e:
-                                st.error(f"Error guardando datos: {str(e)}")
-                    
+                        save_clicked = st.form_submit_button("💾 Guardar Datos", type="primary")
                     with col2:
-                        if st.form_submit_button("🎲 Llenar Aleatoriamente"):
-                            try:
-                                random_data = []
-                                for i in range(n_instances):
-                                    row = [random.choice([0, 1]) for _ in range(n_items)]
-                                    random_data.append(row)
-                                
-                                st.session_state.manual_data['data'] = random_data
-                                st.success("🎲 Datos llenados aleatoriamente")
-                                st.rerun()
-                                
-                            except Exception as e:
-                                st.error(f"Error llenando datos: {str(e)}")
-                    
+                        fill_clicked = st.form_submit_button("🧱 Rellenar Selección")
                     with col3:
-                        if st.form_submit_button("🗑️ Cancelar"):
-                            st.session_state.manual_data_initialized = False
-                            st.session_state.manual_data = None
-                            st.rerun()
+                        random_clicked = st.form_submit_button("🎲 Llenar Aleatoriamente")
+                    with col4:
+                        cancel_clicked = st.form_submit_button("🗑️ Cancelar")
                 
-                if st.session_state.manual_data:
-                    st.subheader("👀 Vista Previa")
-                    preview_df = pd.DataFrame(
-                        st.session_state.manual_data['data'], 
-                        columns=st.session_state.manual_data['items']
-                    )
-                    st.dataframe(preview_df, use_container_width=True)
+                # Celdas vacías (instancias nuevas) cuentan como 0
+                values = np.clip(edited.fillna(0).to_numpy(dtype=float), 0, 1).astype(np.uint8)
+                
+                if save_clicked:
+                    try:
+                        df = pd.DataFrame(values, columns=items)
+                        counts = st.session_state.counts
+                        if counts is not None:
+                            counts = update_counts_for_new_version(
+                                copy_count_state(counts), st.session_state.data, df
+                            )
+                        set_dataset(df, counts)
+                        
+                        st.session_state.manual_data_initialized = False
+                        st.session_state.manual_data = None
+                        
+                        st.success("✅ Datos guardados correctamente")
+                        st.rerun()
+                        
+                    except Exception as e:
+                        st.error(f"Error guardando datos: {str(e)}")
+                
+                elif fill_clicked or random_clicked:
+                    try:
+                        if fill_clicked:
+                            columns = [items.index(item) for item in fill_items]
+                            values[fill_from - 1:fill_to, columns] = fill_value
+                        else:
+                            values = np.random.default_rng().integers(0, 2, size=values.shape, dtype=np.uint8)
+                        
+                        manual_info['data'] = values
+                        manual_info['version'] += 1
+                        st.rerun()
+                        
+                    except Exception as e:
+                        st.error(f"Error llenando datos: {str(e)}")
+                
+                elif cancel_clicked:
+                    st.session_state.manual_data_initialized = False
+                    st.session_state.manual_data = None
+                    st.rerun()
         
         # Mostrar datos cargados
         if st.session_state.data is not None:
@@ -973,41 +632,339 @@ def main():
             with col2:
                 st.metric("🏷️ Items", len(st.session_state.data.columns))
             with col3:
-                total_cells = len(st.session_state.data) * len(st.session_state.data.columns)
-                density = st.session_state.data.sum().sum() / total_cells if total_cells > 0 else 0
+                density = calculate_density(st.session_state.data)
                 st.metric("🎯 Densidad", f"{density:.2%}")
             
-            st.dataframe(st.session_state.data, use_container_width=True)
+            shared = st.session_state.shared
+            if shared is not None and not is_sparse_data(shared.data):
+                st.caption(f"Transacciones distintas: {shared.unique_transactions():,} "
+                           f"(las filas repetidas se agrupan al contar co-ocurrencias)")
+            if is_sparse_data(st.session_state.data):
+                st.caption(f"Datos en formato disperso: se muestran las primeras {PREVIEW_ROWS} instancias")
+            show_dataframe(preview_data(st.session_state.data), 'vista previa', use_container_width=True)
             
             st.subheader("📈 Frecuencias por Item")
             fig = create_frequency_chart(st.session_state.data)
             st.plotly_chart(fig, use_container_width=True)
+            
+            with st.expander("💾 Guardar en formato nativo", expanded=False):
+                st.write(f"Guarda las transacciones en un archivo {NATIVE_EXTENSION} que se reabre en milisegundos "
+                         "(opción 🗂️ Archivo grande) sin volver a leer ni convertir el Excel.")
+                native_path = st.text_input("Ruta del archivo", f"dataset{NATIVE_EXTENSION}", key="native_path")
+                if st.button("💾 Guardar", disabled=not native_path.endswith(NATIVE_EXTENSION)):
+                    try:
+                        with span('Escritura de archivo nativo', rows=len(st.session_state.data)):
+                            write_native_dataset(st.session_state.data, native_path, fingerprint=get_dataset_fingerprint())
+                        st.success(f"✅ Dataset guardado en {native_path}")
+                    except Exception as e:
+                        st.error(f"Error al guardar el archivo: {str(e)}")
+        
+        elif st.session_state.counts is not None:
+            counts = st.session_state.counts
+            st.subheader("📋 Conteos Cargados")
+            
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("📊 Instancias", counts['n'])
+            with col2:
+                st.metric("🏷️ Items", len(counts['items']))
+            with col3:
+                total_cells = counts['n'] * len(counts['items'])
+                density = counts['item_counts'].sum() / total_cells if total_cells > 0 else 0
+                st.metric("🎯 Densidad", f"{density:.2%}")
+            
+            st.subheader("📈 Frecuencias por Item")
+            fig = create_frequency_chart(counts)
+            st.plotly_chart(fig, use_container_width=True)
     
     with tab2:
         st.header("Análisis de Asociación")
         
-        if st.session_state.data is None:
+        if st.session_state.data is None and st.session_state.counts is None:
             st.markdown('<div class="warning-box"><strong>⚠️ Primero debes cargar datos en la pestaña "Carga de Datos"</strong></div>', unsafe_allow_html=True)
         else:
-            is_valid, message = validate_data(st.session_state.data)
-            if not is_valid:
-                st.error(f"Error en los datos: {message}")
-                return
-            
+            if st.session_state.data is not None:
+                is_valid, message = validate_active_data()
+                if not is_valid:
+                    st.error(f"Error en los datos: {message}")
+                    return
+                items = list(st.session_state.data.columns)
+            else:
+                items = st.session_state.counts['items']
+
+            # Opciones de la prueba de independencia (par individual y todos los pares)
+            with st.expander("⚙️ Opciones de la Prueba", expanded=False):
+                col1, col2, col3 = st.columns(3)
+
+                with col1:
+                    alphas_text = st.text_input(
+                        "Niveles de significancia (α)",
+                        ", ".join(f"{alpha:g}" for alpha in DEFAULT_ALPHAS),
+                        help="Separados por comas, por ejemplo: 0.05, 0.01, 0.001"
+                    )
+                with col2:
+                    use_yates = st.checkbox("Corrección de Yates", help="Corrección de continuidad para tablas 2x2")
+                with col3:
+                    use_fisher = st.checkbox(
+                        "Prueba exacta de Fisher en celdas pequeñas",
+                        help=f"Se usa cuando alguna frecuencia esperada es menor que {FISHER_MIN_EXPECTED}"
+                    )
+
+                try:
+                    alphas = parse_alphas(alphas_text)
+                except ValueError as e:
+                    st.error(f"Niveles de significancia no válidos: {str(e)}")
+                    alphas = DEFAULT_ALPHAS
+
+            test_options = {
+                'alphas': alphas,
+                'yates': use_yates,
+                'fisher_min_expected': FISHER_MIN_EXPECTED if use_fisher else None
+            }
+
+            # Ranking de todos los pares (un solo producto matricial)
+            with st.expander("🧮 Analizar Todos los Pares", expanded=False):
+                col1, col2, col3 = st.columns(3)
+
+                with col1:
+                    min_support = st.number_input("Soporte mínimo (a)", min_value=0, value=1, step=1)
+                with col2:
+                    min_chi2 = st.number_input("Chi-cuadrado mínimo", min_value=0.0, value=0.0, step=0.5)
+                with col3:
+                    sort_by = st.selectbox(
+                        "Ordenar por",
+                        ['Chi²', 'p-valor', 'FD(1,1)', 'Confianza 1→2', 'Confianza 2→1', 'a']
+                    )
+
+                col1, col2 = st.columns(2)
+
+                with col1:
+                    correction_label = st.selectbox(
+                        "Corrección por comparaciones múltiples",
+                        ['Ninguna'] + list(P_VALUE_CORRECTIONS.values())
+                    )
+                    correction = next(
+                        (key for key, label in P_VALUE_CORRECTIONS.items() if label == correction_label), None
+                    )
+                with col2:
+                    max_p = st.number_input(
+                        "p-valor máximo", min_value=0.0, max_value=1.0, value=1.0, step=0.01, format="%.4f",
+                        help="Con corrección, se filtra por el p-valor ajustado"
+                    )
+                max_p = max_p if max_p < 1.0 else None
+                fisher_min_expected = test_options['fisher_min_expected']
+
+                parallel_mode = st.checkbox(
+                    "⚡ Modo paralelo por bloques (catálogos grandes)",
+                    help="Calcula los pares por bloques en varios hilos y conserva solo los que pasan los filtros, sin guardar la matriz completa"
+                )
+
+                if st.button("🧮 Calcular Todos los Pares"):
+                    try:
+                        # Los cálculos corren en segundo plano: un rerun no los interrumpe
+                        if parallel_mode:
+                            source = st.session_state.data if st.session_state.data is not None else st.session_state.counts
+                            st.session_state.all_pairs_results = None
+                            start_job(
+                                'parallel_pairs', 'all_pairs_parallel',
+                                lambda progress: calculate_all_pairs_parallel(
+                                    source, min_support=min_support, min_chi2=min_chi2, sort_by=sort_by,
+                                    yates=use_yates, correction=correction, max_p=max_p,
+                                    fisher_min_expected=fisher_min_expected, progress=progress
+                                ),
+                                min_support, min_chi2, sort_by, use_yates, correction, max_p, fisher_min_expected
+                            )
+                        else:
+                            # Los conteos se construyen dentro del trabajo y solo si el resultado no está en caché
+                            counts = deferred_counts()
+                            st.session_state.parallel_pairs = None
+                            start_job(
+                                'all_pairs_results', 'all_pairs',
+                                lambda progress: calculate_all_pairs_from_counts(counts(), yates=use_yates, progress=progress),
+                                use_yates
+                            )
+                    except Exception as e:
+                        st.error(f"Error calculando todos los pares: {str(e)}")
+
+                collect_job('parallel_pairs', "todos los pares (por bloques)")
+                collect_job('all_pairs_results', "todos los pares")
+
+                if st.session_state.get('parallel_pairs') is not None:
+                    pairs_df = st.session_state.parallel_pairs
+                    st.write(f"**{len(pairs_df)} pares** cumplen los filtros")
+                    st.caption("Filtros aplicados al calcular por bloques; para cambiarlos vuelve a calcular")
+                    show_dataframe(pairs_df, 'todos los pares', use_container_width=True, hide_index=True)
+
+                if st.session_state.get('all_pairs_results') is not None:
+                    pairs_df = all_pairs_to_frame(
+                        st.session_state.all_pairs_results,
+                        min_support=min_support,
+                        min_chi2=min_chi2,
+                        sort_by=sort_by,
+                        correction=correction,
+                        max_p=max_p,
+                        fisher_min_expected=fisher_min_expected
+                    )
+                    st.write(f"**{len(pairs_df)} pares** cumplen los filtros")
+                    show_dataframe(pairs_df, 'todos los pares', use_container_width=True, hide_index=True)
+
+            # Las asociaciones más fuertes por métrica (heap acotado: memoria O(K))
+            with st.expander("🏆 Top-K Asociaciones", expanded=False):
+                col1, col2, col3, col4 = st.columns(4)
+
+                with col1:
+                    top_k = st.number_input("K (pares por métrica)", min_value=1, max_value=10_000, value=100, step=10)
+                with col2:
+                    top_metric = st.selectbox("Métrica", list(RANKING_METRICS))
+                with col3:
+                    top_support = st.number_input("Soporte mínimo (a)", min_value=0, value=1, step=1, key='top_support')
+                with col4:
+                    top_coverage = st.number_input(
+                        "Cobertura mínima", min_value=0.0, max_value=1.0, value=0.0, step=0.01,
+                        help="Proporción mínima de transacciones con cada item del par"
+                    )
+
+                if st.button("🏆 Calcular Ranking"):
+                    try:
+                        source = st.session_state.data if st.session_state.data is not None else st.session_state.counts
+                        start_job(
+                            'top_pairs', 'top_pairs',
+                            lambda progress: rank_top_pairs(
+                                source, k=top_k, min_support=top_support, min_coverage=top_coverage,
+                                yates=use_yates, progress=progress
+                            ),
+                            top_k, top_support, top_coverage, use_yates
+                        )
+                    except Exception as e:
+                        st.error(f"Error calculando el ranking: {str(e)}")
+
+                collect_job('top_pairs', "el ranking")
+
+                if st.session_state.get('top_pairs') is not None:
+                    ranking = st.session_state.top_pairs[top_metric]
+                    st.caption("Haz clic en un renglón para abrir el análisis de ese par")
+                    event = show_dataframe(
+                        ranking, 'ranking Top-K', use_container_width=True, hide_index=True,
+                        on_select='rerun', selection_mode='single-row', key=f'top_pairs_{top_metric}'
+                    )
+                    if event.selection.rows:
+                        row = ranking.iloc[event.selection.rows[0]]
+                        pair = (row['Item 1'], row['Item 2'])
+                        # Solo al cambiar la selección: la selección persiste entre reruns
+                        if pair != st.session_state.get('selected_top_pair'):
+                            st.session_state.selected_top_pair = pair
+                            st.session_state.pair_item1, st.session_state.pair_item2 = pair
+                            st.session_state.analyze_selected_pair = True
+
+            # Itemsets frecuentes y reglas con antecedentes de varios items
+            with st.expander("⛏️ Itemsets Frecuentes y Reglas", expanded=False):
+                if st.session_state.data is None:
+                    st.info("La minería de itemsets requiere las transacciones; con archivos procesados por bloques solo se guardan los conteos de pares.")
+                else:
+                    col1, col2, col3 = st.columns(3)
+
+                    with col1:
+                        itemset_support = st.number_input("Soporte mínimo (proporción)", 0.0001, 1.0, 0.05, step=0.01, format="%.4f")
+                    with col2:
+                        itemset_confidence = st.number_input("Confianza mínima", 0.0, 1.0, 0.5, step=0.05)
+                    with col3:
+                        itemset_length = st.number_input("Tamaño máximo del itemset", 2, 10, 3)
+
+                    if st.button("⛏️ Buscar Itemsets"):
+                        try:
+                            with span('Itemsets frecuentes', rows=len(st.session_state.data)):
+                                itemsets = mine_frequent_itemsets(st.session_state.shared.index(), itemset_support, itemset_length)
+                            itemset_rules = generate_itemset_rules(itemsets, len(st.session_state.data), itemset_confidence)
+
+                            st.write(f"**{len(itemsets)} itemsets frecuentes** y **{len(itemset_rules)} reglas**")
+                            st.dataframe(pd.DataFrame([
+                                {'Itemset': ', '.join(itemset), 'Tamaño': len(itemset), 'Soporte': count}
+                                for itemset, count in sorted(itemsets.items(), key=lambda entry: -entry[1])
+                            ]), use_container_width=True, hide_index=True)
+                            st.dataframe(pd.DataFrame([
+                                {
+                                    'Regla': rule['rule'],
+                                    'Cobertura (Cb)': f"{rule['coverage']:.1%}",
+                                    'Confianza (Cf)': f"{rule['confidence']:.1%}",
+                                    'FD': round(rule['dependency_factor'], 3),
+                                    'Fórmula': rule['formula']
+                                }
+                                for rule in itemset_rules
+                            ]), use_container_width=True, hide_index=True)
+                        except Exception as e:
+                            st.error(f"Error buscando itemsets: {str(e)}")
+
+                    # Consulta directa: intersección de las posting lists del índice invertido
+                    support_items = st.multiselect(
+                        "🔎 Soporte de un itemset", list(st.session_state.data.columns), key='support_items',
+                        help="Cuenta las transacciones que contienen todos los items seleccionados"
+                    )
+                    if support_items:
+                        with span('Soporte desde el índice'):
+                            support = index_support(st.session_state.shared.index(), support_items)
+                        n_rows = len(st.session_state.data)
+                        st.write(f"**{support:,}** transacciones ({support / n_rows:.2%}) contienen {{{', '.join(map(str, support_items))}}}")
+
+            # Sugerencias para una canasta desde el índice item -> mejores consecuentes
+            with st.expander("🛒 Recomendaciones para una Canasta", expanded=False):
+                col1, col2 = st.columns([3, 1])
+
+                with col1:
+                    basket = st.multiselect("Items de la canasta", items, key='recommend_basket')
+                with col2:
+                    recommend_metric = st.selectbox("Ordenar por", list(RECOMMENDATION_METRICS), key='recommend_metric')
+                recommend_n = st.number_input("Recomendaciones", min_value=1, max_value=100, value=5, key='recommend_n')
+
+                if basket:
+                    try:
+                        recommender = get_recommender(
+                            get_dataset_fingerprint(), recommend_metric, DEFAULT_TOP_CONSEQUENTS, get_active_counts()
+                        )
+                        with span('Recomendaciones'):
+                            recommendations = recommender.recommend(basket, recommend_n)
+                        if recommendations:
+                            show_dataframe(pd.DataFrame([
+                                {
+                                    'Sugerencia': rec['item'],
+                                    'Por': rec['antecedent'],
+                                    'Confianza (Cf)': f"{rec['confidence']:.1%}",
+                                    'FD(1,1)': round(rec['dependency_factor'], 3),
+                                    'Soporte (a)': rec['support']
+                                }
+                                for rec in recommendations
+                            ]), 'recomendaciones', use_container_width=True, hide_index=True)
+                        else:
+                            st.info("No hay reglas con asociación positiva para los items de esta canasta")
+                    except Exception as e:
+                        st.error(f"Error calculando recomendaciones: {str(e)}")
+
             col1, col2 = st.columns(2)
-            
+
             with col1:
-                item1 = st.selectbox("Selecciona Item 1", st.session_state.data.columns)
+                if st.session_state.get('pair_item1') not in items:
+                    st.session_state.pop('pair_item1', None)
+                item1 = st.selectbox("Selecciona Item 1", items, key='pair_item1')
             with col2:
-                available_items = [col for col in st.session_state.data.columns if col != item1]
+                available_items = [col for col in items if col != item1]
                 if available_items:
-                    item2 = st.selectbox("Selecciona Item 2", available_items)
+                    if st.session_state.get('pair_item2') not in available_items:
+                        st.session_state.pop('pair_item2', None)
+                    item2 = st.selectbox("Selecciona Item 2", available_items, key='pair_item2')
                 else:
                     st.error("Se necesitan al menos 2 items diferentes")
                     return
             
-            if st.button("🔍 Analizar Asociación", type="primary"):
-                metrics = calculate_metrics(st.session_state.data, item1, item2)
+            # El análisis también se abre al elegir un par en el ranking Top-K
+            if st.button("🔍 Analizar Asociación", type="primary") or st.session_state.pop('analyze_selected_pair', False):
+                # Con conteos ya construidos cada par se resuelve en O(1); si no, el índice
+                # invertido intersecta solo las transacciones de los dos items (sin construir
+                # la matriz items × items). El resultado se guarda por huella del dataset
+                shared = st.session_state.shared
+                if st.session_state.counts is None and shared is not None and not shared.has_counts():
+                    compute_metrics = lambda: calculate_metrics_from_index(shared.index(), item1, item2, **test_options)
+                else:
+                    compute_metrics = lambda: calculate_metrics_from_counts(get_active_counts(), item1, item2, **test_options)
+                metrics = cached_result('pair_metrics', compute_metrics, item1, item2, sorted(test_options.items()))
                 
                 if metrics is None:
                     st.error("Error calculando métricas. Verifica los datos.")
@@ -1147,10 +1104,11 @@ def main():
                 
                 with col1:
                     st.metric("Chi-cuadrado calculado", f"{metrics['chi2_stat']:.4f}")
+                    st.metric("p-valor", f"{metrics['p_value']:.4g}", help=f"Prueba: {metrics['test']}")
                     
                     st.write("**Valores Críticos:**")
                     for level, critical in metrics['critical_values'].items():
-                        is_significant = metrics['chi2_stat'] > critical
+                        is_significant = level in metrics['significance']
                         icon = "✅" if is_significant else "❌"
                         st.write(f"{icon} {level}: {critical}")
                 
@@ -1207,7 +1165,7 @@ def main():
             
             with col2:
                 st.subheader("🎯 Distribución")
-                fig3 = create_scatter_plot(st.session_state.data, item1, item2)
+                fig3 = create_scatter_plot(st.session_state.data, item1, item2, metrics)
                 st.plotly_chart(fig3, use_container_width=True)
                 
                 st.subheader("📈 Chi-Cuadrado")
@@ -1243,6 +1201,8 @@ def main():
             - FD({item1}=0, {item2}=1) = {metrics['dependency_factors']['fd_0_1']:.3f}
             - FD({item1}=0, {item2}=0) = {metrics['dependency_factors']['fd_0_0']:.3f}
             
+            **Prueba:** {metrics['test']} (p-valor = {metrics['p_value']:.4g})
+            
             **Significancia Estadística:** {'Sí' if metrics['significance'] else 'No'}
             {f"(Niveles: {', '.join(metrics['significance'])})" if metrics['significance'] else ""}
             """
@@ -1389,4 +1349,4 @@ def main():
             """)
 
 if __name__ == "__main__":
-    main()
+    run_app()
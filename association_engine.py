@@ -0,0 +1,2351 @@
+"""
+Motor de análisis de reglas de asociación.
+
+Contiene todos los cálculos (validación, conteos, métricas, todos los pares,
+itemsets frecuentes, ingesta por bloques) sin depender de Streamlit ni de
+Plotly, para poder usarlo desde app.py, desde run_batch.py o como librería.
+"""
+import pandas as pd
+import numpy as np
+import scipy.sparse as sp
+import random
+import os
+import heapq
+import json
+import struct
+import tempfile
+import pickle
+from itertools import combinations
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+
+def generate_sample_data(n_items=6, n_instances=100, seed=42):
+    """Genera datos de ejemplo con correlaciones realistas"""
+    np.random.seed(seed)
+    random.seed(seed)
+    
+    items = ['Pan', 'Leche', 'Huevos', 'Mantequilla', 'Queso', 'Jamón', 'Yogurt', 'Cereal'][:n_items]
+    data = []
+    
+    # Probabilidades base para cada item
+    base_probs = [0.7, 0.6, 0.4, 0.4, 0.3, 0.3, 0.35, 0.25][:n_items]
+    
+    for i in range(n_instances):
+        transaction = []
+        for j, item in enumerate(items):
+            prob = base_probs[j]
+            
+            # Añadir correlaciones realistas
+            if item == 'Mantequilla' and len(transaction) > 0 and transaction[0] == 1:  # Pan
+                prob += 0.3
+            elif item == 'Jamón' and len(transaction) > 4 and len(transaction) > 4 and transaction[4] == 1:  # Queso
+                prob += 0.4
+            elif item == 'Yogurt' and len(transaction) > 1 and transaction[1] == 1:  # Leche
+                prob += 0.2
+            
+            prob = min(prob, 0.95)  # Limitar probabilidad máxima
+            transaction.append(1 if random.random() < prob else 0)
+        
+        data.append(transaction)
+    
+    return pd.DataFrame(data, columns=items)
+
+# Probabilidad máxima de compra de un item en los datos sintéticos
+MAX_ITEM_PROBABILITY = 0.95
+# Filas generadas por bloque en el generador sintético
+SYNTHETIC_CHUNK_ROWS = 100_000
+
+def _dependency_matrix(dependencies, items, base_probs):
+    """
+    Convierte las dependencias (lift) en una matriz dispersa de incrementos de probabilidad.
+
+    dependencies puede ser un diccionario {(antecedente, consecuente): lift},
+    con nombres o índices de items, o una matriz items × items de lifts donde
+    1 (o NaN) significa "sin dependencia". Si el antecedente está presente,
+    la probabilidad del consecuente pasa de p a p × lift, es decir, se suma
+    (lift - 1) × p.
+    """
+    n_items = len(items)
+    if dependencies is None:
+        return sp.csc_matrix((n_items, n_items))
+
+    if isinstance(dependencies, dict):
+        position = {item: i for i, item in enumerate(items)}
+        rows, cols, lifts = [], [], []
+        for (antecedent, consequent), lift in dependencies.items():
+            for item in (antecedent, consequent):
+                if item not in position and not (isinstance(item, (int, np.integer)) and 0 <= item < n_items):
+                    raise ValueError(f"Item desconocido en las dependencias: {item}")
+            rows.append(position.get(antecedent, antecedent))
+            cols.append(position.get(consequent, consequent))
+            lifts.append(lift)
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        lifts = np.asarray(lifts, dtype=np.float64)
+    else:
+        lift_matrix = np.asarray(dependencies, dtype=np.float64)
+        if lift_matrix.shape != (n_items, n_items):
+            raise ValueError("La matriz de lift debe ser de tamaño items × items")
+        edges = ~np.isnan(lift_matrix) & (lift_matrix != 1)
+        np.fill_diagonal(edges, False)
+        rows, cols = np.nonzero(edges)
+        lifts = lift_matrix[rows, cols]
+
+    boosts = (lifts - 1) * base_probs[cols]
+    return sp.csc_matrix((boosts, (rows, cols)), shape=(n_items, n_items))
+
+def _dependency_levels(boost_matrix):
+    """
+    Agrupa los items por niveles del grafo de dependencias (orden topológico).
+
+    Los items de un mismo nivel no dependen entre sí, por lo que se pueden
+    generar juntos en un solo sorteo vectorizado.
+    """
+    n_items = boost_matrix.shape[0]
+    graph = boost_matrix.tocsr()
+    indegree = np.diff(boost_matrix.tocsc().indptr)
+    levels = []
+    current = np.flatnonzero(indegree == 0)
+    processed = 0
+    while len(current) > 0:
+        levels.append(current)
+        processed += len(current)
+        children = graph[current].indices
+        np.subtract.at(indegree, children, 1)
+        candidates = np.unique(children)
+        current = candidates[indegree[candidates] == 0]
+    if processed < n_items:
+        raise ValueError("El grafo de dependencias contiene ciclos")
+    return levels
+
+def _sample_bernoulli_columns(rng, n_rows, probs):
+    """
+    Sortea columnas independientes Bernoulli(p) sin recorrer todas las celdas.
+
+    Usa saltos geométricos entre 1s consecutivos (muestreo exacto), así que el
+    costo es proporcional al número de 1s y no a filas × columnas.
+    Devuelve (filas, columnas) de las celdas con 1.
+    """
+    probs = np.asarray(probs, dtype=np.float64)
+    columns = np.flatnonzero(probs > 0)
+    all_rows, all_cols = [], []
+    while len(columns) > 0:
+        p = probs[columns]
+        expected = n_rows * p
+        n_draws = np.ceil(expected + 6 * np.sqrt(expected) + 10).astype(np.int64)
+        gaps = rng.geometric(np.repeat(p, n_draws))
+        ends = np.cumsum(n_draws)
+        positions = np.cumsum(gaps)
+        offsets = np.repeat(np.r_[0, positions[ends[:-1] - 1]], n_draws)
+        positions = positions - offsets - 1
+        col_index = np.repeat(columns, n_draws)
+        keep = positions < n_rows
+        all_rows.append(positions[keep])
+        all_cols.append(col_index[keep])
+        # Columnas con pocos saltos (muy improbable): se vuelven a sortear completas
+        short = positions[ends - 1] < n_rows
+        if short.any():
+            redo = np.isin(all_cols[-1], columns[short])
+            all_rows[-1] = all_rows[-1][~redo]
+            all_cols[-1] = all_cols[-1][~redo]
+        columns = columns[short]
+    if not all_rows:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(all_rows), np.concatenate(all_cols)
+
+def iter_synthetic_baskets(n_items, n_instances, base_probs=None, dependencies=None,
+                           seed=42, chunk_size=SYNTHETIC_CHUNK_ROWS, item_names=None):
+    """
+    Genera transacciones sintéticas por bloques con un generador de NumPy.
+
+    Los items sin dependencias se sortean todos juntos con saltos geométricos;
+    los demás se sortean con un sorteo vectorizado por nivel del grafo de
+    dependencias (nunca por fila ni por item). Devuelve un generador cuyo
+    primer elemento es la lista de items y los siguientes son bloques CSR
+    uint8 (filas × items).
+    """
+    rng = np.random.default_rng(seed)
+    items = list(item_names) if item_names is not None else [f"Item_{i+1}" for i in range(n_items)]
+    if base_probs is None:
+        base_probs = rng.uniform(0.05, 0.5, n_items)
+    base_probs = np.broadcast_to(np.asarray(base_probs, dtype=np.float64), (n_items,))
+    base_probs = np.clip(base_probs, 0, MAX_ITEM_PROBABILITY)
+
+    boost_matrix = _dependency_matrix(dependencies, items, base_probs)
+    levels = _dependency_levels(boost_matrix)
+    boost_rows = boost_matrix.tocsr()
+
+    yield items
+    for start in range(0, n_instances, chunk_size):
+        n_rows = min(chunk_size, n_instances - start)
+
+        # Nivel 0: items independientes, probabilidad constante
+        roots = levels[0]
+        rows, cols = _sample_bernoulli_columns(rng, n_rows, base_probs[roots])
+        rows_list, cols_list = [rows], [roots[cols]]
+
+        # Niveles siguientes: la probabilidad depende de los antecedentes de cada fila
+        for level_items in levels[1:]:
+            boosts = boost_matrix[:, level_items]
+            parents = np.unique(boosts.indices)
+            current = sp.csc_matrix(
+                (np.ones(sum(len(r) for r in rows_list), dtype=np.float32),
+                 (np.concatenate(rows_list), np.concatenate(cols_list))),
+                shape=(n_rows, n_items)
+            )
+            parent_values = current[:, parents].toarray()
+            probs = base_probs[level_items] + parent_values @ boost_rows[parents][:, level_items].toarray()
+            probs = np.clip(probs, 0, MAX_ITEM_PROBABILITY)
+            hits = rng.random((n_rows, len(level_items)), dtype=np.float32) < probs
+            rows, cols = np.nonzero(hits)
+            rows_list.append(rows)
+            cols_list.append(level_items[cols])
+
+        rows = np.concatenate(rows_list)
+        yield sp.csr_matrix(
+            (np.ones(len(rows), dtype=np.uint8), (rows, np.concatenate(cols_list))),
+            shape=(n_rows, n_items)
+        )
+
+def generate_synthetic_baskets(n_items, n_instances, base_probs=None, dependencies=None,
+                               seed=42, chunk_size=SYNTHETIC_CHUNK_ROWS, item_names=None, sparse=False):
+    """
+    Genera un dataset sintético completo con estructura de correlación configurable.
+
+    Con sparse=True el resultado usa el formato disperso, útil para millones
+    de filas con baja densidad.
+    """
+    chunks = iter_synthetic_baskets(n_items, n_instances, base_probs, dependencies,
+                                    seed, chunk_size, item_names)
+    items = next(chunks)
+    blocks = list(chunks)
+    matrix = sp.vstack(blocks, format='csc') if blocks else sp.csc_matrix((0, len(items)), dtype=np.uint8)
+    if sparse:
+        return sparse_transactions_from_matrix(matrix, items)
+    return pd.DataFrame(matrix.toarray(), columns=items)
+
+def parse_dependencies(text):
+    """Lee dependencias en formato 'antecedente, consecuente, lift' (una por línea)"""
+    dependencies = {}
+    for line_number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line:
+            continue
+        parts = [part.strip() for part in line.split(',')]
+        if len(parts) != 3:
+            raise ValueError(f"Línea {line_number}: se esperaba 'antecedente, consecuente, lift'")
+        dependencies[(parts[0], parts[1])] = float(parts[2])
+    return dependencies
+
+def validate_data(data, binary=False):
+    """
+    Valida que los datos sean correctos.
+
+    Con binary=True (datos que salen de binarize_data) no se recorren los
+    valores: ya son 0 y 1 por construcción y solo se revisa la forma.
+    """
+    if data is None or data.empty:
+        return False, "No hay datos para validar"
+    
+    # Verificar que hay al menos 2 columnas
+    if len(data.columns) < 2:
+        return False, "Se necesitan al menos 2 items para el análisis"
+    
+    # Verificar que hay al menos 5 filas
+    if len(data) < 5:
+        return False, "Se necesitan al menos 5 instancias para el análisis"
+    
+    # Verificar valores binarios (todas las columnas a la vez)
+    if binary:
+        return True, "Datos válidos"
+    non_binary = count_non_binary_values(data)
+    if non_binary.any():
+        return False, f"La columna '{non_binary[non_binary > 0].index[0]}' contiene valores no binarios"
+    
+    return True, "Datos válidos"
+
+# Filas procesadas por bloque al validar/binarizar (acota la memoria temporal)
+BINARIZE_BLOCK_ROWS = 100_000
+
+def _iter_numeric_blocks(data, block_rows=BINARIZE_BLOCK_ROWS):
+    """
+    Recorre los datos en bloques de filas como matrices de NumPy.
+
+    Devuelve (inicio, fin, valores, no_numericos), donde no_numericos marca
+    las celdas con texto u otros valores que no se pueden convertir a número.
+    Si todas las columnas son enteras o booleanas se conserva su tipo (sin
+    copiar a float64); en otro caso los bloques se convierten a float64.
+    """
+    non_numeric_cols = data.select_dtypes(exclude=['number', 'bool']).columns
+    integer_only = all(dtype.kind in 'biu' for dtype in data.dtypes)
+    for start in range(0, len(data), block_rows):
+        block = data.iloc[start:start + block_rows]
+        non_numeric = None
+        if len(non_numeric_cols) > 0:
+            block = block.copy()
+            original = block[non_numeric_cols]
+            block[non_numeric_cols] = original.apply(pd.to_numeric, errors='coerce')
+            non_numeric = np.zeros(block.shape, dtype=bool)
+            non_numeric[:, block.columns.get_indexer(non_numeric_cols)] = (
+                block[non_numeric_cols].isna() & original.notna()
+            ).to_numpy()
+        values = block.to_numpy() if integer_only else block.to_numpy(dtype=np.float64)
+        yield start, start + len(block), values, non_numeric
+
+def _non_binary_mask(values, non_numeric=None):
+    """Celdas que no son 0, 1 ni nulas"""
+    mask = (values != 0) & (values != 1)
+    if values.dtype.kind == 'f':
+        mask &= ~np.isnan(values)
+    if non_numeric is not None:
+        mask |= non_numeric
+    return mask
+
+def count_non_binary_values(data):
+    """Cuenta, por columna, los valores (no nulos) distintos de 0 y 1"""
+    if is_sparse_data(data):
+        matrix = data.sparse.to_coo()
+        bad = (matrix.data != 0) & (matrix.data != 1)
+        counts = np.bincount(matrix.col[bad], minlength=len(data.columns))
+        return pd.Series(counts, index=data.columns)
+
+    counts = np.zeros(len(data.columns), dtype=np.int64)
+    if all(dtype.kind == 'b' for dtype in data.dtypes):
+        return pd.Series(counts, index=data.columns)
+    for _, _, values, non_numeric in _iter_numeric_blocks(data):
+        counts += _non_binary_mask(values, non_numeric).sum(axis=0)
+    return pd.Series(counts, index=data.columns)
+
+def binarize_data(data, block_rows=BINARIZE_BLOCK_ROWS):
+    """
+    Valida y convierte todos los items a binario en una sola pasada vectorizada.
+
+    Los valores mayores a 0 se convierten en 1 y el resto (0, negativos,
+    nulos o texto) en 0. El resultado usa uint8 para reducir memoria.
+
+    Devuelve (datos_binarios, reporte), donde el reporte tiene una fila por
+    item con los valores no binarios, los nulos y si la columna fue convertida.
+    """
+    if is_sparse_data(data):
+        non_binary = count_non_binary_values(data).to_numpy()
+        nulls = np.zeros(len(data.columns), dtype=np.int64)
+        binary = data
+        if non_binary.any():
+            matrix = data.sparse.to_coo()
+            matrix.data = (matrix.data > 0).astype(np.uint8)
+            binary = sparse_transactions_from_matrix(matrix, data.columns)
+    else:
+        binary_values = np.empty(data.shape, dtype=np.uint8)
+        non_binary = np.zeros(len(data.columns), dtype=np.int64)
+        nulls = np.zeros(len(data.columns), dtype=np.int64)
+        for start, stop, values, non_numeric in _iter_numeric_blocks(data, block_rows):
+            non_binary += _non_binary_mask(values, non_numeric).sum(axis=0)
+            if values.dtype.kind == 'f':
+                nulls += np.isnan(values).sum(axis=0)
+                if non_numeric is not None:
+                    nulls -= non_numeric.sum(axis=0)
+            binary_values[start:stop] = values > 0
+        binary = pd.DataFrame(binary_values, columns=data.columns, index=data.index)
+
+    report = pd.DataFrame({
+        'Item': data.columns,
+        'Valores no binarios': non_binary,
+        'Valores nulos': nulls,
+        'Convertida': (non_binary > 0) | (nulls > 0)
+    })
+    return binary, report
+
+# Por debajo de esta densidad los datos se guardan en formato disperso
+SPARSE_DENSITY_THRESHOLD = 0.1
+# Filas que se muestran en las vistas previas de datos dispersos
+PREVIEW_ROWS = 1000
+
+def is_sparse_data(data):
+    """Indica si todas las columnas del DataFrame usan almacenamiento disperso"""
+    return len(data.columns) > 0 and all(isinstance(dtype, pd.SparseDtype) for dtype in data.dtypes)
+
+def sparse_transactions_from_matrix(matrix, items):
+    """
+    Crea un DataFrame disperso (una columna SparseDtype(uint8) por item)
+    a partir de una matriz de SciPy transacciones × items.
+
+    Solo se guardan las posiciones con 1, así que la memoria crece con el
+    número de valores distintos de cero y no con filas × items.
+    """
+    matrix = sp.csc_matrix(matrix, dtype=np.uint8)
+    matrix.eliminate_zeros()
+    matrix.data[:] = 1
+    return pd.DataFrame.sparse.from_spmatrix(matrix, columns=list(items))
+
+def to_sparse_transactions(data):
+    """Convierte un DataFrame binario denso al formato disperso"""
+    if is_sparse_data(data):
+        return data
+    matrix = sp.csc_matrix(data.to_numpy(dtype=np.uint8))
+    return sparse_transactions_from_matrix(matrix, data.columns)
+
+def maybe_sparsify(data, threshold=SPARSE_DENSITY_THRESHOLD):
+    """Usa el formato disperso solo cuando la densidad de 1s está por debajo del umbral"""
+    if is_sparse_data(data) or data.size == 0:
+        return data
+    density = np.count_nonzero(data.to_numpy()) / data.size
+    return to_sparse_transactions(data) if density < threshold else data
+
+def transactions_to_csc(data):
+    """Devuelve la matriz transacciones × items como CSC de SciPy (sin densificar si ya es dispersa)"""
+    if is_sparse_data(data):
+        return data.sparse.to_coo().tocsc()
+    return sp.csc_matrix(data.to_numpy(dtype=np.uint8))
+
+def calculate_density(data):
+    """Proporción de celdas con 1 sobre el total de celdas"""
+    total_cells = len(data) * len(data.columns)
+    if total_cells == 0:
+        return 0
+    if is_sparse_data(data):
+        return transactions_to_csc(data).nnz / total_cells
+    return data.sum().sum() / total_cells
+
+def preview_data(data, n_rows=PREVIEW_ROWS):
+    """Vista previa densa y acotada de los datos para mostrar en pantalla"""
+    if is_sparse_data(data):
+        return data.head(n_rows).sparse.to_dense()
+    return data
+
+def calculate_dependency_factors(a, b, c, d, n):
+    """
+    Calcula los 4 factores de dependencia usando la fórmula: FD = P(A∩B) / (P(A) × P(B))
+    
+    Tabla de contingencia CORREGIDA:
+                Item2=1    Item2=0    Total
+    Item1=1        a         b        a+b
+    Item1=0        c         d        c+d
+    Total        a+c       b+d        n
+    
+    Donde:
+    - a = Item1=1 ∩ Item2=1
+    - b = Item1=1 ∩ Item2=0  
+    - c = Item1=0 ∩ Item2=1
+    - d = Item1=0 ∩ Item2=0
+    """
+    
+    if n == 0:
+        return {
+            'fd_1_1': 0, 'fd_1_0': 0, 'fd_0_1': 0, 'fd_0_0': 0,
+            'probabilities': {}, 'formulas': {}, 'contingency_mapping': {}
+        }
+    
+    # Calcular probabilidades marginales
+    p_item1_1 = (a + b) / n  # P(Item1=1)
+    p_item1_0 = (c + d) / n  # P(Item1=0)
+    p_item2_1 = (a + c) / n  # P(Item2=1)
+    p_item2_0 = (b + d) / n  # P(Item2=0)
+    
+    # Calcular probabilidades conjuntas
+    p_both_1_1 = a / n  # P(Item1=1 ∩ Item2=1)
+    p_1_0 = b / n        # P(Item1=1 ∩ Item2=0)
+    p_0_1 = c / n        # P(Item1=0 ∩ Item2=1)
+    p_both_0_0 = d / n   # P(Item1=0 ∩ Item2=0)
+    
+    # Calcular factores de dependencia: FD = P(A∩B) / (P(A) × P(B))
+    fd_1_1 = p_both_1_1 / (p_item1_1 * p_item2_1) if (p_item1_1 * p_item2_1) > 0 else 0
+    fd_1_0 = p_1_0 / (p_item1_1 * p_item2_0) if (p_item1_1 * p_item2_0) > 0 else 0
+    fd_0_1 = p_0_1 / (p_item1_0 * p_item2_1) if (p_item1_0 * p_item2_1) > 0 else 0
+    fd_0_0 = p_both_0_0 / (p_item1_0 * p_item2_0) if (p_item1_0 * p_item2_0) > 0 else 0
+    
+    return {
+        'fd_1_1': fd_1_1,  # Item1=1, Item2=1
+        'fd_1_0': fd_1_0,  # Item1=1, Item2=0
+        'fd_0_1': fd_0_1,  # Item1=0, Item2=1
+        'fd_0_0': fd_0_0,  # Item1=0, Item2=0
+        'probabilities': {
+            'p_item1_1': p_item1_1,
+            'p_item1_0': p_item1_0,
+            'p_item2_1': p_item2_1,
+            'p_item2_0': p_item2_0,
+            'p_both_1_1': p_both_1_1,
+            'p_1_0': p_1_0,
+            'p_0_1': p_0_1,
+            'p_both_0_0': p_both_0_0
+        },
+        'formulas': {
+            'fd_1_1_formula': f"{p_both_1_1:.3f} / ({p_item1_1:.3f} × {p_item2_1:.3f})",
+            'fd_1_0_formula': f"{p_1_0:.3f} / ({p_item1_1:.3f} × {p_item2_0:.3f})",
+            'fd_0_1_formula': f"{p_0_1:.3f} / ({p_item1_0:.3f} × {p_item2_1:.3f})",
+            'fd_0_0_formula': f"{p_both_0_0:.3f} / ({p_item1_0:.3f} × {p_item2_0:.3f})"
+        },
+        'contingency_mapping': {
+            'a': a,  # Item1=1, Item2=1
+            'b': b,  # Item1=1, Item2=0
+            'c': c,  # Item1=0, Item2=1
+            'd': d   # Item1=0, Item2=0
+        },
+        'verification': {
+            'example_calculation': f"FD(1,1) = P(1∩1)/[P(1)×P(1)] = ({a}/{n}) / [({a+b}/{n}) × ({a+c}/{n})] = {p_both_1_1:.3f} / ({p_item1_1:.3f} × {p_item2_1:.3f}) = {fd_1_1:.3f}"
+        }
+    }
+
+def interpret_dependency_factors(fd_results, item1, item2):
+    """Genera interpretaciones contextuales de los factores de dependencia"""
+    interpretations = []
+    
+    fd_1_1 = fd_results['fd_1_1']
+    fd_1_0 = fd_results['fd_1_0']
+    fd_0_1 = fd_results['fd_0_1']
+    fd_0_0 = fd_results['fd_0_0']
+    
+    # Interpretación principal
+    if fd_0_1 > fd_1_1:
+        if fd_0_1 > 1.2:
+            interpretations.append(f"📈 **Comprar {item2} disminuye la compra de {item1}** (FD(~{item1}|{item2}) = {fd_0_1:.3f} > FD({item1}|{item2}) = {fd_1_1:.3f})")
+        else:
+            interpretations.append(f"⚠️ **Comprar {item2} tiende a disminuir la compra de {item1}** (FD(~{item1}|{item2}) = {fd_0_1:.3f})")
+    elif fd_1_1 > fd_0_1:
+        if fd_1_1 > 1.2:
+            interpretations.append(f"📈 **Comprar {item2} aumenta la compra de {item1}** (FD({item1}|{item2}) = {fd_1_1:.3f} > FD(~{item1}|{item2}) = {fd_0_1:.3f})")
+        else:
+            interpretations.append(f"✅ **Comprar {item2} tiende a aumentar la compra de {item1}** (FD({item1}|{item2}) = {fd_1_1:.3f})")
+    else:
+        interpretations.append(f"⚪ **Comprar {item2} no afecta significativamente la compra de {item1}** (FD ≈ {fd_1_1:.3f})")
+    
+    # Interpretación secundaria
+    if fd_0_0 > fd_1_0:
+        interpretations.append(f"📉 **NO comprar {item2} disminuye la compra de {item1}** (FD(~{item1}|~{item2}) = {fd_0_0:.3f} > FD({item1}|~{item2}) = {fd_1_0:.3f})")
+    elif fd_1_0 > fd_0_0:
+        interpretations.append(f"📈 **NO comprar {item2} aumenta la compra de {item1}** (FD({item1}|~{item2}) = {fd_1_0:.3f} > FD(~{item1}|~{item2}) = {fd_0_0:.3f})")
+    
+    # Análisis detallado
+    interpretations.append("---")
+    interpretations.append("**Análisis detallado por celda:**")
+    
+    if fd_1_1 > 1.2:
+        interpretations.append(f"✅ **Fuerte asociación positiva** entre {item1}=1 y {item2}=1 (FD = {fd_1_1:.3f})")
+    elif fd_1_1 < 0.8:
+        interpretations.append(f"❌ **Asociación negativa** entre {item1}=1 y {item2}=1 (FD = {fd_1_1:.3f})")
+    else:
+        interpretations.append(f"⚪ **Independencia** entre {item1}=1 y {item2}=1 (FD = {fd_1_1:.3f})")
+    
+    if fd_0_1 > 1.2:
+        interpretations.append(f"⚠️ **Cuando se compra {item2}, es más probable NO comprar {item1}** (FD = {fd_0_1:.3f})")
+    elif fd_0_1 < 0.8:
+        interpretations.append(f"✅ **Cuando se compra {item2}, es menos probable NO comprar {item1}** (FD = {fd_0_1:.3f})")
+    
+    return interpretations
+
+def count_sparse_pair(data, item1, item2):
+    """Cuenta a, b, c, d de un par intersectando las posiciones con 1 de dos columnas dispersas"""
+    n = len(data)
+    rows1 = _sparse_positions(data[item1])
+    rows2 = _sparse_positions(data[item2])
+    a = len(np.intersect1d(rows1, rows2, assume_unique=True))
+    b = len(rows1) - a
+    c = len(rows2) - a
+    d = n - a - b - c
+    return a, b, c, d
+
+def _sparse_positions(column):
+    """Posiciones (filas) donde una columna dispersa vale 1"""
+    values = column.array
+    return values.sp_index.indices[values.sp_values != 0]
+
+def build_contingency_table(a, b, c, d):
+    """Construye la tabla de contingencia con totales a partir de a, b, c, d (1 primero, luego 0)"""
+    contingency = pd.DataFrame(
+        [[a, b, a + b],
+         [c, d, c + d],
+         [a + c, b + d, a + b + c + d]],
+        index=[1, 0, 'All'],
+        columns=[1, 0, 'All']
+    )
+    contingency.index.name = None
+    contingency.columns.name = None
+    return contingency
+
+# Conteo de bits por byte (respaldo cuando NumPy no tiene bitwise_count)
+_POPCOUNT_TABLE = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+def popcount(words):
+    """Número de bits en 1 de cada fila de una matriz de palabras uint64"""
+    words = np.ascontiguousarray(words)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+    return _POPCOUNT_TABLE[words.view(np.uint8)].sum(axis=-1, dtype=np.int64)
+
+def pack_transactions(data):
+    """
+    Empaqueta cada item como un conjunto de bits: un bit por transacción, en palabras uint64.
+
+    Ocupa 64 veces menos memoria que una columna int64 y permite contar un par
+    con a = popcount(A & B); b, c y d salen de las frecuencias marginales.
+    Devuelve un diccionario con los items, los bits (items × palabras), n y
+    la frecuencia de cada item.
+    """
+    n = len(data)
+    n_items = len(data.columns)
+    n_words = (n + 63) // 64
+    if is_sparse_data(data):
+        matrix = transactions_to_csc(data)
+        cols = np.repeat(np.arange(n_items), np.diff(matrix.indptr))
+        rows = matrix.indices.astype(np.uint64)
+        bits = np.zeros((n_items, n_words), dtype=np.uint64)
+        np.bitwise_or.at(bits, (cols, (rows >> np.uint64(6)).astype(np.int64)),
+                         np.left_shift(np.uint64(1), rows & np.uint64(63)))
+    else:
+        packed = np.packbits((data.to_numpy() == 1).T, axis=1, bitorder='little')
+        padded = np.zeros((n_items, n_words * 8), dtype=np.uint8)
+        padded[:, :packed.shape[1]] = packed
+        bits = padded.view(np.uint64)
+    return {
+        'items': list(data.columns),
+        'bits': bits,
+        'n': n,
+        'item_counts': popcount(bits)
+    }
+
+def bitset_pair_counts(bitsets, item1, item2):
+    """Cuenta a, b, c, d de un par con popcount sobre los bits empaquetados"""
+    i = bitsets['items'].index(item1)
+    j = bitsets['items'].index(item2)
+    a = int(popcount(bitsets['bits'][i] & bitsets['bits'][j]))
+    b = int(bitsets['item_counts'][i]) - a
+    c = int(bitsets['item_counts'][j]) - a
+    d = bitsets['n'] - a - b - c
+    return a, b, c, d
+
+# Niveles de significancia por defecto (valores críticos 3.841, 6.635 y 10.828)
+DEFAULT_ALPHAS = (0.05, 0.01, 0.001)
+# Frecuencia esperada mínima por celda para usar chi-cuadrado; debajo se usa la prueba exacta de Fisher
+FISHER_MIN_EXPECTED = 5
+
+def alpha_label(alpha):
+    """Etiqueta del nivel de confianza de un alfa (0.05 -> '95%')"""
+    return f"{(1 - alpha) * 100:g}%"
+
+def critical_values_for(alphas=DEFAULT_ALPHAS):
+    """Valores críticos exactos de chi-cuadrado (1 grado de libertad) para cada alfa"""
+    from scipy.stats import chi2 as chi2_distribution  # diferido: scipy.stats tarda en importarse
+
+    return {alpha_label(alpha): round(float(chi2_distribution.isf(alpha, df=1)), 3) for alpha in alphas}
+
+def parse_alphas(text):
+    """
+    Lee niveles de significancia separados por comas, por ejemplo "0.05, 0.01".
+
+    Lanza ValueError si algún valor no está entre 0 y 1.
+    """
+    alphas = []
+    for part in text.replace(';', ',').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        alpha = float(part)
+        if not 0 < alpha < 1:
+            raise ValueError(f"El nivel de significancia debe estar entre 0 y 1: {part}")
+        alphas.append(alpha)
+    return tuple(sorted(set(alphas), reverse=True)) or DEFAULT_ALPHAS
+
+def chi2_p_values(chi2_stat):
+    """P-valores exactos de chi-cuadrado con 1 grado de libertad (acepta escalares o arreglos)"""
+    from scipy.stats import chi2 as chi2_distribution
+
+    return chi2_distribution.sf(chi2_stat, df=1)
+
+def fisher_p_value(a, b, c, d):
+    """P-valor bilateral de la prueba exacta de Fisher para una tabla 2x2"""
+    from scipy.stats import fisher_exact
+
+    return float(fisher_exact([[a, b], [c, d]])[1])
+
+def _hypergeom_logpmf(k, total, row, col):
+    """Log de la probabilidad hipergeométrica de una tabla 2x2 con celda a = k y márgenes fijos"""
+    from scipy.special import gammaln
+
+    def log_comb(n, r):
+        return gammaln(n + 1) - gammaln(r + 1) - gammaln(n - r + 1)
+
+    return log_comb(row, k) + log_comb(total - row, col - k) - log_comb(total, col)
+
+def _hypergeom_tail(start, bound, step, total, row, col):
+    """
+    Suma pmf(k) desde start hasta bound (incluidos) avanzando con step (-1 o +1),
+    en la dirección en que la probabilidad decrece. Usa el cociente entre
+    términos consecutivos y se detiene cuando el término ya no cambia la suma.
+    """
+    inside = (start - bound) * -step >= 0
+    term = np.where(inside, np.exp(_hypergeom_logpmf(start, total, row, col)), 0.0)
+    sums = term.copy()
+    k = start.copy()
+    active = np.nonzero(inside & (k != bound) & (term > 0))[0]
+    while len(active):
+        ka, ra, ca, ta = k[active], row[active], col[active], total[active]
+        if step < 0:
+            ratio = ka * (ta - ra - ca + ka) / ((ra - ka + 1) * (ca - ka + 1))
+        else:
+            ratio = (ra - ka) * (ca - ka) / ((ka + 1) * (ta - ra - ca + ka + 1))
+        term[active] *= ratio
+        sums[active] += term[active]
+        k[active] += step
+        active = active[(k[active] != bound[active]) & (term[active] > sums[active] * 1e-17)]
+    return sums
+
+def fisher_p_values(a, b, c, d):
+    """
+    P-valores bilaterales de Fisher para muchas tablas 2x2 a la vez (arreglos a, b, c, d).
+
+    Da los mismos valores que fisher_exact: suma las probabilidades
+    hipergeométricas de las tablas con los mismos márgenes que no son más
+    probables que la observada. La cola opuesta se encuentra con una búsqueda
+    binaria vectorizada sobre la distribución (unimodal) y cada cola se suma
+    desde su extremo más probable hasta que los términos ya no cuentan, así
+    que no hay una llamada de Python por tabla.
+    """
+    a, b, c, d = (np.asarray(value, dtype=np.int64).ravel() for value in (a, b, c, d))
+    total = a + b + c + d
+    row = a + b  # Item1=1
+    col = a + c  # Item2=1
+    lower = np.maximum(0, col - (c + d))
+    upper = np.minimum(row, col)
+    mode = ((col + 1) * (row + 1)) // (total + 2)
+
+    def log_pmf(k):
+        return _hypergeom_logpmf(k, total, row, col)
+
+    log_exact = log_pmf(a)
+    log_mode = log_pmf(mode)
+    log_threshold = log_exact + np.log1p(1e-7)
+    p_values = np.ones(len(a))
+
+    # Si la tabla observada es tan probable como la moda, p = 1 (tolerancia por el redondeo de gammaln)
+    tie = np.abs(log_exact - log_mode) <= 1e-9
+    below = (a < mode) & ~tie
+    above = (a > mode) & ~tie
+
+    # Cola inferior observada: la otra cola empieza en el primer k > moda con pmf(k) <= pmf(a)
+    lo, hi = mode.copy(), upper + 1
+    while True:
+        active = below & (hi - lo > 1)
+        if not active.any():
+            break
+        mid = (lo + hi) // 2
+        fits = active & (log_pmf(mid) <= log_threshold)
+        hi = np.where(fits, mid, hi)
+        lo = np.where(active & ~fits, mid, lo)
+    p_values[below] = (
+        _hypergeom_tail(a, lower, -1, total, row, col)[below]
+        + _hypergeom_tail(hi, upper, 1, total, row, col)[below]
+    )
+
+    # Cola superior observada: la otra cola termina en el último k < moda con pmf(k) <= pmf(a)
+    lo, hi = lower - 1, mode.copy()
+    while True:
+        active = above & (hi - lo > 1)
+        if not active.any():
+            break
+        mid = (lo + hi) // 2
+        fits = active & (log_pmf(mid) <= log_threshold)
+        lo = np.where(fits, mid, lo)
+        hi = np.where(active & ~fits, mid, hi)
+    p_values[above] = (
+        _hypergeom_tail(a, upper, 1, total, row, col)[above]
+        + _hypergeom_tail(lo, lower, -1, total, row, col)[above]
+    )
+
+    # Márgenes vacíos: solo hay una tabla posible
+    p_values[(row == 0) | (col == 0) | (row == total) | (col == total)] = 1.0
+    return np.minimum(p_values, 1.0)
+
+def minimum_expected(a, b, c, d):
+    """Menor frecuencia esperada de las cuatro celdas (acepta escalares o arreglos)"""
+    a, b, c, d = (np.asarray(value, dtype=np.float64) for value in (a, b, c, d))
+    n = a + b + c + d
+    smallest_row = np.minimum(a + b, c + d)
+    smallest_col = np.minimum(a + c, b + d)
+    return _safe_divide(smallest_row * smallest_col, n)
+
+def adjust_p_values(p_values, method='bonferroni', n_tests=None):
+    """
+    Corrige p-valores por comparaciones múltiples.
+
+    method es 'bonferroni' o 'bh' (Benjamini-Hochberg). n_tests es el número
+    total de pruebas (por defecto, los p-valores recibidos). Si solo se reciben
+    los p-valores de los pares que pasaron un filtro, usar n_tests = total de
+    pares da un ajuste BH conservador.
+    """
+    p_values = np.asarray(p_values, dtype=np.float64)
+    n_tests = max(n_tests or len(p_values), len(p_values))
+    if method == 'bonferroni':
+        return np.minimum(p_values * n_tests, 1.0)
+    if method == 'bh':
+        order = np.argsort(p_values, kind='stable')
+        ranked = p_values[order] * n_tests / np.arange(1, len(p_values) + 1)
+        ranked = np.minimum.accumulate(ranked[::-1])[::-1]
+        adjusted = np.empty_like(p_values)
+        adjusted[order] = np.minimum(ranked, 1.0)
+        return adjusted
+    raise ValueError(f"Corrección desconocida: {method}")
+
+def calculate_metrics(data, item1, item2, alphas=DEFAULT_ALPHAS, yates=False, fisher_min_expected=None):
+    """Calcula todas las métricas de asociación de un par a partir de las transacciones"""
+    if is_sparse_data(data):
+        # Datos dispersos: contar sobre las posiciones con 1, sin densificar
+        counts = count_sparse_pair(data, item1, item2)
+    else:
+        # Datos densos: empaquetar las dos columnas en bits y contar con popcount
+        counts = bitset_pair_counts(pack_transactions(data[[item1, item2]]), item1, item2)
+    
+    # item1 en filas, item2 en columnas (1 primero, luego 0)
+    contingency = build_contingency_table(*counts)
+    
+    return metrics_from_contingency(contingency, item1, item2, alphas, yates, fisher_min_expected)
+
+def metrics_from_contingency(contingency, item1, item2, alphas=DEFAULT_ALPHAS, yates=False,
+                             fisher_min_expected=None):
+    """
+    Calcula las métricas de asociación a partir de una tabla de contingencia ya construida.
+
+    El p-valor es exacto (chi2.sf); con yates=True se aplica la corrección de
+    continuidad y, si alguna frecuencia esperada es menor que fisher_min_expected,
+    se usa la prueba exacta de Fisher (por defecto None: siempre chi-cuadrado).
+    """
+    # Extraer valores CORRECTOS según la tabla estándar (enteros de Python para evitar desbordes)
+    a = int(contingency.loc[1, 1])  # Item1=1, Item2=1 (celda superior izquierda)
+    b = int(contingency.loc[1, 0])  # Item1=1, Item2=0 (celda superior derecha)
+    c = int(contingency.loc[0, 1])  # Item1=0, Item2=1 (celda inferior izquierda)
+    d = int(contingency.loc[0, 0])  # Item1=0, Item2=0 (celda inferior derecha)
+    n = int(contingency.loc['All', 'All'])
+    
+    # Calcular métricas básicas
+    conf_1_to_2 = a / (a + b) if (a + b) > 0 else 0
+    conf_2_to_1 = a / (a + c) if (a + c) > 0 else 0
+    cov_1 = (a + b) / n if n > 0 else 0
+    cov_2 = (a + c) / n if n > 0 else 0
+    
+    # Factor de dependencia ANTIGUO
+    expected_a = (a + b) * (a + c) / n if n > 0 else 0
+    dependency_factor_old = (a - expected_a) / expected_a if expected_a > 0 else 0
+    
+    # NUEVOS Factores de dependencia
+    dependency_factors = calculate_dependency_factors(a, b, c, d, n)
+    
+    # Interpretaciones contextuales
+    interpretations = interpret_dependency_factors(dependency_factors, item1, item2)
+    
+    # Chi-cuadrado (con corrección de Yates si se pide)
+    denominator = (a + b) * (c + d) * (a + c) * (b + d)
+    difference = abs(a * d - b * c)
+    if yates:
+        difference = max(0, difference - n / 2)
+    chi2_stat = n * difference ** 2 / denominator if denominator > 0 else 0
+    
+    # P-valor exacto; prueba de Fisher si hay celdas con frecuencia esperada pequeña
+    test = 'Chi-cuadrado con corrección de Yates' if yates else 'Chi-cuadrado'
+    p_value = float(chi2_p_values(chi2_stat)) if denominator > 0 else 1.0
+    if fisher_min_expected is not None and n > 0 and minimum_expected(a, b, c, d) < fisher_min_expected:
+        test = 'Exacta de Fisher'
+        p_value = fisher_p_value(a, b, c, d)
+    
+    # Valores críticos y niveles en los que la asociación es significativa
+    critical_values = critical_values_for(alphas)
+    significance = [alpha_label(alpha) for alpha in alphas if p_value < alpha]
+    
+    # Todas las reglas de asociación
+    all_rules = calculate_all_association_rules(a, b, c, d, n, item1, item2)
+    
+    return {
+        'contingency': contingency,
+        'a': int(a), 'b': int(b), 'c': int(c), 'd': int(d), 'n': int(n),
+        'conf_1_to_2': float(conf_1_to_2),
+        'conf_2_to_1': float(conf_2_to_1),
+        'cov_1': float(cov_1),
+        'cov_2': float(cov_2),
+        'dependency_factor': float(dependency_factor_old),
+        'dependency_factors': dependency_factors,
+        'dependency_interpretations': interpretations,
+        'chi2_stat': float(chi2_stat),
+        'p_value': p_value,
+        'test': test,
+        'critical_values': critical_values,
+        'significance': significance,
+        'all_rules': all_rules
+    }
+
+def calculate_all_association_rules(a, b, c, d, n, item1, item2):
+    """Calcula todas las 8 reglas de asociación posibles"""
+    
+    rules = []
+    
+    # Reglas para item1 → item2
+    cb_1_1 = a / n if n > 0 else 0
+    cf_1_1 = a / (a + b) if (a + b) > 0 else 0
+    rules.append({
+        'rule': f'Si ({item1}=1) Entonces {item2}=1',
+        'coverage': cb_1_1,
+        'confidence': cf_1_1,
+        'support': a,
+        'total': a + b,
+        'formula': f'({a}/{a + b})' if (a + b) > 0 else '(0/0)'
+    })
+    
+    cb_1_0 = b / n if n > 0 else 0
+    cf_1_0 = b / (a + b) if (a + b) > 0 else 0
+    rules.append({
+        'rule': f'Si ({item1}=1) Entonces {item2}=0',
+        'coverage': cb_1_0,
+        'confidence': cf_1_0,
+        'support': b,
+        'total': a + b,
+        'formula': f'({b}/{a + b})' if (a + b) > 0 else '(0/0)'
+    })
+    
+    cb_0_1 = c / n if n > 0 else 0
+    cf_0_1 = c / (c + d) if (c + d) > 0 else 0
+    rules.append({
+        'rule': f'Si ({item1}=0) Entonces {item2}=1',
+        'coverage': cb_0_1,
+        'confidence': cf_0_1,
+        'support': c,
+        'total': c + d,
+        'formula': f'({c}/{c + d})' if (c + d) > 0 else '(0/0)'
+    })
+    
+    cb_0_0 = d / n if n > 0 else 0
+    cf_0_0 = d / (c + d) if (c + d) > 0 else 0
+    rules.append({
+        'rule': f'Si ({item1}=0) Entonces {item2}=0',
+        'coverage': cb_0_0,
+        'confidence': cf_0_0,
+        'support': d,
+        'total': c + d,
+        'formula': f'({d}/{c + d})' if (c + d) > 0 else '(0/0)'
+    })
+    
+    # Reglas para item2 → item1
+    cb_2_1 = a / n if n > 0 else 0
+    cf_2_1 = a / (a + c) if (a + c) > 0 else 0
+    rules.append({
+        'rule': f'Si ({item2}=1) Entonces {item1}=1',
+        'coverage': cb_2_1,
+        'confidence': cf_2_1,
+        'support': a,
+        'total': a + c,
+        'formula': f'({a}/{a + c})' if (a + c) > 0 else '(0/0)'
+    })
+    
+    cb_2_0 = c / n if n > 0 else 0
+    cf_2_0 = c / (a + c) if (a + c) > 0 else 0
+    rules.append({
+        'rule': f'Si ({item2}=1) Entonces {item1}=0',
+        'coverage': cb_2_0,
+        'confidence': cf_2_0,
+        'support': c,
+        'total': a + c,
+        'formula': f'({c}/{a + c})' if (a + c) > 0 else '(0/0)'
+    })
+    
+    cb_0_2 = b / n if n > 0 else 0
+    cf_0_2 = b / (b + d) if (b + d) > 0 else 0
+    rules.append({
+        'rule': f'Si ({item2}=0) Entonces {item1}=1',
+        'coverage': cb_0_2,
+        'confidence': cf_0_2,
+        'support': b,
+        'total': b + d,
+        'formula': f'({b}/{b + d})' if (b + d) > 0 else '(0/0)'
+    })
+    
+    cb_0_0_2 = d / n if n > 0 else 0
+    cf_0_0_2 = d / (b + d) if (b + d) > 0 else 0
+    rules.append({
+        'rule': f'Si ({item2}=0) Entonces {item1}=0',
+        'coverage': cb_0_0_2,
+        'confidence': cf_0_0_2,
+        'support': d,
+        'total': b + d,
+        'formula': f'({d}/{b + d})' if (b + d) > 0 else '(0/0)'
+    })
+
+    return rules
+
+def _safe_divide(numerator, denominator):
+    """División elemento a elemento que devuelve 0 donde el denominador es 0"""
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    out = np.zeros(np.broadcast(numerator, denominator).shape, dtype=np.float64)
+    np.divide(numerator, denominator, out=out, where=denominator != 0)
+    return out
+
+def calculate_pair_statistics(cooccurrence, item_counts, n, column_counts=None, yates=False):
+    """
+    Calcula las métricas de todos los pares a partir de la matriz de co-ocurrencia.
+
+    Para el par (i, j), con i en filas (Item1) y j en columnas (Item2):
+    - a = cooccurrence[i, j]
+    - b = item_counts[i] - a
+    - c = item_counts[j] - a
+    - d = n - a - b - c
+
+    Si se indica column_counts, cooccurrence es un bloque (items de las filas ×
+    items de las columnas) y column_counts son las frecuencias de las columnas.
+
+    Las definiciones son las mismas que en calculate_metrics y
+    calculate_dependency_factors, pero evaluadas como matrices de NumPy; los
+    p-valores de chi-cuadrado se calculan para todo el bloque en una sola llamada.
+    """
+    a = np.asarray(cooccurrence, dtype=np.float64)
+    counts = np.asarray(item_counts, dtype=np.float64)
+    column_counts = counts if column_counts is None else np.asarray(column_counts, dtype=np.float64)
+    n = float(n)
+
+    row_totals = counts[:, None]  # a + b (Item1=1)
+    col_totals = column_counts[None, :]  # a + c (Item2=1)
+    b = row_totals - a
+    c = col_totals - a
+    d = n - a - b - c
+
+    # Métricas básicas
+    conf_1_to_2 = _safe_divide(a, row_totals)
+    conf_2_to_1 = _safe_divide(a, col_totals)
+    coverage = counts / n if n > 0 else np.zeros_like(counts)
+
+    # Factor de dependencia ANTIGUO
+    expected_a = row_totals * col_totals / n if n > 0 else np.zeros_like(a)
+    dependency_factor_old = _safe_divide(a - expected_a, expected_a)
+
+    # Factores de dependencia: FD = P(A∩B) / (P(A) × P(B)) = n·celda / (total_fila × total_columna)
+    absent_rows = n - row_totals  # c + d (Item1=0)
+    absent_cols = n - col_totals  # b + d (Item2=0)
+    fd_1_1 = _safe_divide(n * a, row_totals * col_totals)
+    fd_1_0 = _safe_divide(n * b, row_totals * absent_cols)
+    fd_0_1 = _safe_divide(n * c, absent_rows * col_totals)
+    fd_0_0 = _safe_divide(n * d, absent_rows * absent_cols)
+
+    # Chi-cuadrado (con corrección de Yates si se pide) y p-valores exactos
+    denominator = row_totals * absent_rows * col_totals * absent_cols
+    difference = np.abs(a * d - b * c)
+    if yates:
+        difference = np.maximum(difference - n / 2, 0)
+    chi2_stat = _safe_divide(n * difference ** 2, denominator)
+    p_value = np.where(denominator > 0, chi2_p_values(chi2_stat), 1.0)
+
+    return {
+        'a': a, 'b': b, 'c': c, 'd': d, 'n': int(n),
+        'item_counts': counts,
+        'conf_1_to_2': conf_1_to_2,
+        'conf_2_to_1': conf_2_to_1,
+        'coverage': coverage,
+        'dependency_factor': dependency_factor_old,
+        'fd_1_1': fd_1_1,
+        'fd_1_0': fd_1_0,
+        'fd_0_1': fd_0_1,
+        'fd_0_0': fd_0_0,
+        'chi2_stat': chi2_stat,
+        'p_value': p_value
+    }
+
+def calculate_all_pairs_metrics(data, yates=False):
+    """
+    Calcula las métricas de asociación de todos los pares de items a la vez.
+
+    La matriz de co-ocurrencia se obtiene con un solo producto matricial
+    (X.T @ X) y las sumas por columna, en lugar de un crosstab por par.
+    Devuelve matrices densas de NumPy (items × items) junto con los nombres.
+    """
+    if is_sparse_data(data):
+        # Producto disperso: el costo depende de los valores distintos de cero
+        X = transactions_to_csc(data).astype(np.int64)
+        cooccurrence = (X.T @ X).toarray()
+        item_counts = np.asarray(X.sum(axis=0)).ravel()
+    else:
+        X = data.to_numpy(dtype=np.float64)
+        cooccurrence = X.T @ X
+        item_counts = X.sum(axis=0)
+
+    results = calculate_pair_statistics(cooccurrence, item_counts, len(data), yates=yates)
+    results['items'] = list(data.columns)
+    return results
+
+def _pairs_table(stats, rows, cols, row_items, col_items, row_coverage, col_coverage):
+    """Tabla con un renglón por par (rows[k], cols[k]) a partir de las matrices de métricas"""
+    return pd.DataFrame({
+        'Item 1': np.asarray(row_items, dtype=object)[rows],
+        'Item 2': np.asarray(col_items, dtype=object)[cols],
+        'a': stats['a'][rows, cols].astype(np.int64),
+        'b': stats['b'][rows, cols].astype(np.int64),
+        'c': stats['c'][rows, cols].astype(np.int64),
+        'd': stats['d'][rows, cols].astype(np.int64),
+        'Confianza 1→2': stats['conf_1_to_2'][rows, cols],
+        'Confianza 2→1': stats['conf_2_to_1'][rows, cols],
+        'Cobertura 1': row_coverage[rows],
+        'Cobertura 2': col_coverage[cols],
+        'FD(1,1)': stats['fd_1_1'][rows, cols],
+        'FD(1,0)': stats['fd_1_0'][rows, cols],
+        'FD(0,1)': stats['fd_0_1'][rows, cols],
+        'FD(0,0)': stats['fd_0_0'][rows, cols],
+        'Chi²': stats['chi2_stat'][rows, cols],
+        'p-valor': stats['p_value'][rows, cols]
+    })
+
+def _empty_pairs_table(fisher_min_expected=None):
+    """Tabla de pares sin renglones, con las columnas de _pairs_table (y 'Prueba' si se usa Fisher)"""
+    empty = np.zeros((0, 0))
+    no_pairs = np.zeros(0, dtype=np.int64)
+    stats = dict.fromkeys(
+        ['a', 'b', 'c', 'd', 'conf_1_to_2', 'conf_2_to_1', 'fd_1_1', 'fd_1_0', 'fd_0_1', 'fd_0_0', 'chi2_stat', 'p_value'],
+        empty
+    )
+    frame = _pairs_table(stats, no_pairs, no_pairs, [], [], np.zeros(0), np.zeros(0))
+    return _apply_fisher(frame, fisher_min_expected) if fisher_min_expected is not None else frame
+
+# Métodos de corrección por comparaciones múltiples para todos los pares
+P_VALUE_CORRECTIONS = {'bonferroni': 'Bonferroni', 'bh': 'Benjamini-Hochberg'}
+
+def _apply_fisher(frame, fisher_min_expected):
+    """
+    Reemplaza el p-valor por el de Fisher (vectorizado) en los pares con frecuencias
+    esperadas pequeñas; la columna 'Prueba' indica qué prueba dio el p-valor de cada par.
+    """
+    small = minimum_expected(frame['a'], frame['b'], frame['c'], frame['d']) < fisher_min_expected
+    if small.any():
+        cells = frame.loc[small, ['a', 'b', 'c', 'd']].to_numpy()
+        frame.loc[small, 'p-valor'] = fisher_p_values(*cells.T)
+    frame.insert(frame.columns.get_loc('p-valor') + 1, 'Prueba', np.where(small, 'Exacta de Fisher', 'Chi-cuadrado'))
+    return frame
+
+def _finish_pairs_frame(frame, n_tests, sort_by='Chi²', correction=None, max_p=None,
+                        fisher_min_expected=None):
+    """
+    Completa la tabla de pares filtrados: prueba de Fisher para celdas pequeñas,
+    corrección por comparaciones múltiples (sobre n_tests pruebas), filtro de
+    p-valor y orden. Los p-valores se ordenan de menor a mayor.
+    """
+    if fisher_min_expected is not None:
+        frame = _apply_fisher(frame, fisher_min_expected)
+
+    p_column = 'p-valor'
+    if correction:
+        frame['p-valor ajustado'] = adjust_p_values(frame['p-valor'].to_numpy(), correction, n_tests)
+        p_column = 'p-valor ajustado'
+    if max_p is not None:
+        frame = frame[frame[p_column] <= max_p]
+
+    if sort_by in frame.columns:
+        frame = frame.sort_values(sort_by, ascending=sort_by.startswith('p-valor'), kind='stable')
+    return frame.reset_index(drop=True)
+
+def all_pairs_to_frame(results, min_support=0, min_chi2=0.0, sort_by='Chi²', correction=None,
+                       max_p=None, fisher_min_expected=None):
+    """
+    Convierte los resultados de todos los pares en una tabla ordenable (un renglón por par i < j).
+
+    correction ('bonferroni' o 'bh') agrega la columna 'p-valor ajustado',
+    calculada sobre todos los pares; max_p filtra por ese p-valor (o por el
+    p-valor sin ajustar si no hay corrección).
+    """
+    items = results['items']
+    rows, cols = np.triu_indices(len(items), k=1)
+    n_tests = len(rows)
+
+    a = results['a'][rows, cols]
+    chi2_stat = results['chi2_stat'][rows, cols]
+    mask = (a >= min_support) & (chi2_stat >= min_chi2)
+    rows, cols = rows[mask], cols[mask]
+
+    frame = _pairs_table(results, rows, cols, items, items, results['coverage'], results['coverage'])
+    return _finish_pairs_frame(frame, n_tests, sort_by, correction, max_p, fisher_min_expected)
+
+# Items por lado de cada bloque en el cálculo paralelo de pares
+PAIR_TILE_SIZE = 512
+
+def _pair_source(source):
+    """
+    Prepara el origen de los bloques: matriz CSC (transacciones) o matriz de
+    co-ocurrencia ya calculada (conteos). Devuelve (items, frecuencias, n, función de bloque).
+    """
+    if isinstance(source, dict):
+        cooccurrence = source['cooccurrence']
+        return (list(source['items']), np.asarray(source['item_counts']), source['n'],
+                lambda rows, cols: cooccurrence[rows.start:rows.stop, cols.start:cols.stop])
+
+    matrix = transactions_to_csc(source).astype(np.float64)
+    item_counts = np.asarray(matrix.sum(axis=0)).ravel()
+
+    def tile(rows, cols):
+        # Producto por bloque: SciPy/BLAS liberan el GIL, así que los hilos corren en paralelo
+        block = matrix[:, rows].T @ matrix[:, cols]
+        return block.toarray() if sp.issparse(block) else block
+
+    return list(source.columns), item_counts, len(source), tile
+
+def _evaluate_pair_tile(tile, items, item_counts, n, rows, cols, min_support, min_chi2, min_lift,
+                        yates=False, max_p=None, fisher_min_expected=None):
+    """
+    Calcula las métricas de un bloque de pares y conserva solo los que pasan los filtros.
+
+    La prueba de Fisher se aplica después de los filtros de soporte, chi² y FD
+    (solo a los pares que los pasan) y antes del filtro de p-valor.
+    """
+    cooccurrence = tile(rows, cols)
+    row_counts = item_counts[rows]
+    col_counts = item_counts[cols]
+    stats = calculate_pair_statistics(cooccurrence, row_counts, n, column_counts=col_counts, yates=yates)
+
+    row_index = np.arange(rows.start, rows.stop)[:, None]
+    col_index = np.arange(cols.start, cols.stop)[None, :]
+    mask = (row_index < col_index) & (stats['a'] >= min_support) & (stats['chi2_stat'] >= min_chi2)
+    if min_lift is not None:
+        mask &= stats['fd_1_1'] >= min_lift
+    if max_p is not None and fisher_min_expected is None:
+        mask &= stats['p_value'] <= max_p
+    local_rows, local_cols = np.nonzero(mask)
+
+    coverage_rows = row_counts / n if n > 0 else np.zeros(len(row_counts))
+    coverage_cols = col_counts / n if n > 0 else np.zeros(len(col_counts))
+    frame = _pairs_table(stats, local_rows, local_cols, items[rows], items[cols], coverage_rows, coverage_cols)
+    if fisher_min_expected is not None:
+        frame = _apply_fisher(frame, fisher_min_expected)
+        if max_p is not None:
+            frame = frame[frame['p-valor'] <= max_p].reset_index(drop=True)
+    return frame
+
+def iter_pair_tiles(source, min_support=1, min_chi2=0.0, min_lift=None,
+                    tile_size=PAIR_TILE_SIZE, n_workers=None, yates=False, max_p=None, progress=None,
+                    fisher_min_expected=None):
+    """
+    Evalúa todos los pares por bloques en paralelo y entrega los pares que pasan los filtros.
+
+    source puede ser un DataFrame de transacciones (denso o disperso) o los
+    conteos acumulados. Solo se calculan los bloques de la diagonal hacia
+    arriba (la matriz es simétrica) y cada bloque se descarta tras filtrarlo,
+    así que la memoria depende del tamaño del bloque y no de items × items.
+    Los bloques se reparten en un pool de hilos (NumPy y SciPy liberan el GIL)
+    y los resultados se entregan, como DataFrames, en cuanto cada bloque termina.
+    Los p-valores se calculan por bloque (vectorizados, también los de Fisher
+    si se indica fisher_min_expected); max_p filtra por el p-valor sin ajustar.
+    """
+    yield from _map_pair_tiles(
+        source, _evaluate_pair_tile, tile_size, n_workers,
+        min_support, min_chi2, min_lift, yates, max_p, fisher_min_expected, progress=progress
+    )
+
+def _map_pair_tiles(source, evaluate, tile_size, n_workers, *args, progress=None):
+    """
+    Aplica evaluate(tile, items, item_counts, n, rows, cols, *args) a cada bloque
+    de la diagonal hacia arriba en un pool de hilos y entrega los resultados
+    conforme terminan.
+
+    progress, si se indica, se llama con (bloques terminados, bloques totales)
+    después de cada bloque; si lanza una excepción, los bloques pendientes se
+    cancelan y la excepción se propaga (así se cancela un cálculo en curso).
+    """
+    items, item_counts, n, tile = _pair_source(source)
+    items = np.asarray(items, dtype=object)
+    n_items = len(items)
+    starts = range(0, n_items, tile_size)
+    tiles = [
+        (slice(i, min(i + tile_size, n_items)), slice(j, min(j + tile_size, n_items)))
+        for i in starts for j in starts if j >= i
+    ]
+
+    n_workers = n_workers or os.cpu_count() or 1
+    finished = 0
+
+    def report():
+        nonlocal finished
+        finished += 1
+        if progress is not None:
+            progress(finished, len(tiles))
+
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        # Ventana acotada de bloques en vuelo para limitar la memoria
+        pending = set()
+        try:
+            for rows, cols in tiles:
+                pending.add(executor.submit(evaluate, tile, items, item_counts, n, rows, cols, *args))
+                if len(pending) >= 2 * n_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        report()
+                        yield future.result()
+            for future in as_completed(pending):
+                report()
+                yield future.result()
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+
+def calculate_all_pairs_parallel(source, min_support=1, min_chi2=0.0, min_lift=None,
+                                 tile_size=PAIR_TILE_SIZE, n_workers=None, sort_by='Chi²',
+                                 yates=False, correction=None, max_p=None, fisher_min_expected=None,
+                                 progress=None):
+    """
+    Junta en una tabla ordenada los pares filtrados de iter_pair_tiles.
+
+    La corrección por comparaciones múltiples usa como número de pruebas todos
+    los pares del catálogo, aunque solo se conserven los filtrados (para BH el
+    ajuste resulta conservador).
+    """
+    # Un p-valor ajustado nunca es menor que el original, así que max_p puede
+    # aplicarse ya en los bloques, después de la prueba de Fisher
+    frames = list(iter_pair_tiles(
+        source, min_support, min_chi2, min_lift, tile_size, n_workers, yates, max_p, progress=progress,
+        fisher_min_expected=fisher_min_expected
+    ))
+    non_empty = [frame for frame in frames if not frame.empty]
+    if non_empty:
+        frame = pd.concat(non_empty, ignore_index=True)
+    else:
+        # Sin pares (menos de 2 items): tabla vacía con las mismas columnas
+        frame = frames[0] if frames else _empty_pairs_table(fisher_min_expected)
+    n_items = len(source['items']) if isinstance(source, dict) else len(source.columns)
+    n_tests = n_items * (n_items - 1) // 2
+    return _finish_pairs_frame(frame, n_tests, sort_by, correction, max_p)
+
+# Métricas disponibles para el ranking (columna de la tabla -> matriz de calculate_pair_statistics)
+RANKING_METRICS = {
+    'Chi²': 'chi2_stat',
+    'FD(1,1)': 'fd_1_1',
+    'Confianza 1→2': 'conf_1_to_2',
+    'Confianza 2→1': 'conf_2_to_1'
+}
+
+def _top_pairs_in_tile(tile, items, item_counts, n, rows, cols, k, metrics, min_support, min_coverage, yates):
+    """Candidatos de un bloque: los k mejores pares por métrica que pasan los filtros"""
+    cooccurrence = tile(rows, cols)
+    row_counts = item_counts[rows]
+    col_counts = item_counts[cols]
+    stats = calculate_pair_statistics(cooccurrence, row_counts, n, column_counts=col_counts, yates=yates)
+
+    coverage_rows = row_counts / n if n > 0 else np.zeros(len(row_counts))
+    coverage_cols = col_counts / n if n > 0 else np.zeros(len(col_counts))
+    row_index = np.arange(rows.start, rows.stop)[:, None]
+    col_index = np.arange(cols.start, cols.stop)[None, :]
+    mask = (row_index < col_index) & (stats['a'] >= min_support)
+    mask &= (coverage_rows[:, None] >= min_coverage) & (coverage_cols[None, :] >= min_coverage)
+    local_rows, local_cols = np.nonzero(mask)
+
+    candidates = {}
+    for metric in metrics:
+        values = stats[RANKING_METRICS[metric]][local_rows, local_cols]
+        keep = np.argpartition(-values, k - 1)[:k] if len(values) > k else np.arange(len(values))
+        candidates[metric] = _pairs_table(
+            stats, local_rows[keep], local_cols[keep], items[rows], items[cols], coverage_rows, coverage_cols
+        )
+    return candidates
+
+def rank_top_pairs(source, k=100, metrics=tuple(RANKING_METRICS), min_support=1, min_coverage=0.0,
+                   tile_size=PAIR_TILE_SIZE, n_workers=None, yates=False, progress=None):
+    """
+    Los k pares con mayor valor de cada métrica (Chi², FD(1,1), confianzas).
+
+    Recorre los bloques de iter_pair_tiles y mantiene un heap acotado de k
+    pares por métrica, así que la memoria es O(k) y no O(items²). min_support
+    filtra por el conteo a y min_coverage por la cobertura de ambos items;
+    progress recibe el avance por bloques (como en _map_pair_tiles).
+    Devuelve un diccionario métrica -> DataFrame ordenado de mayor a menor.
+    """
+    k = max(int(k), 1)
+    heaps = {metric: [] for metric in metrics}
+    columns = None
+    counter = 0
+    for candidates in _map_pair_tiles(source, _top_pairs_in_tile, tile_size, n_workers,
+                                      k, metrics, min_support, min_coverage, yates, progress=progress):
+        for metric, frame in candidates.items():
+            columns = list(frame.columns)
+            heap = heaps[metric]
+            for record in frame.to_dict('records'):
+                # counter desempata sin comparar los diccionarios
+                entry = (record[metric], counter, record)
+                counter += 1
+                if len(heap) < k:
+                    heapq.heappush(heap, entry)
+                elif entry[0] > heap[0][0]:
+                    heapq.heapreplace(heap, entry)
+
+    return {
+        metric: pd.DataFrame(
+            [record for _, _, record in sorted(heap, key=lambda entry: (-entry[0], entry[1]))],
+            columns=columns
+        )
+        for metric, heap in heaps.items()
+    }
+
+def _item_tidlists(data):
+    """Lista ordenada de transacciones (filas) donde aparece cada item (formato vertical)"""
+    matrix = transactions_to_csc(data)
+    matrix.sort_indices()
+    return [matrix.indices[matrix.indptr[j]:matrix.indptr[j + 1]] for j in range(matrix.shape[1])]
+
+# Un item que aparece en menos de n / INDEX_ARRAY_RATIO transacciones se guarda como
+# arreglo de posiciones (4 bytes por transacción); si no, como bitmap (n / 8 bytes)
+INDEX_ARRAY_RATIO = 32
+
+def _tids_to_bitmap(tids, n):
+    """Bitmap (palabras uint64) con los bits de las transacciones tids encendidos"""
+    mask = np.zeros(-(-n // 64) * 64, dtype=bool)
+    mask[tids] = True
+    return np.packbits(mask, bitorder='little').view(np.uint64)
+
+def _is_bitmap(posting):
+    return posting.dtype == np.uint64
+
+def _intersect_postings(left, right):
+    """Intersección de dos posting lists (arreglo o bitmap); el resultado es arreglo si alguna lo es"""
+    if _is_bitmap(left) and _is_bitmap(right):
+        return left & right
+    if _is_bitmap(left):
+        left, right = right, left
+    if _is_bitmap(right):
+        # Posiciones del arreglo cuyo bit está encendido en el bitmap
+        bits = right[left >> 6] >> (left & 63).astype(np.uint64)
+        return left[(bits & np.uint64(1)).astype(bool)]
+    return np.intersect1d(left, right, assume_unique=True)
+
+def _posting_support(posting):
+    """Número de transacciones de una posting list"""
+    return int(popcount(posting)) if _is_bitmap(posting) else len(posting)
+
+def build_item_index(data):
+    """
+    Índice invertido item -> transacciones donde aparece (posting lists).
+
+    Como en los bitmaps comprimidos tipo roaring, cada item usa el formato más
+    chico: arreglo ordenado de posiciones (int32) si es poco frecuente o bitmap
+    de palabras uint64 si es frecuente. El soporte de un par o de un itemset es
+    el tamaño de la intersección de sus listas, así que solo se recorren las
+    transacciones de los items consultados y no todas las filas. Devuelve un
+    diccionario con items, positions (item -> columna), postings, item_counts y n.
+    """
+    matrix = transactions_to_csc(data)
+    matrix.eliminate_zeros()
+    matrix.sort_indices()
+    n = matrix.shape[0]
+    postings = []
+    for j in range(matrix.shape[1]):
+        tids = matrix.indices[matrix.indptr[j]:matrix.indptr[j + 1]].astype(np.int32)
+        postings.append(tids if len(tids) * INDEX_ARRAY_RATIO < n else _tids_to_bitmap(tids, n))
+    items = list(data.columns)
+    return {
+        'items': items,
+        'positions': {item: j for j, item in enumerate(items)},
+        'postings': postings,
+        'item_counts': np.diff(matrix.indptr).astype(np.int64),
+        'n': n
+    }
+
+def index_support(index, itemset):
+    """
+    Número de transacciones que contienen todos los items de itemset.
+
+    Intersecta las listas de menor a mayor frecuencia (cada intersección es a
+    lo más del tamaño de la lista más chica) y se detiene si queda vacía.
+    """
+    columns = sorted((index['positions'][item] for item in itemset), key=lambda j: index['item_counts'][j])
+    if not columns:
+        return index['n']
+    posting = index['postings'][columns[0]]
+    for j in columns[1:]:
+        posting = _intersect_postings(posting, index['postings'][j])
+        if not _is_bitmap(posting) and len(posting) == 0:
+            return 0
+    return _posting_support(posting)
+
+def index_pair_counts(index, item1, item2):
+    """Cuenta a, b, c, d de un par intersectando las posting lists del índice"""
+    a = index_support(index, (item1, item2))
+    b = int(index['item_counts'][index['positions'][item1]]) - a
+    c = int(index['item_counts'][index['positions'][item2]]) - a
+    d = index['n'] - a - b - c
+    return a, b, c, d
+
+# Con soporte promedio por encima de esta proporción conviene el formato de bits
+BITSET_DENSITY_THRESHOLD = 1 / 32
+
+def mine_frequent_itemsets(data, min_support=0.01, max_length=None, layout='auto'):
+    """
+    Encuentra los itemsets frecuentes con Eclat (formato vertical).
+
+    Cada item se representa en formato vertical: como lista ordenada de
+    transacciones (layout='tidlist', ideal para catálogos dispersos), como
+    bits empaquetados (layout='bitset', ideal para datos densos, soporte con
+    popcount) o con las posting lists de build_item_index (layout='index',
+    arreglo o bitmap por item). Con 'auto' se elige según la densidad; si data
+    es un índice ya construido se usa directamente. El soporte de un itemset
+    es el tamaño de la intersección de sus items. La búsqueda es en
+    profundidad y solo extiende los itemsets que cumplen el soporte mínimo
+    (propiedad de Apriori).
+
+    min_support es una proporción de las transacciones (0-1).
+    Devuelve un diccionario {tupla de items: conteo}.
+    """
+    if isinstance(data, dict):
+        layout = 'index'
+    elif layout == 'index':
+        data = build_item_index(data)
+    n = data['n'] if layout == 'index' else len(data)
+    min_count = max(1, int(np.ceil(min_support * n)))
+    items = list(data['items'] if layout == 'index' else data.columns)
+
+    if layout == 'auto':
+        density = calculate_density(data)
+        layout = 'bitset' if density >= BITSET_DENSITY_THRESHOLD else 'tidlist'
+
+    if layout == 'index':
+        vertical = data['postings']
+        supports = data['item_counts']
+        intersect = _intersect_postings
+        support_of = _posting_support
+    elif layout == 'bitset':
+        bitsets = pack_transactions(data)
+        vertical = list(bitsets['bits'])
+        supports = bitsets['item_counts']
+        intersect = np.bitwise_and
+        support_of = lambda bits: int(popcount(bits))
+    else:
+        vertical = _item_tidlists(data)
+        supports = [len(tids) for tids in vertical]
+        intersect = lambda left, right: np.intersect1d(left, right, assume_unique=True)
+        support_of = len
+
+    frequent = [(j, vertical[j], supports[j]) for j in range(len(items)) if supports[j] >= min_count]
+    # Procesar primero los items menos frecuentes reduce el tamaño de las intersecciones
+    frequent.sort(key=lambda entry: entry[2])
+
+    itemsets = {}
+    stack = [((), None, frequent)]
+    while stack:
+        prefix, prefix_set, candidates = stack.pop()
+        for position, (j, item_set, item_support) in enumerate(candidates):
+            if prefix:
+                itemset_set = intersect(prefix_set, item_set)
+                support = support_of(itemset_set)
+            else:
+                itemset_set, support = item_set, item_support
+            if support < min_count:
+                continue
+            itemset = prefix + (j,)
+            itemsets[itemset] = support
+            if max_length is None or len(itemset) < max_length:
+                extensions = candidates[position + 1:]
+                if extensions:
+                    stack.append((itemset, itemset_set, extensions))
+
+    return {tuple(sorted(items[j] for j in itemset)): count for itemset, count in itemsets.items()}
+
+def _format_condition(items):
+    """Texto de un lado de la regla: 'Pan=1, Leche=1'"""
+    return ', '.join(f'{item}=1' for item in items)
+
+def generate_itemset_rules(itemsets, n, min_confidence=0.5):
+    """
+    Genera reglas Si (antecedente) Entonces consecuente a partir de los itemsets frecuentes.
+
+    Usa las mismas definiciones que calculate_all_association_rules y
+    calculate_dependency_factors, así que para un par coinciden con la vista
+    de un solo par:
+    - Cobertura = soporte(A ∪ B) / n
+    - Confianza = soporte(A ∪ B) / soporte(A)
+    - FD = P(A∩B) / (P(A) × P(B))
+    """
+    supports = {frozenset(itemset): count for itemset, count in itemsets.items()}
+    rules = []
+    for itemset, count in itemsets.items():
+        if len(itemset) < 2:
+            continue
+        for size in range(1, len(itemset)):
+            for antecedent in combinations(itemset, size):
+                consequent = tuple(item for item in itemset if item not in antecedent)
+                antecedent_count = supports[frozenset(antecedent)]
+                consequent_count = supports[frozenset(consequent)]
+                confidence = count / antecedent_count if antecedent_count > 0 else 0
+                if confidence < min_confidence:
+                    continue
+                denominator = antecedent_count * consequent_count
+                rules.append({
+                    'rule': f'Si ({_format_condition(antecedent)}) Entonces {_format_condition(consequent)}',
+                    'antecedent': antecedent,
+                    'consequent': consequent,
+                    'coverage': count / n if n > 0 else 0,
+                    'confidence': confidence,
+                    'dependency_factor': n * count / denominator if denominator > 0 else 0,
+                    'support': count,
+                    'total': antecedent_count,
+                    'formula': f'({count}/{antecedent_count})'
+                })
+    rules.sort(key=lambda rule: (rule['confidence'], rule['coverage']), reverse=True)
+    return rules
+
+# Filas leídas por bloque en la ingesta de archivos grandes
+INGEST_CHUNK_ROWS = 250_000
+
+def new_count_state(items):
+    """
+    Crea el acumulador de conteos de un dataset: co-ocurrencias (a de cada par),
+    frecuencia de cada item y número de transacciones.
+
+    Con estos conteos se obtienen todas las métricas sin guardar las transacciones.
+    """
+    n_items = len(items)
+    return {
+        'items': list(items),
+        'cooccurrence': np.zeros((n_items, n_items), dtype=np.int64),
+        'item_counts': np.zeros(n_items, dtype=np.int64),
+        'n': 0
+    }
+
+def update_count_state(counts, matrix, sign=1):
+    """
+    Suma (sign=1) o resta (sign=-1) un bloque de transacciones a los conteos.
+
+    matrix es una matriz binaria (NumPy o SciPy) filas × items con las columnas
+    en el mismo orden que counts['items'].
+    """
+    X = sp.csr_matrix(matrix, dtype=np.int64)
+    counts['cooccurrence'] += sign * (X.T @ X).toarray()
+    counts['item_counts'] += sign * np.asarray(X.sum(axis=0)).ravel()
+    counts['n'] += sign * X.shape[0]
+    return counts
+
+def copy_count_state(counts):
+    """Copia independiente de los conteos (para actualizarlos sin afectar el original)"""
+    return {
+        'items': list(counts['items']),
+        'cooccurrence': counts['cooccurrence'].copy(),
+        'item_counts': counts['item_counts'].copy(),
+        'n': counts['n']
+    }
+
+def counts_from_data(data):
+    """Construye los conteos de un DataFrame binario (denso o disperso)"""
+    counts = new_count_state(data.columns)
+    return update_count_state(counts, transactions_to_csc(data))
+
+def compact_dtypes(data):
+    """
+    Guarda un DataFrame binario con el tipo más compacto: uint8 si es denso
+    (en lugar de int64/float64) o Sparse[uint8] si es disperso.
+    """
+    if is_sparse_data(data):
+        sparse_dtype = pd.SparseDtype(np.uint8, 0)
+        if all(dtype == sparse_dtype for dtype in data.dtypes):
+            return data
+        return data.astype(sparse_dtype)
+    if all(dtype == np.uint8 for dtype in data.dtypes):
+        return data
+    return data.astype(np.uint8)
+
+def _row_signatures(matrix):
+    """
+    Firma de cada fila de una matriz CSR con índices ordenados: número de items
+    y dos hashes de 64 bits (suma de un valor aleatorio fijo por item), sin
+    densificar la matriz.
+    """
+    rng = np.random.default_rng(0x5EED)
+    item_keys = rng.integers(0, np.iinfo(np.uint64).max, size=(matrix.shape[1], 2), dtype=np.uint64, endpoint=True)
+    # Sumas por fila con sumas acumuladas (la aritmética de uint64 es módulo 2^64)
+    prefix = np.zeros((matrix.nnz + 1, 2), dtype=np.uint64)
+    np.cumsum(item_keys[matrix.indices], axis=0, out=prefix[1:])
+    hashes = prefix[matrix.indptr[1:]] - prefix[matrix.indptr[:-1]]
+    lengths = np.diff(matrix.indptr).astype(np.uint64)
+    return np.ascontiguousarray(np.column_stack([lengths, hashes])).view(np.dtype((np.void, 24))).ravel()
+
+def _deduplicate_sparse_rows(matrix):
+    """Filas únicas (CSR) y pesos de una matriz CSR binaria, agrupando por firma"""
+    matrix = matrix.tocsr().astype(np.uint8)
+    matrix.sort_indices()
+    _, first, inverse, weights = np.unique(
+        _row_signatures(matrix), return_index=True, return_inverse=True, return_counts=True
+    )
+    unique_rows = matrix[first]
+    # Las firmas solo agrupan; se verifica que cada fila sea igual a la de su grupo
+    for start in range(0, matrix.shape[0], BINARIZE_BLOCK_ROWS):
+        block = slice(start, start + BINARIZE_BLOCK_ROWS)
+        if (matrix[block] != unique_rows[inverse[block]]).nnz:
+            # Colisión de hashes (improbable): agrupación exacta por los índices de cada fila
+            keys = [matrix.indices[matrix.indptr[i]:matrix.indptr[i + 1]].tobytes() for i in range(matrix.shape[0])]
+            positions = {}
+            inverse = np.array([positions.setdefault(key, len(positions)) for key in keys], dtype=np.int64)
+            first = np.full(len(positions), -1, dtype=np.int64)
+            first[inverse[::-1]] = np.arange(len(inverse))[::-1]
+            weights = np.bincount(inverse, minlength=len(positions))
+            unique_rows = matrix[first]
+            break
+    return unique_rows, weights
+
+def deduplicate_transactions(data, block_rows=BINARIZE_BLOCK_ROWS):
+    """
+    Agrupa las transacciones idénticas.
+
+    En datasets densos cada fila se empaqueta en bits (np.packbits, un bit por
+    item) y las filas repetidas se guardan una sola vez con su peso (número de
+    apariciones). En datasets dispersos las filas se agrupan por una firma
+    calculada de los índices CSR y las filas únicas se guardan como CSR, así
+    que nunca se construye un bloque denso filas × items.
+    Devuelve un diccionario con los items, las filas únicas ('packed' o 'rows'
+    si es disperso), los pesos y n (total de transacciones).
+    """
+    if is_sparse_data(data):
+        unique_rows, weights = _deduplicate_sparse_rows(transactions_to_csc(data))
+        return {
+            'items': list(data.columns),
+            'rows': unique_rows,
+            'weights': weights.astype(np.int64),
+            'n': len(data)
+        }
+
+    n_items = len(data.columns)
+    blocks = []
+    for start in range(0, len(data), block_rows):
+        block = data.iloc[start:start + block_rows].to_numpy() == 1
+        blocks.append(np.packbits(block, axis=1))
+    width = (n_items + 7) // 8
+    packed = np.concatenate(blocks) if blocks else np.zeros((0, width), dtype=np.uint8)
+    # Cada fila empaquetada se compara como un solo valor de `width` bytes
+    row_keys = np.ascontiguousarray(packed).view(np.dtype((np.void, width))).ravel()
+    unique_keys, weights = np.unique(row_keys, return_counts=True)
+    return {
+        'items': list(data.columns),
+        'packed': unique_keys.view(np.uint8).reshape(-1, width),
+        'weights': weights.astype(np.int64),
+        'n': len(data)
+    }
+
+def compact_to_matrix(compact):
+    """Filas únicas de deduplicate_transactions: matriz uint8 (únicas × items), o CSR si el dataset es disperso"""
+    if 'rows' in compact:
+        return compact['rows']
+    return np.unpackbits(compact['packed'], axis=1, count=len(compact['items']))
+
+def counts_from_compact(compact):
+    """Conteos de co-ocurrencia a partir de las filas únicas y sus pesos"""
+    weights = compact['weights'].astype(np.float64)
+    counts = new_count_state(compact['items'])
+    if 'rows' in compact:
+        unique = compact['rows'].astype(np.float64)
+        counts['cooccurrence'] = np.rint((unique.T @ unique.multiply(weights[:, None]).tocsr()).toarray()).astype(np.int64)
+        counts['item_counts'] = np.rint(unique.T @ weights).astype(np.int64)
+    else:
+        unique = compact_to_matrix(compact).astype(np.float64)
+        counts['cooccurrence'] = np.rint((unique * weights[:, None]).T @ unique).astype(np.int64)
+        counts['item_counts'] = np.rint(weights @ unique).astype(np.int64)
+    counts['n'] = int(compact['n'])
+    return counts
+
+def _rows_matrix(rows, items):
+    """Matriz binaria CSR de un bloque de filas, con las columnas en el orden de items"""
+    if rows is None or len(rows) == 0:
+        return None
+    if is_sparse_data(rows):
+        return transactions_to_csc(rows[items]).tocsr()
+    return sp.csr_matrix(rows[items].to_numpy(dtype=np.uint8))
+
+def apply_transaction_delta(counts, added=None, removed=None):
+    """
+    Actualiza los conteos con las filas agregadas y eliminadas (DataFrames con los mismos items).
+
+    El costo es proporcional al tamaño del cambio y no al historial completo.
+    Una edición se expresa como eliminar la versión anterior de las filas y
+    agregar la nueva.
+    """
+    for rows, sign in ((removed, -1), (added, 1)):
+        matrix = _rows_matrix(rows, counts['items'])
+        if matrix is not None:
+            update_count_state(counts, matrix, sign)
+    return counts
+
+def append_transactions(data, counts, new_rows):
+    """Agrega transacciones al dataset y a sus conteos sin recalcular el historial"""
+    new_rows = new_rows[list(data.columns)]
+    if is_sparse_data(data):
+        new_rows = to_sparse_transactions(new_rows)
+    else:
+        new_rows = new_rows.astype(data.dtypes.to_dict())
+    combined = pd.concat([data, new_rows], ignore_index=True)
+    if counts is not None:
+        apply_transaction_delta(counts, added=new_rows)
+    return combined, counts
+
+def remove_transactions(data, counts, index):
+    """Elimina transacciones (por etiqueta de fila) del dataset y de sus conteos"""
+    removed = data.loc[index]
+    if counts is not None:
+        apply_transaction_delta(counts, removed=removed)
+    return data.drop(index=index), counts
+
+def _rows_at(data, matrix, positions):
+    """Filas de data en esas posiciones: CSR si el dataset es disperso (matrix), arreglo uint8 si es denso"""
+    if matrix is not None:
+        return matrix[positions]
+    return data.iloc[positions].to_numpy(dtype=np.uint8)
+
+def _changed_rows(old_rows, new_rows):
+    """Posiciones (dentro del bloque) de las filas que difieren entre dos bloques alineados"""
+    if not sp.issparse(old_rows) and not sp.issparse(new_rows):
+        return np.flatnonzero((old_rows != new_rows).any(axis=1))
+    difference = sp.csr_matrix(old_rows) != sp.csr_matrix(new_rows)
+    return np.flatnonzero(np.diff(difference.indptr))
+
+def diff_transactions(old, new, block_rows=BINARIZE_BLOCK_ROWS):
+    """
+    Compara dos versiones de un dataset con los mismos items (alineadas por índice).
+
+    Devuelve (agregadas, eliminadas): las filas nuevas o editadas en su versión
+    nueva y las filas eliminadas o editadas en su versión anterior. Las filas
+    comunes se comparan por bloques sobre las matrices originales (CSR si el
+    dataset es disperso), sin convertir ninguna versión a un DataFrame denso;
+    solo las filas que cambiaron se devuelven.
+    """
+    new = new[list(old.columns)]
+    old_matrix = transactions_to_csc(old).tocsr() if is_sparse_data(old) else None
+    new_matrix = transactions_to_csc(new).tocsr() if is_sparse_data(new) else None
+    common = old.index.intersection(new.index)
+    old_positions = old.index.get_indexer(common)
+    new_positions = new.index.get_indexer(common)
+
+    changed = [np.zeros(0, dtype=np.int64)]
+    for start in range(0, len(common), block_rows):
+        block = slice(start, start + block_rows)
+        changed.append(start + _changed_rows(
+            _rows_at(old, old_matrix, old_positions[block]), _rows_at(new, new_matrix, new_positions[block])
+        ))
+    changed = common[np.concatenate(changed)]
+    added = new.loc[new.index.difference(old.index).union(changed)]
+    removed = old.loc[old.index.difference(new.index).union(changed)]
+    return added, removed
+
+def update_counts_for_new_version(counts, old, new):
+    """Lleva los conteos de la versión old del dataset a la versión new aplicando solo las diferencias"""
+    if counts is None:
+        return None
+    if old is None or list(old.columns) != list(new.columns):
+        return counts_from_data(new)
+    added, removed = diff_transactions(old, new)
+    return apply_transaction_delta(counts, added=added, removed=removed)
+
+def calculate_all_pairs_from_counts(counts, yates=False, progress=None, block_rows=PAIR_TILE_SIZE):
+    """
+    Métricas de todos los pares a partir de los conteos acumulados.
+
+    Las filas de la matriz de co-ocurrencia se evalúan por bloques de
+    block_rows items; después de cada bloque se llama progress(hechos, total),
+    que puede lanzar una excepción para cancelar el cálculo.
+    """
+    item_counts = np.asarray(counts['item_counts'], dtype=np.float64)
+    n_items = len(item_counts)
+    starts = range(0, n_items, block_rows)
+    results = None
+    for done, start in enumerate(starts, 1):
+        rows = slice(start, min(start + block_rows, n_items))
+        block = calculate_pair_statistics(
+            counts['cooccurrence'][rows], item_counts[rows], counts['n'], column_counts=item_counts, yates=yates
+        )
+        if results is None:
+            results = {key: np.empty((n_items, n_items)) for key, value in block.items() if np.ndim(value) == 2}
+        for key, matrix in results.items():
+            matrix[rows] = block[key]
+        if progress is not None:
+            progress(done, len(starts))
+
+    if results is None:
+        results = calculate_pair_statistics(counts['cooccurrence'], item_counts, counts['n'], yates=yates)
+    n = int(counts['n'])
+    results.update(
+        n=n, item_counts=item_counts,
+        coverage=item_counts / n if n > 0 else np.zeros_like(item_counts)
+    )
+    results['items'] = list(counts['items'])
+    return results
+
+def pair_counts_from_state(counts, item1, item2):
+    """Obtiene a, b, c, d de un par directamente de los conteos (O(1))"""
+    i = counts['items'].index(item1)
+    j = counts['items'].index(item2)
+    a = int(counts['cooccurrence'][i, j])
+    b = int(counts['item_counts'][i]) - a
+    c = int(counts['item_counts'][j]) - a
+    d = int(counts['n']) - a - b - c
+    return a, b, c, d
+
+def calculate_metrics_from_counts(counts, item1, item2, alphas=DEFAULT_ALPHAS, yates=False,
+                                  fisher_min_expected=None):
+    """Calcula las métricas de un par usando los conteos acumulados en lugar de las transacciones"""
+    contingency = build_contingency_table(*pair_counts_from_state(counts, item1, item2))
+    return metrics_from_contingency(contingency, item1, item2, alphas, yates, fisher_min_expected)
+
+def calculate_metrics_from_index(index, item1, item2, alphas=DEFAULT_ALPHAS, yates=False,
+                                 fisher_min_expected=None):
+    """Calcula las métricas de un par intersectando las posting lists del índice invertido"""
+    contingency = build_contingency_table(*index_pair_counts(index, item1, item2))
+    return metrics_from_contingency(contingency, item1, item2, alphas, yates, fisher_min_expected)
+
+def _file_format(path):
+    """Detecta el formato de un archivo por su extensión"""
+    extension = os.path.splitext(str(path))[1].lower()
+    if extension in ('.csv', '.txt'):
+        return 'csv'
+    if extension in ('.parquet', '.pq'):
+        return 'parquet'
+    if extension in ('.arrow', '.feather', '.ipc'):
+        return 'arrow'
+    if extension in ('.xlsx', '.xls'):
+        return 'excel'
+    if extension == NATIVE_EXTENSION:
+        return 'native'
+    raise ValueError(f"Formato no soportado: {extension} (usa CSV, Parquet, Arrow IPC, Excel o {NATIVE_EXTENSION})")
+
+def iter_file_chunks(path, chunk_rows=INGEST_CHUNK_ROWS, columns=None):
+    """
+    Lee un archivo CSV, Parquet o Arrow IPC por bloques de filas (DataFrames).
+
+    Parquet se lee por lotes de sus row groups, Arrow IPC por record batches y
+    el formato nativo por bloques de su matriz mapeada en memoria, así que
+    nunca se carga el archivo completo en memoria. Excel no se puede leer por
+    partes y se entrega como un solo bloque.
+    """
+    file_format = _file_format(path)
+    if file_format == 'native':
+        native = open_native_dataset(path)
+        for start in range(0, native['n'], chunk_rows):
+            frame = pd.DataFrame(_native_block(native, start, start + chunk_rows), columns=native['items'])
+            yield frame[columns] if columns is not None else frame
+    elif file_format == 'csv':
+        yield from pd.read_csv(path, chunksize=chunk_rows, usecols=columns)
+    elif file_format == 'excel':
+        yield pd.read_excel(path, usecols=columns)
+    elif file_format == 'parquet':
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+        with pa.memory_map(str(path), 'r') as source:
+            try:
+                reader = ipc.open_file(source)
+                batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+            except pa.ArrowInvalid:
+                source.seek(0)
+                batches = ipc.open_stream(source)
+            for batch in batches:
+                frame = batch.to_pandas()
+                yield frame[columns] if columns is not None else frame
+
+def ingest_file_counts(path, chunk_rows=INGEST_CHUNK_ROWS, columns=None, progress=None, counts=None):
+    """
+    Ingresa un archivo grande por bloques y acumula los conteos de co-ocurrencia.
+
+    Cada bloque se binariza (binarize_data) y se suma al acumulador, por lo
+    que el dataset completo nunca se materializa. progress, si se indica, se
+    llama con el número de filas procesadas después de cada bloque. Si se
+    pasan conteos existentes, el archivo se suma a ellos (carga incremental).
+    Los archivos en formato nativo ya traen sus conteos y no se recorren.
+    """
+    if counts is None and columns is None and _file_format(path) == 'native':
+        counts = copy_count_state(open_native_dataset(path)['counts'])
+        if progress is not None:
+            progress(counts['n'])
+        return counts
+    for chunk in iter_file_chunks(path, chunk_rows, columns):
+        if counts is None:
+            counts = new_count_state(chunk.columns)
+        else:
+            extend_count_state(counts, chunk.columns)
+        chunk = chunk.reindex(columns=counts['items'], fill_value=0)
+        binary, _ = binarize_data(chunk)
+        update_count_state(counts, binary.to_numpy())
+        if progress is not None:
+            progress(counts['n'])
+    if counts is None:
+        raise ValueError("El archivo no contiene datos")
+    return counts
+
+def extend_count_state(counts, new_items):
+    """Agrega items nuevos (con conteos en cero) al acumulador de conteos"""
+    known = set(counts['items'])
+    new_items = [item for item in dict.fromkeys(new_items) if item not in known]
+    if not new_items:
+        return counts
+    n_old = len(counts['items'])
+    n_new = n_old + len(new_items)
+    cooccurrence = np.zeros((n_new, n_new), dtype=np.int64)
+    cooccurrence[:n_old, :n_old] = counts['cooccurrence']
+    counts['cooccurrence'] = cooccurrence
+    counts['item_counts'] = np.concatenate([counts['item_counts'], np.zeros(len(new_items), dtype=np.int64)])
+    counts['items'] = counts['items'] + list(new_items)
+    return counts
+
+def _long_to_matrix(frame, transaction_col, item_col, items):
+    """
+    Convierte filas (transacción, item) en una matriz CSR transacciones × items
+    usando factorización por hash, sin pasar por un DataFrame ancho denso.
+
+    items es el vocabulario (pd.Index) que define el orden de las columnas.
+    Los pares repetidos dentro de una transacción cuentan una sola vez.
+    """
+    frame = frame[[transaction_col, item_col]].dropna()
+    transaction_codes, _ = pd.factorize(frame[transaction_col], sort=False)
+    item_codes = items.get_indexer(frame[item_col])
+    matrix = sp.csr_matrix(
+        (np.ones(len(frame), dtype=np.uint8), (transaction_codes, item_codes)),
+        shape=(transaction_codes.max() + 1 if len(frame) else 0, len(items))
+    )
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix
+
+def long_to_sparse_transactions(frame, transaction_col, item_col):
+    """Convierte datos en formato largo (transacción, item) al formato disperso de transacciones"""
+    items = pd.Index(pd.unique(frame[item_col].dropna()))
+    matrix = _long_to_matrix(frame, transaction_col, item_col, items)
+    return sparse_transactions_from_matrix(matrix, items.astype(str))
+
+def update_counts_from_long(counts, frame, transaction_col, item_col):
+    """Suma a los conteos un bloque de filas (transacción, item); agrega los items nuevos que aparezcan"""
+    frame = frame[[transaction_col, item_col]].dropna()
+    new_items = pd.unique(frame[item_col])
+    if counts is None:
+        counts = new_count_state([])
+    extend_count_state(counts, [str(item) for item in new_items])
+    frame = frame.assign(**{item_col: frame[item_col].astype(str)})
+    matrix = _long_to_matrix(frame, transaction_col, item_col, pd.Index(counts['items']))
+    return update_count_state(counts, matrix)
+
+# Particiones (archivos temporales) al agrupar por transacción un archivo largo desordenado
+LONG_GROUP_PARTITIONS = 64
+
+def _transaction_keys(ids):
+    """Hash de 64 bits de los identificadores de transacción (como texto, para que 5 y '5' coincidan)"""
+    return pd.util.hash_array(ids.astype(str).to_numpy(dtype=object))
+
+def _seen_before(seen, keys):
+    """Indica si alguna de las claves ya está en seen (lista de arreglos ordenados)"""
+    for run in seen:
+        positions = np.minimum(np.searchsorted(run, keys), len(run) - 1)
+        if (run[positions] == keys).any():
+            return True
+    return False
+
+def _remember(seen, keys):
+    """Agrega claves a seen y mezcla los arreglos de tamaño parecido (O(log n) arreglos)"""
+    if len(keys) == 0:
+        return
+    seen.append(np.sort(keys))
+    while len(seen) > 1 and len(seen[-2]) <= 2 * len(seen[-1]):
+        last = seen.pop()
+        seen[-1] = np.sort(np.concatenate([seen[-1], last]))
+
+def _ingest_contiguous_long(path, transaction_col, item_col, chunk_rows, progress, counts):
+    """
+    Ingresa un archivo largo cuyas transacciones tienen sus filas contiguas.
+
+    Las filas de la última transacción de cada bloque se guardan y se procesan
+    con el bloque siguiente. Se recuerdan los hashes de las transacciones ya
+    contadas; si una transacción vuelve a aparecer (filas no contiguas) se
+    devuelve None para que el archivo se agrupe por transacción.
+    """
+    pending = None
+    seen = []
+    rows_read = 0
+    for chunk in iter_file_chunks(path, chunk_rows, columns=[transaction_col, item_col]):
+        rows_read += len(chunk)
+        chunk = chunk.dropna(subset=[transaction_col, item_col])
+        if pending is not None:
+            chunk = pd.concat([pending, chunk], ignore_index=True)
+        if len(chunk) == 0:
+            continue
+        keys = _transaction_keys(chunk[transaction_col])
+        run_keys = keys[np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])]
+        if len(np.unique(run_keys)) < len(run_keys) or _seen_before(seen, run_keys):
+            return None
+        is_last = keys == keys[-1]
+        pending = chunk[is_last]
+        _remember(seen, run_keys[:-1])
+        counts = update_counts_from_long(counts, chunk[~is_last], transaction_col, item_col)
+        if progress is not None:
+            progress(rows_read)
+    if pending is not None and len(pending) > 0:
+        counts = update_counts_from_long(counts, pending, transaction_col, item_col)
+    return counts
+
+def _ingest_grouped_long(path, transaction_col, item_col, chunk_rows, progress, counts, partitions=LONG_GROUP_PARTITIONS):
+    """
+    Ingresa un archivo largo en cualquier orden agrupando por transacción en disco.
+
+    Primera pasada: cada fila se escribe en una de `partitions` particiones
+    temporales según el hash de su transacción, así que todas las filas de una
+    transacción quedan en la misma partición. Segunda pasada: cada partición se
+    carga completa y se suma a los conteos. La memoria crece con el tamaño de
+    una partición, no con el del archivo.
+    """
+    rows_read = 0
+    with tempfile.TemporaryDirectory() as directory:
+        paths = [os.path.join(directory, f'{part}.pkl') for part in range(partitions)]
+        for chunk in iter_file_chunks(path, chunk_rows, columns=[transaction_col, item_col]):
+            rows_read += len(chunk)
+            chunk = chunk.dropna(subset=[transaction_col, item_col])
+            chunk = chunk.assign(**{transaction_col: chunk[transaction_col].astype(str)})
+            parts = _transaction_keys(chunk[transaction_col]) % np.uint64(partitions)
+            for part, piece in chunk.groupby(parts):
+                with open(paths[int(part)], 'ab') as f:
+                    pickle.dump(piece, f, protocol=pickle.HIGHEST_PROTOCOL)
+            if progress is not None:
+                progress(rows_read)
+        for part_path in paths:
+            if not os.path.exists(part_path):
+                continue
+            pieces = []
+            with open(part_path, 'rb') as f:
+                while True:
+                    try:
+                        pieces.append(pickle.load(f))
+                    except EOFError:
+                        break
+            counts = update_counts_from_long(counts, pd.concat(pieces, ignore_index=True), transaction_col, item_col)
+    return counts
+
+def ingest_long_file_counts(path, transaction_col, item_col, chunk_rows=INGEST_CHUNK_ROWS, progress=None, counts=None):
+    """
+    Ingresa un archivo en formato largo (transacción, item) por bloques y acumula los conteos.
+
+    Si las filas de cada transacción están contiguas (exportación ordenada por
+    ticket) el archivo se lee una sola vez. Si una transacción aparece en filas
+    separadas, el archivo se vuelve a leer agrupando por transacción en
+    particiones temporales, así que nunca se cuenta dos veces una transacción.
+    Si se pasan conteos existentes, el archivo se suma a ellos (carga incremental).
+    """
+    base = copy_count_state(counts) if counts is not None else None
+    result = _ingest_contiguous_long(path, transaction_col, item_col, chunk_rows, progress, base)
+    if result is None:
+        result = _ingest_grouped_long(path, transaction_col, item_col, chunk_rows, progress, counts)
+    if result is None or result['n'] == 0:
+        raise ValueError("El archivo no contiene datos")
+    return result
+
+def load_transactions(path, transaction_col=None, item_col=None, chunk_rows=INGEST_CHUNK_ROWS):
+    """
+    Carga las transacciones completas de un archivo (formato ancho o largo).
+
+    Los bloques se binarizan y se guardan como CSR, así que la memoria crece
+    con el número de 1s. Si la densidad es baja el resultado queda en formato
+    disperso (maybe_sparsify). Los archivos en formato nativo se abren con
+    mmap (native_to_frame).
+    """
+    if _file_format(path) == 'native':
+        return native_to_frame(open_native_dataset(path))
+    if transaction_col is not None and item_col is not None:
+        frames = list(iter_file_chunks(path, chunk_rows, columns=[transaction_col, item_col]))
+        return long_to_sparse_transactions(pd.concat(frames, ignore_index=True), transaction_col, item_col)
+
+    items = None
+    blocks = []
+    for chunk in iter_file_chunks(path, chunk_rows):
+        if items is None:
+            items = list(chunk.columns)
+        binary, _ = binarize_data(chunk.reindex(columns=items, fill_value=0))
+        blocks.append(sp.csr_matrix(binary.to_numpy()))
+    if items is None:
+        raise ValueError("El archivo no contiene datos")
+    data = sparse_transactions_from_matrix(sp.vstack(blocks, format='csc'), items)
+    return data if calculate_density(data) < SPARSE_DENSITY_THRESHOLD else data.sparse.to_dense()
+
+NATIVE_EXTENSION = '.chsq'
+NATIVE_MAGIC = b'CHSQ'
+NATIVE_VERSION = 1
+# Alineación (bytes) de las secciones binarias del formato nativo
+NATIVE_ALIGNMENT = 64
+# Prefijo del archivo: magic, versión y longitud del encabezado JSON
+_NATIVE_PREFIX = struct.Struct('<4sHI')
+# Bytes de matriz por bloque al escribir o leer el formato nativo
+NATIVE_BLOCK_BYTES = 64 * 1024 * 1024
+
+def _align(offset):
+    return -(-offset // NATIVE_ALIGNMENT) * NATIVE_ALIGNMENT
+
+def _native_block_rows(n_items):
+    """Filas por bloque para que un bloque denso (filas × items) ocupe a lo más NATIVE_BLOCK_BYTES"""
+    return max(1, NATIVE_BLOCK_BYTES // max(n_items, 1))
+
+def _pack_csr_rows(block, row_bytes):
+    """Filas de una matriz CSR binaria empaquetadas en bits (igual que np.packbits por filas), sin densificarlas"""
+    ones = block.data == 1
+    rows = np.repeat(np.arange(block.shape[0]), np.diff(block.indptr))[ones]
+    cols = block.indices[ones]
+    packed = np.zeros((block.shape[0], row_bytes), dtype=np.uint8)
+    np.bitwise_or.at(packed, (rows, cols >> 3), np.right_shift(0x80, cols & 7).astype(np.uint8))
+    return packed
+
+def write_native_dataset(data, path, layout='auto', fingerprint=None, metadata=None, block_rows=None):
+    """
+    Guarda las transacciones en el formato nativo (.chsq) para reabrirlas con mmap.
+
+    El archivo tiene un encabezado JSON pequeño (items, número de
+    transacciones, tipo de matriz y, opcionalmente, la huella del contenido y
+    un diccionario metadata serializable como JSON),
+    la matriz de transacciones (una fila por transacción: un byte por item con
+    layout='uint8' o un bit por item con layout='bits') y al final los conteos
+    por item y la matriz de co-ocurrencia. Con layout='auto' los datos
+    dispersos se guardan en bits, empaquetados directamente desde los índices
+    CSR. Los bloques de filas (block_rows, por defecto según el número de
+    items) acotan la memoria de la escritura. Se escribe en un archivo temporal
+    que luego se renombra, así que nunca queda a medias. Devuelve los conteos.
+    """
+    if layout == 'auto':
+        layout = 'bits' if is_sparse_data(data) else 'uint8'
+    if layout not in ('uint8', 'bits'):
+        raise ValueError(f"Tipo de matriz no soportado: {layout}")
+    items = [str(item) for item in data.columns]
+    if items != list(data.columns):
+        # La huella depende de los nombres de los items; al convertirlos a texto deja de ser válida
+        fingerprint = None
+    n = len(data)
+    row_bytes = len(items) if layout == 'uint8' else (len(items) + 7) // 8
+    header = json.dumps({
+        'version': NATIVE_VERSION, 'items': items, 'n': n, 'layout': layout,
+        'row_bytes': row_bytes, 'fingerprint': fingerprint, 'metadata': metadata or {}
+    }, ensure_ascii=False).encode('utf-8')
+    matrix_offset = _align(_NATIVE_PREFIX.size + len(header))
+    counts_offset = _align(matrix_offset + n * row_bytes)
+
+    counts = new_count_state(items)
+    rows_matrix = transactions_to_csc(data).tocsr() if is_sparse_data(data) else None
+    block_rows = block_rows or _native_block_rows(len(items))
+    directory = os.path.dirname(os.path.abspath(str(path)))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(_NATIVE_PREFIX.pack(NATIVE_MAGIC, NATIVE_VERSION, len(header)))
+            file.write(header)
+            file.seek(matrix_offset)
+            for start in range(0, n, block_rows):
+                if rows_matrix is not None:
+                    block = rows_matrix[start:start + block_rows]
+                    update_count_state(counts, block)
+                    if layout == 'bits':
+                        block = _pack_csr_rows(block, row_bytes)
+                    else:
+                        block = (block.toarray() == 1).astype(np.uint8)
+                else:
+                    block = data.iloc[start:start + block_rows].to_numpy() == 1
+                    update_count_state(counts, block)
+                    block = block.astype(np.uint8) if layout == 'uint8' else np.packbits(block, axis=1)
+                file.write(np.ascontiguousarray(block).tobytes())
+            file.seek(counts_offset)
+            file.write(counts['item_counts'].astype('<i8').tobytes())
+            file.write(counts['cooccurrence'].astype('<i8').tobytes())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return counts
+
+def open_native_dataset(path):
+    """
+    Abre un archivo en formato nativo sin leerlo completo.
+
+    La matriz y los conteos son vistas de solo lectura mapeadas en memoria
+    (np.memmap): abrir el archivo tarda milisegundos y varios procesos que lo
+    abren comparten las mismas páginas del caché del sistema operativo.
+    Devuelve un diccionario con items, n, layout, fingerprint, metadata, matrix y counts.
+    """
+    with open(path, 'rb') as file:
+        magic, version, header_length = _NATIVE_PREFIX.unpack(file.read(_NATIVE_PREFIX.size))
+        if magic != NATIVE_MAGIC:
+            raise ValueError(f"{path} no es un archivo {NATIVE_EXTENSION}")
+        if version > NATIVE_VERSION:
+            raise ValueError(f"Versión {version} del formato nativo no soportada")
+        header = json.loads(file.read(header_length).decode('utf-8'))
+
+    items, n, row_bytes = header['items'], header['n'], header['row_bytes']
+    n_items = len(items)
+    matrix_offset = _align(_NATIVE_PREFIX.size + header_length)
+    counts_offset = _align(matrix_offset + n * row_bytes)
+    if n > 0:
+        matrix = np.memmap(path, dtype=np.uint8, mode='r', offset=matrix_offset, shape=(n, row_bytes))
+    else:
+        matrix = np.zeros((0, row_bytes), dtype=np.uint8)
+    item_counts = np.memmap(path, dtype='<i8', mode='r', offset=counts_offset, shape=(n_items,))
+    cooccurrence = np.memmap(
+        path, dtype='<i8', mode='r', offset=counts_offset + 8 * n_items, shape=(n_items, n_items)
+    )
+    return {
+        'items': items,
+        'n': n,
+        'layout': header['layout'],
+        'fingerprint': header.get('fingerprint'),
+        'metadata': header.get('metadata') or {},
+        'matrix': matrix,
+        'counts': {'items': list(items), 'cooccurrence': cooccurrence, 'item_counts': item_counts, 'n': n}
+    }
+
+def _native_block(native, start, stop):
+    """Filas [start, stop) de un archivo nativo como matriz uint8 (filas × items)"""
+    block = native['matrix'][start:stop]
+    if native['layout'] == 'bits':
+        return np.unpackbits(block, axis=1, count=len(native['items']))
+    return np.asarray(block)
+
+def _native_csr_block(native, start, stop):
+    """
+    Filas [start, stop) de un archivo nativo en bits como matriz CSR.
+
+    Solo se desempaquetan los bytes distintos de cero, así que la memoria
+    depende de los unos del bloque y no de filas × items.
+    """
+    block = native['matrix'][start:stop]
+    rows, byte_cols = np.nonzero(block)
+    bits = np.unpackbits(np.asarray(block[rows, byte_cols])[:, None], axis=1)
+    bit_rows, bit_positions = np.nonzero(bits)
+    cols = byte_cols[bit_rows] * 8 + bit_positions
+    return sp.csr_matrix(
+        (np.ones(len(cols), dtype=np.uint8), (rows[bit_rows], cols)), shape=(block.shape[0], len(native['items']))
+    )
+
+def native_to_frame(native, block_rows=None):
+    """
+    DataFrame de transacciones de un archivo abierto con open_native_dataset.
+
+    Con layout='uint8' el DataFrame usa directamente la matriz mapeada (sin
+    copiarla); con layout='bits' se pasa a CSR por bloques (sin desempaquetar
+    filas × items) y, si la densidad es baja, queda en formato disperso.
+    """
+    items = native['items']
+    if native['layout'] == 'uint8':
+        return pd.DataFrame(native['matrix'], columns=items, copy=False)
+    block_rows = block_rows or _native_block_rows(native['matrix'].shape[1])
+    blocks = [_native_csr_block(native, start, start + block_rows)
+              for start in range(0, native['n'], block_rows)]
+    matrix = sp.vstack(blocks, format='csc') if blocks else sp.csc_matrix((0, len(items)), dtype=np.uint8)
+    cells = native['n'] * len(items)
+    if cells == 0 or native['counts']['item_counts'].sum() / cells < SPARSE_DENSITY_THRESHOLD:
+        return sparse_transactions_from_matrix(matrix, items)
+    return pd.DataFrame(matrix.toarray(), columns=items)
+
+def itemsets_to_frame(itemsets, n):
+    """Tabla de itemsets frecuentes ordenada por soporte"""
+    frame = pd.DataFrame({
+        'itemset': [', '.join(map(str, itemset)) for itemset in itemsets],
+        'size': [len(itemset) for itemset in itemsets],
+        'support_count': list(itemsets.values()),
+        'support': [count / n if n > 0 else 0 for count in itemsets.values()]
+    })
+    return frame.sort_values('support_count', ascending=False, kind='stable').reset_index(drop=True)
+
+def rules_to_frame(rules):
+    """Tabla de reglas (de generate_itemset_rules) lista para exportar"""
+    frame = pd.DataFrame(rules, columns=[
+        'rule', 'antecedent', 'consequent', 'coverage', 'confidence',
+        'dependency_factor', 'support', 'total', 'formula'
+    ])
+    frame['antecedent'] = frame['antecedent'].map(lambda items: ', '.join(map(str, items)))
+    frame['consequent'] = frame['consequent'].map(lambda items: ', '.join(map(str, items)))
+    return frame
+
+def item_frequencies(data):
+    """Número de transacciones en las que aparece cada item (acepta DataFrame o conteos acumulados)"""
+    if isinstance(data, dict):
+        return pd.Series(data['item_counts'], index=data['items'])
+    if is_sparse_data(data):
+        counts = np.asarray(transactions_to_csc(data).sum(axis=0)).ravel()
+        return pd.Series(counts, index=data.columns)
+    return data.sum()
@@ -0,0 +1,360 @@
+"""
+Gráficos de Plotly de la interfaz.
+
+Vive fuera de app.py para que las funciones se definan una sola vez por
+proceso y no en cada rerun; plotly.express y scipy.stats se importan solo
+cuando se dibuja la primera figura que los necesita.
+"""
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+
+from association_engine import item_frequencies
+from instrumentation import timed
+
+# Transacciones a partir de las cuales el gráfico de dispersión pasa a la vista agregada
+SCATTER_MAX_POINTS = 50_000
+# Puntos totales de las cuatro nubes de la vista agregada
+SCATTER_BLOB_POINTS = 2_000
+
+@timed('Figura: tabla de contingencia')
+def create_contingency_heatmap(contingency_table, item1, item2):
+    """Crea heatmap de la tabla de contingencia"""
+    try:
+        data_matrix = contingency_table.iloc[:-1, :-1].values
+        
+        fig = go.Figure(data=go.Heatmap(
+            z=data_matrix,
+            x=[f'{item2}=1', f'{item2}=0'],
+            y=[f'{item1}=1', f'{item1}=0'],
+            colorscale='Blues',
+            text=data_matrix,
+            texttemplate="%{text}",
+            textfont={"size": 20},
+            hoverongaps=False,
+            showscale=True
+        ))
+        
+        fig.update_layout(
+            title=f'Tabla de Contingencia: {item1} vs {item2}',
+            xaxis_title=item2,
+            yaxis_title=item1,
+            font=dict(size=14),
+            height=400,
+            width=500,
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)'
+        )
+        
+        return fig
+    
+    except Exception as e:
+        st.error(f"Error creando heatmap: {str(e)}")
+        return go.Figure()
+
+@timed('Figura: métricas')
+def create_metrics_chart(metrics, item1, item2):
+    """Crea gráfico de métricas"""
+    try:
+        categories = [
+            f'Confianza<br>{item1}→{item2}',
+            f'Confianza<br>{item2}→{item1}',
+            f'Cobertura<br>{item1}',
+            f'Cobertura<br>{item2}'
+        ]
+        
+        values = [
+            metrics['conf_1_to_2'],
+            metrics['conf_2_to_1'],
+            metrics['cov_1'],
+            metrics['cov_2']
+        ]
+        
+        colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4']
+        
+        fig = go.Figure(data=[
+            go.Bar(
+                x=categories,
+                y=values,
+                marker_color=colors,
+                text=[f'{v:.3f}' for v in values],
+                textposition='auto',
+            )
+        ])
+        
+        fig.update_layout(
+            title='Métricas de Asociación',
+            yaxis_title='Valor',
+            yaxis=dict(range=[0, 1]),
+            font=dict(size=12),
+            height=400,
+            showlegend=False,
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)'
+        )
+        
+        return fig
+    
+    except Exception as e:
+        st.error(f"Error creando gráfico de métricas: {str(e)}")
+        return go.Figure()
+
+@timed('Figura: factores de dependencia')
+def create_dependency_factors_chart(dependency_factors, item1, item2):
+    """Crea gráfico con los 4 factores de dependencia - CORREGIDO"""
+    try:
+        # CORRECCIÓN: Organizar según la tabla de contingencia estándar
+        categories = [
+            f'{item1}=1<br>{item2}=1',  # a
+            f'{item1}=1<br>{item2}=0',  # b
+            f'{item1}=0<br>{item2}=1',  # c
+            f'{item1}=0<br>{item2}=0'   # d
+        ]
+        
+        values = [
+            dependency_factors['fd_1_1'],  # a: Item1=1, Item2=1
+            dependency_factors['fd_1_0'],  # b: Item1=1, Item2=0
+            dependency_factors['fd_0_1'],  # c: Item1=0, Item2=1
+            dependency_factors['fd_0_0']   # d: Item1=0, Item2=0
+        ]
+        
+        colors = []
+        for val in values:
+            if val > 1.2:
+                colors.append('#4CAF50')  # Verde - Asociación positiva fuerte
+            elif val < 0.8:
+                colors.append('#F44336')  # Rojo - Asociación negativa fuerte
+            else:
+                colors.append('#9E9E9E')  # Gris - Independencia
+        
+        fig = go.Figure(data=[
+            go.Bar(
+                x=categories,
+                y=values,
+                marker_color=colors,
+                text=[f'{v:.3f}' for v in values],
+                textposition='auto',
+            )
+        ])
+        
+        fig.add_hline(y=1, line_dash="dash", line_color="black", 
+                      annotation_text="Independencia (FD = 1)")
+        
+        fig.update_layout(
+            title=f'Factores de Dependencia: {item1} vs {item2}',
+            yaxis_title='Factor de Dependencia',
+            font=dict(size=12),
+            height=400,
+            showlegend=False,
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)'
+        )
+        
+        return fig
+    
+    except Exception as e:
+        st.error(f"Error creando gráfico de factores de dependencia: {str(e)}")
+        return go.Figure()
+
+@timed('Figura: reglas')
+def create_all_rules_chart(all_rules):
+    """Crea gráfico con todas las reglas de asociación"""
+    try:
+        rule_names = [rule['rule'].replace(' Entonces ', '→').replace('Si (', '').replace(')', '') for rule in all_rules]
+        confidences = [rule['confidence'] for rule in all_rules]
+        coverages = [rule['coverage'] for rule in all_rules]
+        
+        fig = go.Figure()
+        
+        fig.add_trace(go.Bar(
+            name='Confianza',
+            x=rule_names,
+            y=confidences,
+            marker_color='#FF6B6B',
+            text=[f'{v:.1%}' for v in confidences],
+            textposition='auto',
+        ))
+        
+        fig.add_trace(go.Bar(
+            name='Cobertura',
+            x=rule_names,
+            y=coverages,
+            marker_color='#4ECDC4',
+            text=[f'{v:.1%}' for v in coverages],
+            textposition='auto',
+        ))
+        
+        fig.update_layout(
+            title='Todas las Reglas de Asociación',
+            xaxis_title='Reglas',
+            yaxis_title='Valor',
+            yaxis=dict(range=[0, 1]),
+            barmode='group',
+            font=dict(size=10),
+            height=500,
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)',
+            xaxis_tickangle=-45
+        )
+        
+        return fig
+    
+    except Exception as e:
+        st.error(f"Error creando gráfico de todas las reglas: {str(e)}")
+        return go.Figure()
+
+@timed('Figura: dispersión')
+def create_scatter_plot(data, item1, item2, metrics=None, max_points=SCATTER_MAX_POINTS):
+    """
+    Crea gráfico de dispersión con jitter (WebGL).
+
+    Con más de max_points transacciones (o sin transacciones, solo conteos) se
+    muestra una vista agregada: cuatro nubes con jitter cuyo tamaño es
+    proporcional a los conteos a, b, c y d de metrics.
+    """
+    try:
+        rng = np.random.default_rng(42)
+        labels = ['Ambos=1', f'{item1}=1, {item2}=0', f'{item1}=0, {item2}=1', 'Ambos=0']
+        colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4']
+        positions = [(1, 1), (1, 0), (0, 1), (0, 0)]
+
+        fig = go.Figure()
+        if data is None or len(data) > max_points:
+            cells = [metrics['a'], metrics['b'], metrics['c'], metrics['d']]
+            total = max(sum(cells), 1)
+            for label, color, (x, y), count in zip(labels, colors, positions, cells):
+                # Puntos de la nube proporcionales al conteo; la dispersión crece con la raíz de la proporción
+                n_points = int(np.ceil(SCATTER_BLOB_POINTS * count / total)) if count else 0
+                spread = 0.02 + 0.1 * np.sqrt(count / total)
+                fig.add_trace(go.Scattergl(
+                    x=x + rng.normal(0, spread, n_points),
+                    y=y + rng.normal(0, spread, n_points),
+                    mode='markers',
+                    name=f'{label} ({count:,})',
+                    marker=dict(color=color, size=4, opacity=0.5),
+                    hovertemplate=f'{label}<br>Transacciones: {count:,}<extra></extra>'
+                ))
+            title = f'Distribución de Datos (agregada): {item1} vs {item2}'
+        else:
+            x_values = data[item1].to_numpy(dtype=float)
+            y_values = data[item2].to_numpy(dtype=float)
+            category = np.select(
+                [(x_values == 1) & (y_values == 1), x_values == 1, y_values == 1],
+                [0, 1, 2],
+                default=3
+            )
+            x_jitter = x_values + rng.normal(0, 0.05, len(data))
+            y_jitter = y_values + rng.normal(0, 0.05, len(data))
+            for code, (label, color) in enumerate(zip(labels, colors)):
+                mask = category == code
+                fig.add_trace(go.Scattergl(
+                    x=x_jitter[mask], y=y_jitter[mask],
+                    mode='markers',
+                    name=label,
+                    marker=dict(color=color)
+                ))
+            title = f'Distribución de Datos: {item1} vs {item2}'
+
+        fig.update_layout(
+            title=title,
+            xaxis_title=item1,
+            yaxis_title=item2,
+            height=400,
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)'
+        )
+        fig.update_xaxes(range=[-0.3, 1.3], tickvals=[0, 1])
+        fig.update_yaxes(range=[-0.3, 1.3], tickvals=[0, 1])
+        
+        return fig
+    
+    except Exception as e:
+        st.error(f"Error creando gráfico de dispersión: {str(e)}")
+        return go.Figure()
+
+@st.cache_data
+def chi_square_curve(x_max):
+    """Curva de densidad χ² (1 grado de libertad) entre 0 y x_max; se calcula una vez por rango"""
+    from scipy.stats import chi2  # diferido: scipy.stats tarda en importarse
+
+    x = np.linspace(0, x_max, 1000)
+    return x, chi2.pdf(x, df=1)
+
+@timed('Figura: chi-cuadrado')
+def create_chi_square_visualization(chi2_stat, critical_values):
+    """Crea visualización de la prueba Chi-cuadrado"""
+    try:
+        # Rango redondeado hacia arriba para reutilizar la curva entre pares
+        x_max = int(np.ceil(max(15, chi2_stat + 2, *critical_values.values())))
+        x, y = chi_square_curve(x_max)
+        
+        fig = go.Figure()
+        
+        fig.add_trace(go.Scatter(
+            x=x, y=y,
+            mode='lines',
+            name='Distribución χ²',
+            line=dict(color='blue', width=2)
+        ))
+        
+        if chi2_stat > 0:
+            fig.add_vline(
+                x=chi2_stat,
+                line_dash="dash",
+                line_color="red",
+                annotation_text=f"χ² calculado = {chi2_stat:.3f}",
+                annotation_position="top"
+            )
+        
+        colors = ['orange', 'purple', 'green']
+        for i, (level, critical) in enumerate(critical_values.items()):
+            fig.add_vline(
+                x=critical,
+                line_dash="dot",
+                line_color=colors[i % len(colors)],
+                annotation_text=f"{level}: {critical}",
+                annotation_position="top"
+            )
+        
+        fig.update_layout(
+            title='Prueba Chi-Cuadrado',
+            xaxis_title='Valor χ²',
+            yaxis_title='Densidad',
+            height=400,
+            showlegend=True,
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)'
+        )
+        
+        return fig
+    
+    except Exception as e:
+        st.error(f"Error creando visualización Chi-cuadrado: {str(e)}")
+        return go.Figure()
+
+@timed('Figura: frecuencias')
+def create_frequency_chart(data):
+    """Crea gráfico de frecuencias por item"""
+    import plotly.express as px  # diferido: solo se carga cuando hay datos que graficar
+
+    try:
+        freq_data = item_frequencies(data).sort_values(ascending=False)
+        
+        fig = px.bar(
+            x=freq_data.index,
+            y=freq_data.values,
+            title="Frecuencia de cada Item",
+            labels={'x': 'Items', 'y': 'Frecuencia'},
+            color=freq_data.values,
+            color_continuous_scale='viridis'
+        )
+        fig.update_layout(
+            height=400,
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)'
+        )
+        return fig
+    
+    except Exception as e:
+        st.error(f"Error creando gráfico de frecuencias: {str(e)}")
+        return go.Figure()
@@ -0,0 +1,131 @@
+"""
+Almacenamiento compacto y compartido de los datasets de la sesión.
+
+Los datos se guardan como uint8 (o Sparse[uint8]) y con la misma huella de
+contenido que usa la caché de resultados: todas las sesiones que abren el
+mismo archivo reciben el mismo DataFrame de solo lectura, en lugar de una
+copia por pestaña del navegador. El dataset se libera cuando ninguna sesión
+lo usa.
+"""
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from association_engine import (
+    build_item_index, compact_dtypes, counts_from_compact, counts_from_data, deduplicate_transactions,
+    is_sparse_data, native_to_frame, open_native_dataset
+)
+from result_cache import dataset_fingerprint
+
+# Proporción máxima de filas únicas para construir los conteos desde las filas deduplicadas
+DEDUP_MAX_RATIO = 0.5
+
+_registry = weakref.WeakValueDictionary()
+_registry_lock = threading.Lock()
+
+def _read_only(data):
+    """DataFrame denso respaldado por un solo arreglo uint8 de solo lectura"""
+    values = np.ascontiguousarray(data.to_numpy(dtype=np.uint8))
+    values.flags.writeable = False
+    return pd.DataFrame(values, index=data.index, columns=data.columns, copy=False)
+
+class SharedDataset:
+    """
+    Dataset inmutable compartido por las sesiones con el mismo contenido.
+
+    Las filas idénticas se agrupan (deduplicate_transactions) la primera vez
+    que se piden los conteos; si hay suficientes repeticiones, los conteos se
+    calculan desde las filas únicas y sus pesos. El índice invertido para
+    consultas de soporte también se construye una sola vez. Los conteos también se
+    comparten y son de solo lectura: para actualizarlos hay que copiarlos
+    (copy_count_state).
+    """
+    __slots__ = ('fingerprint', 'data', '_compact', '_counts', '_index', '_lock', '__weakref__')
+
+    def __init__(self, fingerprint, data):
+        self.fingerprint = fingerprint
+        self.data = data
+        self._compact = None
+        self._counts = None
+        self._index = None
+        self._lock = threading.Lock()
+
+    def compact(self):
+        """Filas únicas (en bits, o CSR si el dataset es disperso) y sus pesos (se calculan una vez)"""
+        with self._lock:
+            if self._compact is None:
+                self._compact = deduplicate_transactions(self.data)
+            return self._compact
+
+    def counts(self):
+        """Conteos de co-ocurrencia compartidos (solo lectura)"""
+        if self._counts is None:
+            if is_sparse_data(self.data):
+                counts = counts_from_data(self.data)
+            else:
+                compact = self.compact()
+                if len(compact['weights']) <= DEDUP_MAX_RATIO * max(compact['n'], 1):
+                    counts = counts_from_compact(compact)
+                else:
+                    counts = counts_from_data(self.data)
+            counts['cooccurrence'].flags.writeable = False
+            counts['item_counts'].flags.writeable = False
+            with self._lock:
+                if self._counts is None:
+                    self._counts = counts
+        return self._counts
+
+    def has_counts(self):
+        """True si los conteos compartidos ya están construidos"""
+        return self._counts is not None
+
+    def index(self):
+        """Índice invertido item -> transacciones (build_item_index), construido una vez"""
+        with self._lock:
+            if self._index is None:
+                self._index = build_item_index(self.data)
+            return self._index
+
+    def unique_transactions(self):
+        """Número de transacciones distintas"""
+        return len(self.compact()['weights'])
+
+def share_dataset(data, fingerprint=None, counts=None):
+    """
+    Devuelve el SharedDataset del contenido de data, creándolo si ninguna
+    sesión lo tiene abierto todavía.
+
+    fingerprint y counts permiten reutilizar la huella y los conteos ya
+    guardados (por ejemplo, en un archivo nativo) en lugar de recalcularlos.
+    """
+    data = compact_dtypes(data)
+    if fingerprint is None:
+        fingerprint = dataset_fingerprint(data)
+    with _registry_lock:
+        shared = _registry.get(fingerprint)
+        if shared is None:
+            shared = SharedDataset(fingerprint, data if is_sparse_data(data) else _read_only(data))
+            if counts is not None:
+                shared._counts = counts
+            _registry[fingerprint] = shared
+    return shared
+
+def share_native_dataset(native):
+    """
+    SharedDataset de un archivo nativo (.chsq), abierto con mmap y con sus
+    conteos guardados. native es la ruta o el resultado de open_native_dataset.
+    """
+    if not isinstance(native, dict):
+        native = open_native_dataset(native)
+    return share_dataset(native_to_frame(native), native['fingerprint'], native['counts'])
+
+def registry_stats():
+    """Datasets compartidos abiertos y memoria que ocupan (bytes)"""
+    with _registry_lock:
+        datasets = list(_registry.values())
+    return {
+        'datasets': len(datasets),
+        'bytes': int(sum(shared.data.memory_usage(index=False).sum() for shared in datasets))
+    }
@@ -0,0 +1,125 @@
+"""
+Medición de tiempos por etapa (spans) para el panel de Rendimiento.
+
+Cada sesión de Streamlit corre su script en un hilo propio, así que los spans
+se guardan por hilo: start_recording() activa la medición para el rerun
+actual y stop_recording() devuelve lo medido. Mientras no se está grabando,
+span() y timed() solo revisan un atributo y no miden nada.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+_state = threading.local()
+
+# Prefijo de las métricas en formato Prometheus
+PROMETHEUS_PREFIX = "chicuadrado_stage"
+
+def _current_rss_bytes():
+    """Memoria residente actual del proceso (Linux: /proc/self/statm); 0 si no está disponible"""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0
+
+def start_recording():
+    """Empieza a guardar spans en el hilo actual"""
+    _state.spans = []
+    _state.depth = 0
+
+def stop_recording():
+    """Deja de guardar spans y devuelve los medidos, en orden de inicio"""
+    spans = getattr(_state, 'spans', None) or []
+    _state.spans = None
+    return sorted(spans, key=lambda record: record['start'])
+
+def is_recording():
+    return getattr(_state, 'spans', None) is not None
+
+@contextmanager
+def span(name, rows=None):
+    """
+    Mide el tiempo de pared y la diferencia de memoria residente de un bloque.
+
+    Devuelve el registro del span (o None si no se está grabando) para poder
+    fijar rows dentro del bloque cuando no se conoce de antemano. La memoria es
+    la del proceso completo, así que con varias sesiones activas es aproximada.
+    """
+    spans = getattr(_state, 'spans', None)
+    if spans is None:
+        yield None
+        return
+
+    record = {'name': name, 'rows': rows, 'depth': _state.depth}
+    rss_before = _current_rss_bytes()
+    record['start'] = time.perf_counter()
+    _state.depth += 1
+    try:
+        yield record
+    finally:
+        _state.depth -= 1
+        record['seconds'] = time.perf_counter() - record['start']
+        record['memory_delta_bytes'] = _current_rss_bytes() - rss_before
+        spans.append(record)
+
+def timed(name):
+    """Decorador: mide cada llamada de la función como un span"""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if getattr(_state, 'spans', None) is None:
+                return function(*args, **kwargs)
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def summarize_spans(spans):
+    """Totales por etapa: llamadas, segundos, filas y diferencia de memoria"""
+    summary = {}
+    for record in spans:
+        stage = summary.setdefault(record['name'], {
+            'stage': record['name'], 'calls': 0, 'seconds': 0.0, 'rows': 0, 'memory_delta_bytes': 0
+        })
+        stage['calls'] += 1
+        stage['seconds'] += record['seconds']
+        stage['rows'] += record['rows'] or 0
+        stage['memory_delta_bytes'] += record['memory_delta_bytes']
+    return list(summary.values())
+
+def spans_to_json(spans):
+    """Exporta los spans (y su resumen por etapa) como texto JSON"""
+    origin = spans[0]['start'] if spans else 0.0
+    return json.dumps({
+        'spans': [
+            {**{key: value for key, value in record.items() if key != 'start'},
+             'offset_seconds': record['start'] - origin}
+            for record in spans
+        ],
+        'stages': summarize_spans(spans)
+    }, indent=2, ensure_ascii=False)
+
+def _prometheus_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+def spans_to_prometheus(spans):
+    """Exporta el resumen por etapa en el formato de texto de Prometheus"""
+    metrics = [
+        ('seconds', 'seconds_total', 'Tiempo de pared acumulado por etapa'),
+        ('calls', 'calls_total', 'Número de veces que se ejecutó la etapa'),
+        ('rows', 'rows_total', 'Filas procesadas por etapa'),
+        ('memory_delta_bytes', 'memory_delta_bytes', 'Diferencia de memoria residente por etapa'),
+    ]
+    summary = summarize_spans(spans)
+    lines = []
+    for key, suffix, description in metrics:
+        metric = f"{PROMETHEUS_PREFIX}_{suffix}"
+        lines.append(f"# HELP {metric} {description}")
+        lines.append(f"# TYPE {metric} {'gauge' if key == 'memory_delta_bytes' else 'counter'}")
+        for stage in summary:
+            lines.append(f'{metric}{{stage="{_prometheus_label(stage["stage"])}"}} {stage[key]}')
+    return "\n".join(lines) + "\n"
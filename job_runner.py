@@ -0,0 +1,201 @@
+"""
+Ejecución de análisis largos en segundo plano.
+
+Los cálculos de todo el catálogo pueden tardar minutos; dentro del script de
+Streamlit se perderían en cuanto el usuario toca un widget (rerun). Aquí se
+ejecutan en un pool de hilos del proceso: cada trabajo tiene un id, reporta
+su avance por bloques y se puede cancelar, y la sesión recoge el resultado en
+un rerun posterior. Si varias sesiones piden el mismo cálculo (misma llave),
+solo corre un trabajo y todas lo comparten.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Trabajos que corren a la vez (NumPy/SciPy ya usan varios hilos dentro de cada uno)
+DEFAULT_WORKERS = 2
+# Trabajos terminados que se conservan para que las sesiones recojan su resultado
+MAX_FINISHED_JOBS = 50
+# Bytes de resultados sin recoger que se conservan (los más antiguos se olvidan primero)
+MAX_RESULT_BYTES = 256 * 1024 * 1024
+
+PENDING = 'pendiente'
+RUNNING = 'en curso'
+DONE = 'terminado'
+CANCELLED = 'cancelado'
+FAILED = 'error'
+FINISHED_STATUSES = (DONE, CANCELLED, FAILED)
+
+class JobCancelled(Exception):
+    """Se lanza dentro de un trabajo cuando se pidió cancelarlo"""
+
+def result_nbytes(value):
+    """Bytes aproximados de un resultado: DataFrames, arreglos y diccionarios o listas de ellos"""
+    if isinstance(value, pd.DataFrame):
+        # Sin deep=True: recorrer las columnas de texto costaría tanto como el cálculo
+        return int(value.memory_usage(index=True).sum())
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(result_nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(result_nbytes(item) for item in value)
+    return 0
+
+class Job:
+    """
+    Un cálculo en segundo plano.
+
+    report(done, total) es el callback de avance que recibe la función: guarda
+    el avance y lanza JobCancelled si se pidió cancelar, así que el cálculo se
+    detiene en el siguiente bloque.
+    """
+
+    def __init__(self, key, name):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.name = name
+        self.status = PENDING
+        self.done = 0
+        self.total = None
+        self.result = None
+        self.nbytes = 0
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.subscribers = 1
+        self._cancel = threading.Event()
+
+    def report(self, done, total=None):
+        if self._cancel.is_set():
+            raise JobCancelled()
+        self.done = done
+        self.total = total
+
+    @property
+    def is_finished(self):
+        return self.status in FINISHED_STATUSES
+
+    def fraction(self):
+        """Avance entre 0 y 1 (None si el cálculo no reporta bloques)"""
+        if not self.total:
+            return 1.0 if self.status == DONE else None
+        return min(self.done / self.total, 1.0)
+
+    def elapsed(self):
+        """Segundos desde que empezó a correr"""
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+class JobRunner:
+    """
+    Pool de hilos con deduplicación por llave (single-flight).
+
+    submit() devuelve el trabajo en curso o terminado con la misma llave en
+    lugar de lanzar otro; cancel() solo detiene el cálculo cuando ninguna
+    sesión suscrita lo sigue esperando. Un trabajo terminado se olvida (y se
+    libera su resultado) cuando todas sus sesiones lo recogieron (release), o
+    cuando pasa de max_finished trabajos o de max_result_bytes de resultados.
+    Es seguro usarlo desde varias sesiones.
+    """
+
+    def __init__(self, max_workers=DEFAULT_WORKERS, max_finished=MAX_FINISHED_JOBS,
+                 max_result_bytes=MAX_RESULT_BYTES):
+        self.max_finished = max_finished
+        self.max_result_bytes = max_result_bytes
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analisis')
+        self._jobs = OrderedDict()
+        self._by_key = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, name, function):
+        """
+        Lanza function(progress) en segundo plano, o se suscribe al trabajo que
+        ya calcula la misma llave. Devuelve el Job.
+        """
+        with self._lock:
+            job = self._by_key.get(key)
+            if job is not None and job.status not in (CANCELLED, FAILED):
+                job.subscribers += 1
+                return job
+            job = Job(key, name)
+            self._jobs[job.id] = job
+            self._by_key[key] = job
+        self._executor.submit(self._run, job, function)
+        return job
+
+    def _run(self, job, function):
+        try:
+            if job._cancel.is_set():
+                raise JobCancelled()
+            job.status = RUNNING
+            job.started = time.time()
+            job.result = function(job.report)
+            job.nbytes = result_nbytes(job.result)
+            job.status = DONE
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished = time.time()
+            self._prune()
+
+    def _forget(self, job):
+        """Quita el trabajo del registro y libera su resultado (con el lock tomado)"""
+        self._jobs.pop(job.id, None)
+        if self._by_key.get(job.key) is job:
+            del self._by_key[job.key]
+        job.result = None
+
+    def _prune(self):
+        """Olvida los trabajos terminados más antiguos (por número y por bytes de resultados)"""
+        with self._lock:
+            finished = [job for job in self._jobs.values() if job.is_finished]
+            kept_bytes = 0
+            for position, job in enumerate(reversed(finished)):
+                kept_bytes += job.nbytes
+                if position >= self.max_finished or kept_bytes > self.max_result_bytes:
+                    self._forget(job)
+
+    def get(self, job_id):
+        """El trabajo con ese id, o None si no existe o ya se olvidó"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """
+        Retira la suscripción de una sesión; el cálculo se detiene si nadie más
+        lo espera. Si el trabajo ya terminó equivale a release().
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.subscribers -= 1
+            if job.subscribers > 0:
+                return
+            if job.is_finished:
+                self._forget(job)
+            else:
+                job._cancel.set()
+                if self._by_key.get(job.key) is job:
+                    del self._by_key[job.key]
+
+    def release(self, job_id):
+        """Una sesión ya recogió el resultado; el trabajo se olvida cuando todas lo recogieron"""
+        self.cancel(job_id)
+
+    def stats(self):
+        """Trabajos por estado"""
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {status: statuses.count(status) for status in (PENDING, RUNNING, DONE, CANCELLED, FAILED)}
@@ -0,0 +1,156 @@
+"""
+Recomendaciones para una canasta a partir de las reglas de asociación.
+
+build_rule_index precalcula, para cada item, sus mejores consecuentes (reglas
+item → consecuente) por confianza o por factor de dependencia FD(1,1). Con
+ese índice, Recommender responde "¿qué ofrecer a una canasta con estos
+items?" juntando las listas de los items de la canasta, sin recorrer
+transacciones ni conteos; las canastas repetidas salen de un LRU en memoria.
+run_recommender.py lo expone como servicio HTTP local.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from association_engine import calculate_pair_statistics, counts_from_data
+
+# Métricas para ordenar los consecuentes (nombre -> matriz de calculate_pair_statistics)
+RECOMMENDATION_METRICS = {
+    'Confianza': 'conf_1_to_2',
+    'FD(1,1)': 'fd_1_1'
+}
+# Consecuentes que se guardan por item
+DEFAULT_TOP_CONSEQUENTS = 20
+# Canastas distintas que se guardan en el LRU
+DEFAULT_CACHE_SIZE = 10_000
+# Items (antecedentes) que se evalúan juntos al construir el índice
+INDEX_BLOCK_ROWS = 512
+# Campos de cada recomendación
+RECOMMENDATION_FIELDS = ('item', 'antecedent', 'score', 'confidence', 'dependency_factor', 'support')
+
+def build_rule_index(source, metric='Confianza', top_consequents=DEFAULT_TOP_CONSEQUENTS,
+                     min_support=1, min_confidence=0.0, min_lift=1.0, block_rows=INDEX_BLOCK_ROWS):
+    """
+    Índice item -> mejores consecuentes de las reglas item → consecuente.
+
+    source puede ser un DataFrame de transacciones o los conteos acumulados.
+    Los antecedentes se evalúan por bloques de filas de la matriz de
+    co-ocurrencia (calculate_pair_statistics), así que la memoria temporal es
+    de block_rows × items. Solo se guardan reglas con soporte (conteo a),
+    confianza y FD(1,1) mínimos; con min_lift=1 se descartan las asociaciones
+    negativas. Devuelve un diccionario con items, positions, metric y las
+    matrices items × top_consequents de consecuentes (-1 si no hay), score,
+    confidence, dependency_factor y support.
+    """
+    counts = source if isinstance(source, dict) else counts_from_data(source)
+    items = list(counts['items'])
+    n_items = len(items)
+    item_counts = np.asarray(counts['item_counts'])
+    k = min(int(top_consequents), max(n_items - 1, 0))
+
+    consequents = np.full((n_items, k), -1, dtype=np.int64)
+    tables = {name: np.zeros((n_items, k)) for name in ('score', 'confidence', 'dependency_factor', 'support')}
+    for start in range(0, n_items if k > 0 else 0, block_rows):
+        rows = slice(start, min(start + block_rows, n_items))
+        stats = calculate_pair_statistics(
+            counts['cooccurrence'][rows], item_counts[rows], counts['n'], column_counts=item_counts
+        )
+        valid = (stats['a'] >= min_support) & (stats['conf_1_to_2'] >= min_confidence)
+        if min_lift is not None:
+            valid &= stats['fd_1_1'] >= min_lift
+        local = np.arange(rows.stop - rows.start)
+        valid[local, local + start] = False  # un item no se recomienda a sí mismo
+        values = np.where(valid, stats[RECOMMENDATION_METRICS[metric]], -np.inf)
+
+        top = np.argpartition(-values, k - 1, axis=1)[:, :k]
+        top = np.take_along_axis(top, np.argsort(-np.take_along_axis(values, top, axis=1), axis=1, kind='stable'), axis=1)
+        top_values = np.take_along_axis(values, top, axis=1)
+        keep = np.isfinite(top_values)
+        consequents[rows] = np.where(keep, top, -1)
+        tables['score'][rows] = np.where(keep, top_values, 0.0)
+        tables['confidence'][rows] = np.take_along_axis(stats['conf_1_to_2'], top, axis=1)
+        tables['dependency_factor'][rows] = np.take_along_axis(stats['fd_1_1'], top, axis=1)
+        tables['support'][rows] = np.take_along_axis(stats['a'], top, axis=1)
+
+    return {
+        'items': items,
+        'positions': {item: j for j, item in enumerate(items)},
+        'metric': metric,
+        'consequents': consequents,
+        **tables
+    }
+
+class Recommender:
+    """
+    Recomendaciones para canastas con un LRU de canastas repetidas.
+
+    recommend() junta los consecuentes de los items de la canasta, descarta
+    los que ya están en ella y conserva para cada consecuente la regla con
+    mayor score. Los items que no están en el índice se ignoran. Es seguro
+    usarlo desde varios hilos.
+    """
+
+    def __init__(self, rule_index, cache_size=DEFAULT_CACHE_SIZE):
+        self.rule_index = rule_index
+        self.cache_size = cache_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _compute(self, basket, top_n):
+        index = self.rule_index
+        rows = np.array([index['positions'][item] for item in basket if item in index['positions']], dtype=np.int64)
+        if len(rows) == 0 or index['consequents'].shape[1] == 0:
+            return ()
+        k = index['consequents'].shape[1]
+        candidates = index['consequents'][rows].ravel()
+        scores = index['score'][rows].ravel()
+        valid = np.nonzero((candidates >= 0) & ~np.isin(candidates, rows))[0]
+        order = valid[np.argsort(-scores[valid], kind='stable')]
+        # La primera aparición de cada consecuente es la de mayor score
+        _, first = np.unique(candidates[order], return_index=True)
+        best = order[np.sort(first)][:top_n]
+        antecedents = rows[best // k]
+        columns = best % k
+        return tuple(
+            (index['items'][candidates[flat]], index['items'][row], float(index['score'][row, column]),
+             float(index['confidence'][row, column]), float(index['dependency_factor'][row, column]),
+             int(index['support'][row, column]))
+            for flat, row, column in zip(best, antecedents, columns)
+        )
+
+    def recommend(self, basket, top_n=5):
+        """
+        Los top_n items sugeridos para la canasta, de mayor a menor score.
+
+        Cada recomendación es un diccionario con item, antecedent (el item de
+        la canasta que la genera), score, confidence, dependency_factor y support.
+        """
+        basket = tuple(dict.fromkeys(basket))
+        key = (frozenset(basket), int(top_n))
+        with self._lock:
+            records = self._entries.get(key)
+            if records is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if records is None:
+            records = self._compute(basket, int(top_n))
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = records
+                while len(self._entries) > self.cache_size:
+                    self._entries.popitem(last=False)
+        return [dict(zip(RECOMMENDATION_FIELDS, record)) for record in records]
+
+    def stats(self):
+        """Resumen del índice y del LRU"""
+        with self._lock:
+            return {
+                'items': len(self.rule_index['items']),
+                'metric': self.rule_index['metric'],
+                'cached_baskets': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses
+            }
@@ -0,0 +1,206 @@
+"""
+Caché de resultados compartida entre reruns y sesiones.
+
+Las llaves se forman con la huella (hash del contenido) del dataset y los
+parámetros del cálculo, así que dos usuarios que analizan el mismo archivo
+reutilizan el mismo resultado. Tiene un nivel en memoria (LRU con límite de
+bytes) y un nivel opcional en disco, también con límite de bytes.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import scipy.sparse as sp
+
+from association_engine import BINARIZE_BLOCK_ROWS, is_sparse_data, transactions_to_csc
+
+# Límite por defecto del nivel en memoria (bytes serializados)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Límite por defecto del nivel en disco
+DEFAULT_MAX_DISK_BYTES = 1024 * 1024 * 1024
+# Bytes por bloque al calcular la huella de matrices grandes
+_HASH_BLOCK_BYTES = 64 * 1024 * 1024
+
+def _update_with_array(digest, array):
+    """Agrega al hash el tipo, la forma y los bytes de un arreglo de NumPy (por bloques)"""
+    array = np.ascontiguousarray(array)
+    digest.update(f"{array.dtype.str}{array.shape}".encode())
+    flat = array.reshape(-1).view(np.uint8)
+    for start in range(0, len(flat), _HASH_BLOCK_BYTES):
+        digest.update(flat[start:start + _HASH_BLOCK_BYTES])
+
+def dataset_fingerprint(source):
+    """
+    Huella del contenido de un dataset: DataFrame (denso o disperso) o conteos acumulados.
+
+    Dos datasets con los mismos items y los mismos valores tienen la misma huella,
+    sin importar la sesión o el archivo del que vengan.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    if isinstance(source, dict):
+        digest.update(b"counts")
+        digest.update(repr(list(source['items'])).encode())
+        digest.update(str(int(source['n'])).encode())
+        _update_with_array(digest, source['item_counts'])
+        _update_with_array(digest, source['cooccurrence'])
+        return digest.hexdigest()
+
+    # Forma canónica por bloques de filas (CSR): la huella es la misma si el
+    # dataset está guardado como matriz densa o dispersa
+    digest.update(b"transactions")
+    digest.update(repr(list(source.columns)).encode())
+    digest.update(str(source.shape).encode())
+    matrix = transactions_to_csc(source).tocsr() if is_sparse_data(source) else None
+    for start in range(0, len(source), BINARIZE_BLOCK_ROWS):
+        if matrix is not None:
+            block = matrix[start:start + BINARIZE_BLOCK_ROWS]
+        else:
+            block = sp.csr_matrix(source.iloc[start:start + BINARIZE_BLOCK_ROWS].to_numpy() == 1)
+        block.sort_indices()
+        _update_with_array(digest, np.diff(block.indptr).astype(np.int64))
+        _update_with_array(digest, block.indices.astype(np.int64))
+    return digest.hexdigest()
+
+def make_key(*parts):
+    """Llave de caché estable a partir de la huella y los parámetros del cálculo"""
+    return hashlib.blake2b(repr(parts).encode(), digest_size=20).hexdigest()
+
+class ResultCache:
+    """
+    Caché LRU en memoria con límite de bytes y nivel opcional en disco.
+
+    Los valores se guardan serializados (pickle): así cada lectura devuelve una
+    copia independiente y el tamaño en memoria se conoce con exactitud.
+    En disco, al pasar de max_disk_bytes se borran los archivos usados hace
+    más tiempo (según su fecha de modificación, que se actualiza en cada
+    lectura), como en UploadCache.
+    Es segura para usarse desde varios hilos (sesiones de Streamlit).
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, disk_dir=None, max_disk_bytes=DEFAULT_MAX_DISK_BYTES):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def _store_in_memory(self, key, payload):
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key))
+            self._entries[key] = payload
+            self._size += len(payload)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def get(self, key, default=None):
+        """Devuelve el valor guardado (memoria y luego disco) o default"""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+        if payload is None and self.disk_dir and os.path.exists(self._disk_path(key)):
+            try:
+                with open(self._disk_path(key), 'rb') as file:
+                    payload = file.read()
+                os.utime(self._disk_path(key))
+                self._store_in_memory(key, payload)
+            except OSError:
+                payload = None
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return default if payload is None else pickle.loads(payload)
+
+    def put(self, key, value):
+        """Guarda un valor en memoria y, si está configurado, en disco"""
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._store_in_memory(key, payload)
+        if self.disk_dir and len(payload) <= self.max_disk_bytes:
+            # Escritura atómica para que otro proceso nunca lea un archivo a medias
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as file:
+                file.write(payload)
+            os.replace(tmp_path, self._disk_path(key))
+            self.evict_disk(keep=self._disk_path(key))
+
+    def _disk_entries(self):
+        entries = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith('.pkl'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict_disk(self, keep=None):
+        """Borra los resultados en disco usados hace más tiempo hasta quedar dentro del límite"""
+        with self._disk_lock:
+            entries = sorted(self._disk_entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_disk_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+    def get_or_compute(self, key, compute):
+        """Devuelve el valor guardado o lo calcula con compute() y lo guarda (si no es None)"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+        value = compute()
+        if value is not None:
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        """Vacía el nivel en memoria"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        """Resumen del uso de la caché"""
+        with self._lock:
+            stats = {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+        if self.disk_dir:
+            entries = self._disk_entries()
+            stats.update({
+                'disk_files': len(entries),
+                'disk_bytes': sum(size for _, size, _ in entries),
+                'max_disk_bytes': self.max_disk_bytes
+            })
+        return stats
@@ -0,0 +1,127 @@
+"""
+Script para ejecutar el análisis de reglas de asociación sin interfaz (procesos batch)
+
+Ejemplos:
+    python3 run_batch.py ventas.parquet --output resultados/
+    python3 run_batch.py tickets.csv --long ticket_id sku --mode both --format csv
+    python3 run_batch.py ventas.xlsx --to-native ventas.chsq   # convierte una vez; luego se abre con mmap
+"""
+import argparse
+import os
+import sys
+import time
+
+import association_engine as engine
+from result_cache import dataset_fingerprint
+
+def parse_args(argv=None):
+    """Lee los argumentos de la línea de comandos"""
+    parser = argparse.ArgumentParser(
+        description="Calcula todos los pares y/o itemsets frecuentes de un dataset y los guarda en Parquet o CSV"
+    )
+    parser.add_argument("dataset", help="Archivo de datos (.csv, .parquet, .arrow, .xlsx, .chsq)")
+    parser.add_argument("--output", "-o", default="resultados", help="Carpeta de salida (por defecto: resultados)")
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet", help="Formato de salida")
+    parser.add_argument("--mode", choices=["pairs", "itemsets", "both"], default="pairs",
+                        help="pairs: todos los pares; itemsets: itemsets frecuentes y reglas; both: ambos")
+    parser.add_argument("--long", nargs=2, metavar=("TRANSACCION", "ITEM"),
+                        help="Columnas de transacción e item si el archivo está en formato largo")
+    parser.add_argument("--chunk-rows", type=int, default=engine.INGEST_CHUNK_ROWS, help="Filas por bloque al leer")
+    parser.add_argument("--min-support", type=int, default=1, help="Pares: soporte mínimo (conteo a)")
+    parser.add_argument("--min-chi2", type=float, default=0.0, help="Pares: chi-cuadrado mínimo")
+    parser.add_argument("--min-lift", type=float, default=None, help="Pares: FD(1,1) mínimo")
+    parser.add_argument("--yates", action="store_true", help="Pares: corrección de continuidad de Yates")
+    parser.add_argument("--correction", choices=sorted(engine.P_VALUE_CORRECTIONS), default=None,
+                        help="Pares: corrección por comparaciones múltiples (bonferroni o bh)")
+    parser.add_argument("--max-p", type=float, default=None, help="Pares: p-valor máximo (ajustado si hay corrección)")
+    parser.add_argument("--fisher", action="store_true",
+                        help="Pares: prueba exacta de Fisher cuando alguna frecuencia esperada es pequeña")
+    parser.add_argument("--workers", type=int, default=None, help="Pares: número de hilos")
+    parser.add_argument("--tile-size", type=int, default=engine.PAIR_TILE_SIZE, help="Pares: items por bloque")
+    parser.add_argument("--itemset-support", type=float, default=0.01,
+                        help="Itemsets: soporte mínimo como proporción (0-1)")
+    parser.add_argument("--min-confidence", type=float, default=0.5, help="Itemsets: confianza mínima de las reglas")
+    parser.add_argument("--max-length", type=int, default=3, help="Itemsets: tamaño máximo")
+    parser.add_argument("--to-native", metavar="RUTA", default=None,
+                        help="Convierte el dataset al formato nativo (.chsq) y analiza el archivo convertido")
+    return parser.parse_args(argv)
+
+def write_table(frame, output_dir, name, file_format):
+    """Guarda una tabla en la carpeta de salida y devuelve la ruta"""
+    path = os.path.join(output_dir, f"{name}.{file_format}")
+    if file_format == "parquet":
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_csv(path, index=False)
+    return path
+
+def convert_to_native(args):
+    """Guarda las transacciones en el formato nativo; los análisis siguientes leen ese archivo"""
+    transaction_col, item_col = args.long if args.long else (None, None)
+    data = engine.load_transactions(args.dataset, transaction_col, item_col, chunk_rows=args.chunk_rows)
+    engine.write_native_dataset(data, args.to_native, fingerprint=dataset_fingerprint(data))
+    print(f"💾 {len(data):,} transacciones guardadas en {args.to_native}")
+    args.dataset, args.long = args.to_native, None
+
+def run_pairs(args):
+    """Ingresa el archivo por bloques y calcula todos los pares desde los conteos"""
+    if args.long:
+        counts = engine.ingest_long_file_counts(args.dataset, args.long[0], args.long[1], chunk_rows=args.chunk_rows)
+    else:
+        counts = engine.ingest_file_counts(args.dataset, chunk_rows=args.chunk_rows)
+    print(f"📊 {counts['n']:,} transacciones, {len(counts['items']):,} items")
+
+    pairs = engine.calculate_all_pairs_parallel(
+        counts,
+        min_support=args.min_support,
+        min_chi2=args.min_chi2,
+        min_lift=args.min_lift,
+        tile_size=args.tile_size,
+        n_workers=args.workers,
+        yates=args.yates,
+        correction=args.correction,
+        max_p=args.max_p,
+        fisher_min_expected=engine.FISHER_MIN_EXPECTED if args.fisher else None
+    )
+    path = write_table(pairs, args.output, "pairs", args.format)
+    print(f"✅ {len(pairs):,} pares guardados en {path}")
+
+def run_itemsets(args):
+    """Carga las transacciones y calcula itemsets frecuentes y reglas"""
+    transaction_col, item_col = args.long if args.long else (None, None)
+    data = engine.load_transactions(args.dataset, transaction_col, item_col, chunk_rows=args.chunk_rows)
+    itemsets = engine.mine_frequent_itemsets(data, args.itemset_support, args.max_length)
+    rules = engine.generate_itemset_rules(itemsets, len(data), args.min_confidence)
+
+    path = write_table(engine.itemsets_to_frame(itemsets, len(data)), args.output, "itemsets", args.format)
+    print(f"✅ {len(itemsets):,} itemsets guardados en {path}")
+    path = write_table(engine.rules_to_frame(rules), args.output, "rules", args.format)
+    print(f"✅ {len(rules):,} reglas guardadas en {path}")
+
+def main(argv=None):
+    args = parse_args(argv)
+    print("📊 Analizador de Reglas de Asociación (batch)")
+    print("=" * 40)
+
+    if not os.path.exists(args.dataset):
+        print(f"❌ Archivo {args.dataset} no encontrado")
+        return 1
+    os.makedirs(args.output, exist_ok=True)
+
+    start = time.perf_counter()
+    try:
+        if args.to_native:
+            convert_to_native(args)
+        if args.mode in ("pairs", "both"):
+            run_pairs(args)
+        if args.mode in ("itemsets", "both"):
+            run_itemsets(args)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return 1
+
+    print(f"⏱️  Tiempo total: {time.perf_counter() - start:.2f} s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
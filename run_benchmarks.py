@@ -0,0 +1,218 @@
+"""
+Script para medir el rendimiento de las rutas principales del análisis
+
+Recorre una malla de (filas, items, densidad), mide tiempo (mejor y mediana
+de varias repeticiones) y memoria pico (tracemalloc) de cada función y guarda
+los resultados en JSON para compararlos entre commits.
+
+Ejemplos:
+    python3 run_benchmarks.py                              # guarda benchmarks/<commit>.json
+    python3 run_benchmarks.py --quick --output base.json
+    python3 run_benchmarks.py --compare benchmarks/base.json --tolerance 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import association_engine as engine
+
+DEFAULT_ROWS = [1_000, 10_000, 100_000]
+DEFAULT_ITEMS = [8, 64]
+DEFAULT_DENSITIES = [0.05, 0.3]
+QUICK_ROWS = [1_000, 10_000]
+QUICK_ITEMS = [8]
+QUICK_DENSITIES = [0.3]
+# Carpeta del repositorio (para leer el commit y guardar los resultados)
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+# Diferencia mínima (segundos) para considerar una regresión; evita ruido en casos muy rápidos
+MIN_REGRESSION_SECONDS = 0.001
+
+def parse_args(argv=None):
+    """Lee los argumentos de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Mide tiempo y memoria de las funciones de análisis")
+    parser.add_argument("--rows", type=int, nargs="+", default=None, help="Filas (transacciones) de la malla")
+    parser.add_argument("--items", type=int, nargs="+", default=None, help="Items de la malla")
+    parser.add_argument("--density", type=float, nargs="+", default=None, help="Densidades (proporción de 1) de la malla")
+    parser.add_argument("--quick", action="store_true", help="Malla reducida para una revisión rápida")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeticiones por caso (se reporta mejor y mediana)")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla de los datos sintéticos")
+    parser.add_argument("--only", nargs="+", default=None, help="Solo los casos cuyo nombre contenga alguno de estos textos")
+    parser.add_argument("--skip-figures", action="store_true", help="No medir las funciones create_* (no importa Streamlit ni Plotly)")
+    parser.add_argument("--output", "-o", default=None, help="Archivo JSON de salida (por defecto: benchmarks/<commit>.json)")
+    parser.add_argument("--compare", default=None, help="JSON de referencia contra el cual comparar")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Aumento relativo de la mediana que se considera regresión (0.2 = 20%%)")
+    return parser.parse_args(argv)
+
+def git_commit():
+    """Commit actual (o 'sin-git' si no se puede leer)"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "sin-git"
+
+def measure(function, repeat):
+    """Mejor tiempo, mediana y memoria pico (MiB) de function()"""
+    # Una ejecución de calentamiento (importaciones diferidas, cachés de Streamlit, etc.)
+    function()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    # La memoria se mide aparte para que tracemalloc no afecte los tiempos
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'best_s': min(times),
+        'median_s': statistics.median(times),
+        'peak_mib': peak / 2 ** 20
+    }
+
+def grid_data(rows, items, density, seed):
+    """Transacciones sintéticas con la densidad indicada"""
+    return engine.generate_synthetic_baskets(items, rows, base_probs=np.full(items, density), seed=seed)
+
+def engine_cases(data, metrics):
+    """Casos del motor de análisis para un punto de la malla"""
+    item1, item2 = data.columns[:2]
+    a, b, c, d, n = (metrics[key] for key in ('a', 'b', 'c', 'd', 'n'))
+    return {
+        'validate_data': lambda: engine.validate_data(data),
+        'calculate_metrics': lambda: engine.calculate_metrics(data, item1, item2),
+        'calculate_all_association_rules': lambda: engine.calculate_all_association_rules(a, b, c, d, n, item1, item2),
+        'counts_from_data': lambda: engine.counts_from_data(data),
+        'calculate_all_pairs_metrics': lambda: engine.calculate_all_pairs_metrics(data),
+    }
+
+def figure_cases(charts, data, metrics):
+    """Casos de las funciones create_* de charts.py para un punto de la malla"""
+    item1, item2 = data.columns[:2]
+    return {
+        'create_contingency_heatmap': lambda: charts.create_contingency_heatmap(metrics['contingency'], item1, item2),
+        'create_metrics_chart': lambda: charts.create_metrics_chart(metrics, item1, item2),
+        'create_dependency_factors_chart': lambda: charts.create_dependency_factors_chart(metrics['dependency_factors'], item1, item2),
+        'create_all_rules_chart': lambda: charts.create_all_rules_chart(metrics['all_rules']),
+        'create_scatter_plot': lambda: charts.create_scatter_plot(data, item1, item2, metrics),
+        # La curva χ² está en st.cache_data: se limpia en cada corrida para medir el cálculo y no un acierto de caché
+        'create_chi_square_visualization': lambda: (
+            charts.chi_square_curve.clear(),
+            charts.create_chi_square_visualization(metrics['chi2_stat'], metrics['critical_values'])
+        ),
+        'create_frequency_chart': lambda: charts.create_frequency_chart(data),
+    }
+
+def selected(name, only):
+    return only is None or any(text in name for text in only)
+
+def run_grid(args):
+    """Ejecuta todos los casos de la malla y devuelve la lista de resultados"""
+    rows_grid = args.rows or (QUICK_ROWS if args.quick else DEFAULT_ROWS)
+    items_grid = args.items or (QUICK_ITEMS if args.quick else DEFAULT_ITEMS)
+    density_grid = args.density or (QUICK_DENSITIES if args.quick else DEFAULT_DENSITIES)
+
+    charts = None
+    if not args.skip_figures:
+        import charts  # importa Streamlit y Plotly; fuera de `streamlit run` solo muestra advertencias
+
+    results = []
+
+    def record(name, rows, items, density, function):
+        if not selected(name, args.only):
+            return
+        measurement = measure(function, args.repeat)
+        results.append({'case': name, 'rows': rows, 'items': items, 'density': density, **measurement})
+        print(f"  {name:<34} {measurement['median_s'] * 1000:>10.2f} ms  {measurement['peak_mib']:>9.2f} MiB")
+
+    for rows in rows_grid:
+        # generate_sample_data tiene un máximo de 8 items y densidad fija
+        record('generate_sample_data', rows, 8, None, lambda: engine.generate_sample_data(8, rows, args.seed))
+        for items in items_grid:
+            for density in density_grid:
+                print(f"📐 filas={rows:,} items={items} densidad={density}")
+                data = grid_data(rows, items, density, args.seed)
+                metrics = engine.calculate_metrics(data, data.columns[0], data.columns[1])
+                for name, function in engine_cases(data, metrics).items():
+                    record(name, rows, items, density, function)
+                if charts is not None:
+                    for name, function in figure_cases(charts, data, metrics).items():
+                        record(name, rows, items, density, function)
+    return results
+
+def case_key(result):
+    return (result['case'], result['rows'], result['items'], result['density'])
+
+def compare_results(results, baseline, tolerance):
+    """Imprime la comparación contra la referencia y devuelve las regresiones"""
+    reference = {case_key(result): result for result in baseline['results']}
+    regressions = []
+    print(f"\n🔎 Comparación contra {baseline['meta']['commit']} (tolerancia {tolerance:.0%})")
+    for result in results:
+        base = reference.get(case_key(result))
+        if base is None:
+            continue
+        ratio = result['median_s'] / base['median_s'] if base['median_s'] > 0 else float('inf')
+        slower = (result['median_s'] > base['median_s'] * (1 + tolerance)
+                  and result['median_s'] - base['median_s'] > MIN_REGRESSION_SECONDS)
+        icon = "❌" if slower else "✅"
+        print(f"{icon} {result['case']:<34} filas={result['rows']:<8,} items={result['items']:<4} "
+              f"densidad={result['density']}  x{ratio:.2f}")
+        if slower:
+            regressions.append({**result, 'baseline_median_s': base['median_s'], 'ratio': ratio})
+    return regressions
+
+def main(argv=None):
+    args = parse_args(argv)
+    print("⏱️  Benchmarks del Analizador de Reglas de Asociación")
+    print("=" * 40)
+
+    commit = git_commit()
+    results = run_grid(args)
+    report = {
+        'meta': {
+            'commit': commit,
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': args.repeat,
+            'seed': args.seed
+        },
+        'results': results
+    }
+
+    output = args.output or os.path.join(REPO_DIR, "benchmarks", f"{commit}.json")
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"\n✅ {len(results)} resultados guardados en {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = compare_results(results, baseline, args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} casos más lentos que la referencia")
+            return 1
+        print("✅ Sin regresiones")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
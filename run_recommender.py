@@ -0,0 +1,157 @@
+"""
+Servicio local de recomendaciones para canastas (HTTP)
+
+Construye el índice de reglas (recommender.build_rule_index) una vez al
+arrancar y responde consultas de canastas desde memoria:
+
+    GET  /recommend?item=Pan&item=Leche&n=5
+    POST /recommend   {"items": ["Pan", "Leche"], "n": 5}
+    GET  /health
+
+Ejemplos:
+    python3 run_recommender.py ventas.chsq --port 8765
+    python3 run_recommender.py tickets.csv --long ticket_id sku --metric "FD(1,1)"
+    python3 run_recommender.py ventas.chsq --basket Pan Leche   # una consulta, sin servidor
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import association_engine as engine
+from recommender import (
+    DEFAULT_CACHE_SIZE, DEFAULT_TOP_CONSEQUENTS, RECOMMENDATION_METRICS, Recommender, build_rule_index
+)
+
+# Límite del cuerpo de una consulta POST (bytes)
+MAX_BODY_BYTES = 64 * 1024
+
+def parse_args(argv=None):
+    """Lee los argumentos de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Sirve recomendaciones para canastas a partir de las reglas de asociación")
+    parser.add_argument("dataset", help="Archivo de datos (.csv, .parquet, .arrow, .xlsx, .chsq)")
+    parser.add_argument("--long", nargs=2, metavar=("TRANSACCION", "ITEM"),
+                        help="Columnas de transacción e item si el archivo está en formato largo")
+    parser.add_argument("--chunk-rows", type=int, default=engine.INGEST_CHUNK_ROWS, help="Filas por bloque al leer")
+    parser.add_argument("--metric", choices=list(RECOMMENDATION_METRICS), default="Confianza",
+                        help="Métrica para ordenar los consecuentes")
+    parser.add_argument("--top-consequents", type=int, default=DEFAULT_TOP_CONSEQUENTS,
+                        help="Consecuentes que se guardan por item")
+    parser.add_argument("--min-support", type=int, default=1, help="Soporte mínimo de una regla (conteo a)")
+    parser.add_argument("--min-confidence", type=float, default=0.0, help="Confianza mínima de una regla")
+    parser.add_argument("--min-lift", type=float, default=1.0, help="FD(1,1) mínimo de una regla")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE, help="Canastas que se guardan en el LRU")
+    parser.add_argument("--host", default="127.0.0.1", help="Dirección del servidor")
+    parser.add_argument("--port", type=int, default=8765, help="Puerto del servidor")
+    parser.add_argument("--basket", nargs="+", default=None, help="Responde una sola canasta y termina (sin servidor)")
+    parser.add_argument("-n", type=int, default=5, help="Recomendaciones por canasta con --basket")
+    return parser.parse_args(argv)
+
+def load_recommender(args):
+    """Ingresa los conteos del archivo y construye el índice de reglas"""
+    if args.long:
+        counts = engine.ingest_long_file_counts(args.dataset, args.long[0], args.long[1], chunk_rows=args.chunk_rows)
+    else:
+        counts = engine.ingest_file_counts(args.dataset, chunk_rows=args.chunk_rows)
+    rule_index = build_rule_index(
+        counts, metric=args.metric, top_consequents=args.top_consequents,
+        min_support=args.min_support, min_confidence=args.min_confidence, min_lift=args.min_lift
+    )
+    return Recommender(rule_index, cache_size=args.cache_size)
+
+def make_handler(recommender):
+    """Clase de BaseHTTPRequestHandler que responde con el recomendador indicado"""
+
+    class RecommendationHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _recommend(self, items, top_n):
+            start = time.perf_counter()
+            recommendations = recommender.recommend(items, top_n)
+            self._send_json(200, {
+                'basket': items,
+                'recommendations': recommendations,
+                'elapsed_ms': (time.perf_counter() - start) * 1000
+            })
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            if url.path == "/health":
+                self._send_json(200, {'status': 'ok', **recommender.stats()})
+            elif url.path == "/recommend":
+                try:
+                    top_n = int(query.get('n', ['5'])[0])
+                except ValueError:
+                    self._send_json(400, {'error': "n debe ser un entero"})
+                    return
+                self._recommend(query.get('item', []), top_n)
+            else:
+                self._send_json(404, {'error': f"Ruta no encontrada: {url.path}"})
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/recommend":
+                self._send_json(404, {'error': f"Ruta no encontrada: {self.path}"})
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY_BYTES:
+                self._send_json(413, {'error': "Consulta demasiado grande"})
+                return
+            try:
+                request = json.loads(self.rfile.read(length) or b"{}")
+                items = [str(item) for item in request.get('items', [])]
+                top_n = int(request.get('n', 5))
+            except (ValueError, TypeError, AttributeError):
+                self._send_json(400, {'error': 'Se esperaba {"items": [...], "n": 5}'})
+                return
+            self._recommend(items, top_n)
+
+        def log_message(self, format, *args):
+            # Sin registro por consulta: el servicio responde muchas consultas pequeñas
+            pass
+
+    return RecommendationHandler
+
+def main(argv=None):
+    args = parse_args(argv)
+    print("🛒 Recomendaciones para canastas")
+    print("=" * 40)
+
+    if not os.path.exists(args.dataset):
+        print(f"❌ Archivo {args.dataset} no encontrado")
+        return 1
+
+    start = time.perf_counter()
+    try:
+        recommender = load_recommender(args)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return 1
+    print(f"📊 Índice de {len(recommender.rule_index['items']):,} items por {args.metric} "
+          f"en {time.perf_counter() - start:.2f} s")
+
+    if args.basket:
+        print(json.dumps(recommender.recommend(args.basket, args.n), ensure_ascii=False, indent=2, default=str))
+        return 0
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(recommender))
+    print(f"✅ Escuchando en http://{args.host}:{args.port}/recommend")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+Recursos estáticos de la interfaz (configuración de la página y CSS).
+
+Se construyen una sola vez por proceso, al importar el módulo; app.py solo
+los aplica en cada rerun.
+"""
+
+# Configuración de la página
+PAGE_CONFIG = {
+    'page_title': "Analizador de Reglas de Asociación",
+    'page_icon': "📊",
+    'layout': "wide",
+    'initial_sidebar_state': "expanded"
+}
+
+# CSS mejorado SIN los divs problemáticos
+CUSTOM_CSS = """
+<style>
+    /* Estilos base */
+    .main-header {
+        font-size: 3rem;
+        color: #1f77b4 !important;
+        text-align: center;
+        margin-bottom: 2rem;
+        text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
+    }
+    
+    /* Tarjetas de métricas - MODO CLARO */
+    .metric-card {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%) !important;
+        padding: 1rem !important;
+        border-radius: 10px !important;
+        color: white !important;
+        text-align: center !important;
+        margin: 0.5rem 0 !important;
+        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1) !important;
+    }
+    
+    .metric-card h1, 
+    .metric-card h2, 
+    .metric-card h3,
+    .metric-card * {
+        color: white !important;
+        margin: 0.2rem 0 !important;
+    }
+    
+    /* Cajas de éxito - MODO CLARO */
+    .success-box {
+        background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%) !important;
+        padding: 1rem !important;
+        border-radius: 10px !important;
+        color: white !important;
+        margin: 1rem 0 !important;
+        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1) !important;
+    }
+    
+    .success-box *,
+    .success-box strong {
+        color: white !important;
+    }
+    
+    /* Cajas de advertencia - MODO CLARO */
+    .warning-box {
+        background: linear-gradient(135deg, #fa709a 0%, #fee140 100%) !important;
+        padding: 1rem !important;
+        border-radius: 10px !important;
+        color: white !important;
+        margin: 1rem 0 !important;
+        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1) !important;
+    }
+    
+    .warning-box *,
+    .warning-box strong {
+        color: white !important;
+    }
+    
+    /* MODO OSCURO - Detección automática */
+    @media (prefers-color-scheme: dark) {
+        .main-header {
+            color: #4fc3f7 !important;
+        }
+    }
+    
+    /* Pestañas */
+    .stTabs [data-baseweb="tab-list"] {
+        gap: 2px;
+    }
+    
+    .stTabs [data-baseweb="tab"] {
+        height: 50px !important;
+        padding-left: 20px !important;
+        padding-right: 20px !important;
+        border-radius: 10px 10px 0px 0px !important;
+        transition: all 0.3s ease !important;
+    }
+    
+    .stTabs [aria-selected="true"] {
+        background-color: #1f77b4 !important;
+        color: white !important;
+    }
+    
+    /* Asegurar que los gráficos tengan fondo transparente */
+    .js-plotly-plot {
+        background: transparent !important;
+    }
+    
+    .plotly {
+        background: transparent !important;
+    }
+</style>
+"""
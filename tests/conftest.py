@@ -0,0 +1,35 @@
+"""Datos de prueba compartidos; los módulos del proyecto están en la raíz del repositorio"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import association_engine as engine  # noqa: E402
+
+def random_baskets(rows=400, items=12, density=0.25, seed=0):
+    """Transacciones binarias (uint8) con densidades distintas por item"""
+    rng = np.random.default_rng(seed)
+    probs = rng.uniform(density / 4, density, items)
+    values = (rng.random((rows, items)) < probs).astype(np.uint8)
+    return pd.DataFrame(values, columns=[f"I{j}" for j in range(items)])
+
+def assert_same_counts(counts, expected):
+    """Los conteos acumulados coinciden con los de referencia"""
+    assert list(counts['items']) == list(expected['items'])
+    assert counts['n'] == expected['n']
+    np.testing.assert_array_equal(counts['item_counts'], expected['item_counts'])
+    np.testing.assert_array_equal(counts['cooccurrence'], expected['cooccurrence'])
+
+@pytest.fixture
+def baskets():
+    return random_baskets()
+
+@pytest.fixture(params=['dense', 'sparse'])
+def stored_baskets(request):
+    """Las mismas transacciones en formato denso y disperso"""
+    data = random_baskets(density=0.15)
+    return engine.to_sparse_transactions(data) if request.param == 'sparse' else data
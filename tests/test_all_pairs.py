@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import association_engine as engine
+from conftest import random_baskets
+
+@pytest.mark.parametrize('n_items', [0, 1])
+@pytest.mark.parametrize('fisher_min_expected', [None, 5])
+def test_parallel_pairs_without_pairs(n_items, fisher_min_expected):
+    data = pd.DataFrame(np.ones((5, n_items), dtype=np.uint8), columns=[f"I{j}" for j in range(n_items)])
+    expected = engine.all_pairs_to_frame(
+        engine.calculate_all_pairs_metrics(data), fisher_min_expected=fisher_min_expected
+    )
+    for source in (data, engine.counts_from_data(data)):
+        frame = engine.calculate_all_pairs_parallel(
+            source, fisher_min_expected=fisher_min_expected, correction='bh'
+        )
+        assert frame.empty
+        assert list(frame.columns) == list(expected.columns) + ['p-valor ajustado']
+
+def test_parallel_pairs_match_full_table():
+    data = random_baskets(rows=300, items=30, density=0.2)
+    expected = engine.all_pairs_to_frame(engine.calculate_all_pairs_metrics(data), min_support=1, min_chi2=1.0)
+    tiled = engine.calculate_all_pairs_parallel(data, min_support=1, min_chi2=1.0, tile_size=7, n_workers=3)
+    expected = expected.sort_values(['Item 1', 'Item 2']).reset_index(drop=True)
+    tiled = tiled.sort_values(['Item 1', 'Item 2']).reset_index(drop=True)
+    pd.testing.assert_frame_equal(tiled, expected, check_dtype=False)
+
+@pytest.mark.parametrize('yates', [False, True])
+def test_all_pairs_match_single_pair_metrics(stored_baskets, yates):
+    items = list(stored_baskets.columns)
+    results = engine.calculate_all_pairs_metrics(stored_baskets, yates=yates)
+    assert results['items'] == items
+    for i, j in zip(*np.triu_indices(len(items), k=1)):
+        metrics = engine.calculate_metrics(stored_baskets, items[i], items[j], yates=yates)
+        for cell in 'abcd':
+            assert results[cell][i, j] == metrics[cell]
+        assert results['conf_1_to_2'][i, j] == pytest.approx(metrics['conf_1_to_2'])
+        assert results['conf_2_to_1'][i, j] == pytest.approx(metrics['conf_2_to_1'])
+        assert results['chi2_stat'][i, j] == pytest.approx(metrics['chi2_stat'])
+        assert results['p_value'][i, j] == pytest.approx(metrics['p_value'], rel=1e-9, abs=1e-300)
+        for factor in ('fd_1_1', 'fd_1_0', 'fd_0_1', 'fd_0_0'):
+            assert results[factor][i, j] == pytest.approx(metrics['dependency_factors'][factor])
+
+def test_all_pairs_are_symmetric(baskets):
+    results = engine.calculate_all_pairs_metrics(baskets)
+    np.testing.assert_allclose(results['chi2_stat'], results['chi2_stat'].T)
+    np.testing.assert_array_equal(results['a'], results['a'].T)
+    np.testing.assert_array_equal(results['b'], results['c'].T)
@@ -0,0 +1,37 @@
+import numpy as np
+
+import association_engine as engine
+from conftest import assert_same_counts, random_baskets
+from dataset_store import share_dataset
+
+def repeated_baskets():
+    """Transacciones con muchas filas repetidas"""
+    base = random_baskets(rows=30, items=10)
+    rng = np.random.default_rng(3)
+    return base.iloc[rng.integers(0, 30, 2000)].reset_index(drop=True)
+
+def test_dedup_counts_match_for_dense_and_sparse():
+    data = repeated_baskets()
+    expected = engine.counts_from_data(data)
+    for stored in (data, engine.to_sparse_transactions(data)):
+        compact = engine.deduplicate_transactions(stored)
+        assert compact['weights'].sum() == len(data)
+        assert len(compact['weights']) == len(data.drop_duplicates())
+        assert_same_counts(engine.counts_from_compact(compact), expected)
+
+def test_sparse_dedup_survives_signature_collisions(monkeypatch):
+    data = repeated_baskets()
+    # Todas las filas con la misma firma: debe usarse la agrupación exacta
+    monkeypatch.setattr(engine, '_row_signatures', lambda matrix: np.zeros(matrix.shape[0], dtype='V24'))
+    compact = engine.deduplicate_transactions(engine.to_sparse_transactions(data))
+    assert len(compact['weights']) == len(data.drop_duplicates())
+    assert_same_counts(engine.counts_from_compact(compact), engine.counts_from_data(data))
+
+def test_same_content_is_shared_and_read_only():
+    data = repeated_baskets()
+    first = share_dataset(data)
+    second = share_dataset(data.astype(np.int64))
+    assert first is second
+    assert not first.data.to_numpy().flags.writeable
+    assert_same_counts(first.counts(), engine.counts_from_data(data))
+    assert first.unique_transactions() == len(data.drop_duplicates())
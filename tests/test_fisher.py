@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from scipy.stats import fisher_exact
+
+import association_engine as engine
+from conftest import random_baskets
+
+def random_tables(count, seed=0):
+    rng = np.random.default_rng(seed)
+    tables = []
+    for _ in range(count):
+        n = int(rng.integers(1, 300))
+        tables.append(rng.multinomial(n, rng.dirichlet(np.ones(4) * rng.uniform(0.2, 3))))
+    # Márgenes vacíos, tablas simétricas y celdas grandes
+    tables += [[0, 0, 0, 5], [3, 0, 0, 0], [1, 1, 1, 1], [10, 0, 0, 10], [17, 27, 28, 41], [50, 1, 1, 50_000]]
+    return np.array(tables)
+
+def test_vectorised_fisher_matches_scipy():
+    tables = random_tables(1500)
+    expected = [fisher_exact([[a, b], [c, d]])[1] for a, b, c, d in tables]
+    np.testing.assert_allclose(engine.fisher_p_values(*tables.T), expected, rtol=1e-7, atol=1e-14)
+
+@pytest.mark.parametrize('max_p', [None, 0.05])
+def test_tiled_fisher_matches_full_table(max_p):
+    data = random_baskets(rows=400, items=40, density=0.1)
+    expected = engine.all_pairs_to_frame(
+        engine.calculate_all_pairs_metrics(data), min_support=1, max_p=max_p, fisher_min_expected=5
+    )
+    tiled = engine.calculate_all_pairs_parallel(
+        data, min_support=1, max_p=max_p, fisher_min_expected=5, tile_size=16
+    )
+    expected = expected.sort_values(['Item 1', 'Item 2']).reset_index(drop=True)
+    tiled = tiled.sort_values(['Item 1', 'Item 2']).reset_index(drop=True)
+    assert len(expected) > 0
+    assert expected[['Item 1', 'Item 2']].equals(tiled[['Item 1', 'Item 2']])
+    np.testing.assert_allclose(tiled['p-valor'], expected['p-valor'])
+    assert (tiled['Prueba'] == expected['Prueba']).all()
+
+def test_fisher_is_off_by_default():
+    data = random_baskets(rows=30, items=4, density=0.3)
+    metrics = engine.calculate_metrics(data, 'I0', 'I1')
+    assert metrics['test'] == 'Chi-cuadrado'
+    assert engine.calculate_metrics(data, 'I0', 'I1', fisher_min_expected=5)['test'] == 'Exacta de Fisher'
+
+    frame = engine.all_pairs_to_frame(engine.calculate_all_pairs_metrics(data))
+    assert 'Prueba' not in frame.columns
+    frame = engine.all_pairs_to_frame(engine.calculate_all_pairs_metrics(data), fisher_min_expected=5)
+    small = engine.minimum_expected(frame['a'], frame['b'], frame['c'], frame['d']) < 5
+    assert small.any()
+    assert list(frame['Prueba']) == ['Exacta de Fisher' if flag else 'Chi-cuadrado' for flag in small]
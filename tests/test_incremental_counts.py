@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+import association_engine as engine
+from conftest import assert_same_counts, random_baskets
+
+def test_append_matches_full_recount(stored_baskets):
+    new_rows = random_baskets(rows=37, items=12, seed=1)
+    counts = engine.counts_from_data(stored_baskets)
+    combined, counts = engine.append_transactions(stored_baskets, counts, new_rows)
+    assert len(combined) == len(stored_baskets) + 37
+    assert_same_counts(counts, engine.counts_from_data(combined))
+
+def test_remove_matches_full_recount(stored_baskets):
+    counts = engine.counts_from_data(stored_baskets)
+    remaining, counts = engine.remove_transactions(stored_baskets, counts, stored_baskets.index[5:60])
+    assert_same_counts(counts, engine.counts_from_data(remaining))
+
+def test_new_version_applies_only_the_differences(stored_baskets):
+    dense = engine.preview_data(stored_baskets, len(stored_baskets)).copy()
+    dense.iloc[3, 2] = 1 - dense.iloc[3, 2]
+    dense.iloc[250, 0] = 1 - dense.iloc[250, 0]
+    dense = dense.drop(index=[10, 11])
+    dense = pd.concat([dense, random_baskets(rows=3, items=12, seed=2).set_axis([900, 901, 902])])
+    new = engine.to_sparse_transactions(dense).set_axis(dense.index) if engine.is_sparse_data(stored_baskets) else dense
+
+    added, removed = engine.diff_transactions(stored_baskets, new, block_rows=64)
+    assert sorted(added.index) == [3, 250, 900, 901, 902]
+    assert sorted(removed.index) == [3, 10, 11, 250]
+
+    counts = engine.counts_from_data(stored_baskets)
+    counts = engine.update_counts_for_new_version(engine.copy_count_state(counts), stored_baskets, new)
+    assert_same_counts(counts, engine.counts_from_data(new))
+
+def test_chunked_ingestion_matches_counts_from_data(baskets, tmp_path):
+    path = tmp_path / "ventas.csv"
+    baskets.to_csv(path, index=False)
+    counts = engine.ingest_file_counts(str(path), chunk_rows=57)
+    assert_same_counts(counts, engine.counts_from_data(baskets))
+
+def test_all_pairs_from_counts_matches_direct_metrics(baskets):
+    expected = engine.calculate_all_pairs_metrics(baskets, yates=True)
+    blocks = []
+    results = engine.calculate_all_pairs_from_counts(
+        engine.counts_from_data(baskets), yates=True, progress=lambda done, total: blocks.append((done, total)),
+        block_rows=5
+    )
+    assert blocks == [(1, 3), (2, 3), (3, 3)]
+    assert set(results) == set(expected)
+    assert results['items'] == expected['items']
+    for key, value in expected.items():
+        if key != 'items':
+            np.testing.assert_allclose(results[key], value, err_msg=key)
+
+def _long_rows(data):
+    """Filas (ticket, sku) de las transacciones con al menos un item"""
+    tickets, items = np.nonzero(data.to_numpy())
+    return pd.DataFrame({'ticket': [f"T{t}" for t in tickets], 'sku': data.columns[items]})
+
+def _reordered(counts, items):
+    """Conteos con los items en el orden indicado"""
+    order = [counts['items'].index(item) for item in items]
+    return {
+        'items': list(items),
+        'cooccurrence': counts['cooccurrence'][np.ix_(order, order)],
+        'item_counts': counts['item_counts'][order],
+        'n': counts['n']
+    }
+
+def test_long_ingestion_of_contiguous_tickets(baskets, tmp_path):
+    rows = _long_rows(baskets)
+    path = tmp_path / "tickets.csv"
+    rows.to_csv(path, index=False)
+    counts = engine.ingest_long_file_counts(str(path), 'ticket', 'sku', chunk_rows=53)
+    expected = engine.counts_from_data(engine.long_to_sparse_transactions(rows, 'ticket', 'sku'))
+    assert_same_counts(counts, expected)
+
+def test_long_ingestion_of_unsorted_tickets(tmp_path):
+    data = random_baskets(rows=300, items=10, density=0.5, seed=3)
+    rows = _long_rows(data).sample(frac=1, random_state=0)
+    path = tmp_path / "tickets.csv"
+    rows.to_csv(path, index=False)
+    expected = engine.counts_from_data(engine.long_to_sparse_transactions(rows, 'ticket', 'sku'))
+    assert expected['n'] == int((data.sum(axis=1) > 0).sum())
+
+    counts = engine.ingest_long_file_counts(str(path), 'ticket', 'sku', chunk_rows=97)
+    assert_same_counts(_reordered(counts, expected['items']), expected)
+
+    base = engine.counts_from_data(data.iloc[:20])
+    counts = engine.ingest_long_file_counts(str(path), 'ticket', 'sku', chunk_rows=97, counts=engine.copy_count_state(base))
+    assert counts['n'] == 20 + expected['n']
+    np.testing.assert_array_equal(
+        _reordered(counts, list(data.columns))['cooccurrence'],
+        base['cooccurrence'] + _reordered(expected, list(data.columns))['cooccurrence']
+    )
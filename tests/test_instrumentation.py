@@ -0,0 +1,32 @@
+import json
+
+from instrumentation import span, spans_to_json, spans_to_prometheus, start_recording, stop_recording, timed
+
+@timed('Etapa decorada')
+def decorated(value):
+    return value * 2
+
+def test_spans_are_only_recorded_while_recording():
+    with span('Fuera de grabación') as record:
+        assert record is None
+    assert decorated(2) == 4
+    start_recording()
+    with span('Externa', rows=10):
+        with span('Interna'):
+            decorated(1)
+    spans = stop_recording()
+    assert [(record['name'], record['depth']) for record in spans] == [
+        ('Externa', 0), ('Interna', 1), ('Etapa decorada', 2)
+    ]
+    assert all(record['seconds'] >= 0 for record in spans)
+    assert stop_recording() == []
+
+def test_exports_summarize_by_stage():
+    start_recording()
+    for _ in range(2):
+        with span('Conteos', rows=5):
+            pass
+    spans = stop_recording()
+    stages = json.loads(spans_to_json(spans))['stages']
+    assert stages == [{**stages[0], 'stage': 'Conteos', 'calls': 2, 'rows': 10}]
+    assert 'stage="Conteos"' in spans_to_prometheus(spans)
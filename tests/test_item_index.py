@@ -0,0 +1,41 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import association_engine as engine
+from conftest import random_baskets
+
+@pytest.fixture(params=['dense', 'sparse'])
+def indexed(request):
+    # Densidades muy distintas: items con arreglos de posiciones y con bitmaps
+    data = random_baskets(rows=3000, items=10, density=0.6)
+    data['I9'] = 0
+    data.loc[::500, 'I9'] = 1
+    stored = engine.to_sparse_transactions(data) if request.param == 'sparse' else data
+    return data, engine.build_item_index(stored)
+
+def test_uses_both_posting_formats(indexed):
+    _, index = indexed
+    formats = {engine._is_bitmap(posting) for posting in index['postings']}
+    assert formats == {True, False}
+
+def test_support_matches_brute_force(indexed):
+    data, index = indexed
+    for itemset in itertools.chain(itertools.combinations(data.columns, 2), itertools.combinations(data.columns, 3)):
+        expected = int(data[list(itemset)].all(axis=1).sum())
+        assert engine.index_support(index, itemset) == expected, itemset
+
+def test_pair_metrics_match_counts(indexed):
+    data, index = indexed
+    counts = engine.counts_from_data(data)
+    assert engine.index_pair_counts(index, 'I0', 'I9') == engine.pair_counts_from_state(counts, 'I0', 'I9')
+    from_index = engine.calculate_metrics_from_index(index, 'I1', 'I2')
+    from_counts = engine.calculate_metrics_from_counts(counts, 'I1', 'I2')
+    assert from_index['chi2_stat'] == pytest.approx(from_counts['chi2_stat'])
+
+def test_itemsets_from_index_match_the_default_layout(indexed):
+    data, index = indexed
+    expected = engine.mine_frequent_itemsets(data, 0.2, 3)
+    assert engine.mine_frequent_itemsets(index, 0.2, 3) == expected
+    assert np.all(np.array(list(expected.values())) >= 0.2 * len(data))
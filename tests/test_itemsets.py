@@ -0,0 +1,60 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import association_engine as engine
+from conftest import random_baskets
+
+def brute_force_itemsets(data, min_support, max_length=None):
+    """Todos los subconjuntos de items con su soporte, sin poda"""
+    min_count = max(1, int(np.ceil(min_support * len(data))))
+    values = data.to_numpy().astype(bool)
+    items = list(data.columns)
+    itemsets = {}
+    for size in range(1, (max_length or len(items)) + 1):
+        for columns in itertools.combinations(range(len(items)), size):
+            count = int(values[:, list(columns)].all(axis=1).sum())
+            if count >= min_count:
+                itemsets[tuple(sorted(items[j] for j in columns))] = count
+    return itemsets
+
+@pytest.fixture(scope='module')
+def small_dense():
+    return random_baskets(rows=200, items=8, density=0.9, seed=5)
+
+@pytest.mark.parametrize('layout', ['auto', 'tidlist', 'bitset', 'index'])
+@pytest.mark.parametrize('min_support', [0.05, 0.2])
+def test_eclat_matches_brute_force(small_dense, layout, min_support):
+    expected = brute_force_itemsets(small_dense, min_support)
+    assert max(len(itemset) for itemset in expected) >= 3
+    assert engine.mine_frequent_itemsets(small_dense, min_support, layout=layout) == expected
+
+def test_eclat_on_sparse_storage_and_max_length(small_dense):
+    sparse = engine.to_sparse_transactions(small_dense)
+    expected = brute_force_itemsets(small_dense, 0.1, max_length=2)
+    assert engine.mine_frequent_itemsets(sparse, 0.1, max_length=2) == expected
+
+def test_rules_use_the_itemset_supports(small_dense):
+    itemsets = engine.mine_frequent_itemsets(small_dense, 0.1, max_length=3)
+    n = len(small_dense)
+    rules = engine.generate_itemset_rules(itemsets, n, min_confidence=0.3)
+    assert rules
+    for rule in rules:
+        both = small_dense[list(rule['antecedent'] + rule['consequent'])].all(axis=1).sum()
+        antecedent = small_dense[list(rule['antecedent'])].all(axis=1).sum()
+        consequent = small_dense[list(rule['consequent'])].all(axis=1).sum()
+        assert rule['confidence'] == pytest.approx(both / antecedent)
+        assert rule['confidence'] >= 0.3
+        assert rule['coverage'] == pytest.approx(both / n)
+        assert rule['dependency_factor'] == pytest.approx(n * both / (antecedent * consequent))
+    confidences = [rule['confidence'] for rule in rules]
+    assert confidences == sorted(confidences, reverse=True)
+
+def test_pair_rules_match_single_pair_view(small_dense):
+    itemsets = engine.mine_frequent_itemsets(small_dense, 0.0, max_length=2)
+    rules = engine.generate_itemset_rules(itemsets, len(small_dense), min_confidence=0.0)
+    rule = next(rule for rule in rules if rule['antecedent'] == ('I0',) and rule['consequent'] == ('I1',))
+    metrics = engine.calculate_metrics(small_dense, 'I0', 'I1')
+    assert rule['confidence'] == pytest.approx(metrics['conf_1_to_2'])
+    assert rule['dependency_factor'] == pytest.approx(metrics['dependency_factors']['fd_1_1'])
@@ -0,0 +1,96 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import association_engine as engine
+from conftest import random_baskets
+from job_runner import CANCELLED, DONE, FAILED, JobCancelled, JobRunner, result_nbytes
+
+def wait_for(job, timeout=10):
+    deadline = time.time() + timeout
+    while not job.is_finished and time.time() < deadline:
+        time.sleep(0.01)
+    assert job.is_finished
+
+def blocking(release, blocks=1000):
+    """Trabajo que reporta avance hasta que se libera el evento"""
+    def run(progress):
+        for done in range(blocks):
+            progress(done, blocks)
+            if release.wait(0.005):
+                return 'listo'
+        return 'listo'
+    return run
+
+def test_same_key_runs_once_and_shares_the_job():
+    runner = JobRunner()
+    release = threading.Event()
+    first = runner.submit('k', 'x', blocking(release))
+    second = runner.submit('k', 'x', blocking(release))
+    assert first is second and first.subscribers == 2
+    release.set()
+    wait_for(first)
+    assert first.status == DONE and first.result == 'listo'
+
+def test_cancel_stops_only_when_nobody_waits():
+    runner = JobRunner()
+    release = threading.Event()
+    job = runner.submit('k', 'x', blocking(release))
+    runner.submit('k', 'x', blocking(release))
+    runner.cancel(job.id)
+    time.sleep(0.05)
+    assert not job.is_finished
+    runner.cancel(job.id)
+    wait_for(job)
+    assert job.status == CANCELLED
+    assert runner.submit('k', 'x', lambda progress: 1) is not job
+
+def test_errors_are_reported():
+    runner = JobRunner()
+    job = runner.submit('k', 'x', lambda progress: 1 / 0)
+    wait_for(job)
+    assert job.status == FAILED and 'division' in job.error
+
+def test_release_forgets_collected_results():
+    runner = JobRunner()
+    job = runner.submit('k', 'x', lambda progress: np.zeros(10))
+    runner.submit('k', 'x', None)  # segunda sesión suscrita
+    wait_for(job)
+    runner.release(job.id)
+    assert runner.get(job.id) is job and job.result is not None
+    runner.release(job.id)
+    assert runner.get(job.id) is None and job.result is None
+
+def test_uncollected_results_are_bounded_by_bytes():
+    runner = JobRunner(max_result_bytes=3 * np.zeros(1000).nbytes)
+    jobs = []
+    for key in range(5):
+        jobs.append(runner.submit(key, 'x', lambda progress: np.zeros(1000)))
+        wait_for(jobs[-1])
+    kept = [runner.get(job.id) is not None for job in jobs]
+    assert kept == [False, False, True, True, True]
+    assert all(job.result is None for job in jobs[:2])
+
+def test_result_nbytes_counts_nested_results():
+    frame = random_baskets(rows=10, items=3)
+    assert result_nbytes({'a': np.zeros(4), 'b': [frame]}) == 32 + frame.memory_usage(index=True).sum()
+
+@pytest.mark.parametrize('compute', [
+    lambda counts, progress: engine.calculate_all_pairs_from_counts(counts, progress=progress, block_rows=2),
+    lambda counts, progress: engine.calculate_all_pairs_parallel(counts, tile_size=2, progress=progress),
+    lambda counts, progress: engine.rank_top_pairs(counts, k=5, tile_size=2, progress=progress),
+])
+def test_whole_catalogue_analyses_can_be_cancelled(compute):
+    counts = engine.counts_from_data(random_baskets(rows=100, items=12))
+    seen = []
+
+    def progress(done, total):
+        seen.append(done)
+        if done == 2:
+            raise JobCancelled()
+
+    with pytest.raises(JobCancelled):
+        compute(counts, progress)
+    assert seen[-1] == 2
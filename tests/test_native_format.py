@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+import association_engine as engine
+from conftest import assert_same_counts, random_baskets
+from dataset_store import share_native_dataset
+from result_cache import dataset_fingerprint
+
+@pytest.mark.parametrize('layout', ['uint8', 'bits'])
+def test_round_trip_keeps_rows_and_counts(stored_baskets, layout, tmp_path):
+    path = tmp_path / f"ventas{engine.NATIVE_EXTENSION}"
+    written = engine.write_native_dataset(
+        stored_baskets, path, layout=layout, fingerprint=dataset_fingerprint(stored_baskets), block_rows=33
+    )
+    expected = engine.counts_from_data(stored_baskets)
+    assert_same_counts(written, expected)
+
+    native = engine.open_native_dataset(path)
+    assert native['layout'] == layout and native['n'] == len(stored_baskets)
+    assert_same_counts(native['counts'], expected)
+    frame = engine.native_to_frame(native, block_rows=41)
+    np.testing.assert_array_equal(
+        engine.transactions_to_csc(frame).toarray(), engine.transactions_to_csc(stored_baskets).toarray()
+    )
+    assert dataset_fingerprint(frame) == native['fingerprint']
+
+def test_bit_rows_from_csr_match_packbits(tmp_path):
+    data = random_baskets(rows=200, items=21, density=0.1)
+    path = tmp_path / f"ventas{engine.NATIVE_EXTENSION}"
+    engine.write_native_dataset(engine.to_sparse_transactions(data), path, layout='bits')
+    native = engine.open_native_dataset(path)
+    np.testing.assert_array_equal(np.asarray(native['matrix']), np.packbits(data.to_numpy() == 1, axis=1))
+
+def test_file_readers_use_the_native_format(baskets, tmp_path):
+    path = str(tmp_path / f"ventas{engine.NATIVE_EXTENSION}")
+    engine.write_native_dataset(baskets, path)
+    assert_same_counts(engine.ingest_file_counts(path), engine.counts_from_data(baskets))
+    chunks = list(engine.iter_file_chunks(path, chunk_rows=150))
+    assert [len(chunk) for chunk in chunks] == [150, 150, 100]
+    assert engine.load_transactions(path).equals(baskets)
+    shared = share_native_dataset(path)
+    assert_same_counts(shared.counts(), engine.counts_from_data(baskets))
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "otro.chsq"
+    path.write_bytes(b"no es un archivo nativo")
+    with pytest.raises(ValueError):
+        engine.open_native_dataset(path)
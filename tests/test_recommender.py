@@ -0,0 +1,76 @@
+import json
+import threading
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+import association_engine as engine
+import run_recommender
+from conftest import random_baskets
+from recommender import RECOMMENDATION_METRICS, Recommender, build_rule_index
+
+@pytest.fixture
+def counts():
+    return engine.counts_from_data(random_baskets(rows=2000, items=25, density=0.4))
+
+@pytest.mark.parametrize('metric', list(RECOMMENDATION_METRICS))
+def test_index_keeps_the_best_positive_rules(counts, metric):
+    index = build_rule_index(counts, metric=metric, top_consequents=4, block_rows=7)
+    stats = engine.calculate_all_pairs_from_counts(counts)
+    for row in range(len(counts['items'])):
+        values = np.where((stats['a'][row] >= 1) & (stats['fd_1_1'][row] >= 1.0), stats[RECOMMENDATION_METRICS[metric]][row], -np.inf)
+        values[row] = -np.inf
+        expected = np.sort(values[np.isfinite(values)])[::-1][:4]
+        np.testing.assert_allclose(index['score'][row][index['consequents'][row] >= 0], expected)
+
+def test_recommendations_merge_the_basket_rules(counts):
+    index = build_rule_index(counts, top_consequents=5)
+    basket = ['I1', 'I2', 'I3']
+    best = {}
+    for item in basket:
+        row = index['positions'][item]
+        for consequent, score in zip(index['consequents'][row], index['score'][row]):
+            name = index['items'][consequent]
+            if consequent >= 0 and name not in basket:
+                best[name] = max(best.get(name, -np.inf), score)
+    recommendations = Recommender(index).recommend(basket, 4)
+    assert [rec['score'] for rec in recommendations] == sorted(best.values(), reverse=True)[:4]
+    assert all(rec['antecedent'] in basket and rec['item'] not in basket for rec in recommendations)
+
+def test_lru_ignores_basket_order_and_evicts_oldest(counts):
+    recommender = Recommender(build_rule_index(counts), cache_size=2)
+    first = recommender.recommend(['I1', 'I2'], 3)
+    assert recommender.recommend(['I2', 'I1', 'I1'], 3) == first
+    assert recommender.stats()['hits'] == 1
+    recommender.recommend(['I3'], 3)
+    recommender.recommend(['I4'], 3)
+    assert recommender.stats()['cached_baskets'] == 2
+    recommender.recommend(['I1', 'I2'], 3)
+    assert recommender.stats()['misses'] == 4
+
+def test_unknown_items_are_ignored(counts):
+    recommender = Recommender(build_rule_index(counts))
+    assert recommender.recommend(['no existe'], 3) == []
+
+def test_http_service(counts):
+    recommender = Recommender(build_rule_index(counts))
+    server = ThreadingHTTPServer(('127.0.0.1', 0), run_recommender.make_handler(recommender))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with urllib.request.urlopen(f"{url}/recommend?item=I1&item=I2&n=3") as response:
+            by_get = json.load(response)
+        request = urllib.request.Request(
+            f"{url}/recommend", data=json.dumps({'items': ['I1', 'I2'], 'n': 3}).encode(), method='POST'
+        )
+        with urllib.request.urlopen(request) as response:
+            by_post = json.load(response)
+        with urllib.request.urlopen(f"{url}/health") as response:
+            health = json.load(response)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert by_get['recommendations'] == by_post['recommendations'] == recommender.recommend(['I1', 'I2'], 3)
+    assert health['status'] == 'ok' and health['items'] == 25
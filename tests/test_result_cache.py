@@ -0,0 +1,84 @@
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import association_engine as engine
+from result_cache import ResultCache, dataset_fingerprint, make_key
+
+def test_fingerprint_ignores_storage_format(baskets):
+    assert dataset_fingerprint(baskets) == dataset_fingerprint(engine.to_sparse_transactions(baskets))
+    assert dataset_fingerprint(baskets) == dataset_fingerprint(baskets.astype(np.int64))
+
+def test_fingerprint_changes_with_content(baskets):
+    edited = baskets.copy()
+    edited.iloc[0, 0] = 1 - edited.iloc[0, 0]
+    assert dataset_fingerprint(edited) != dataset_fingerprint(baskets)
+    counts = engine.counts_from_data(baskets)
+    assert dataset_fingerprint(counts) == dataset_fingerprint(engine.copy_count_state(counts))
+
+def test_make_key_depends_on_every_part():
+    assert make_key('huella', 'all_pairs', True) == make_key('huella', 'all_pairs', True)
+    assert make_key('huella', 'all_pairs', True) != make_key('huella', 'all_pairs', False)
+
+def test_values_are_independent_copies():
+    cache = ResultCache()
+    cache.put('k', {'a': np.arange(3)})
+    cache.get('k')['a'][0] = 99
+    assert cache.get('k')['a'][0] == 0
+
+def test_evicts_least_recently_used_within_byte_limit():
+    value = np.zeros(1000)
+    size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    cache = ResultCache(max_bytes=3 * size)
+    for key in ('a', 'b', 'c'):
+        cache.put(key, value)
+    cache.get('a')  # 'a' pasa a ser el más reciente
+    cache.put('d', value)
+    assert cache.get('b') is None
+    assert all(cache.get(key) is not None for key in ('a', 'c', 'd'))
+    assert cache.stats()['bytes'] <= cache.max_bytes
+
+def test_values_larger_than_the_limit_are_not_kept():
+    cache = ResultCache(max_bytes=100)
+    cache.put('big', np.zeros(1000))
+    assert cache.get('big') is None and cache.stats()['entries'] == 0
+
+def test_disk_level_survives_a_new_cache(tmp_path):
+    ResultCache(disk_dir=str(tmp_path)).put('k', [1, 2, 3])
+    assert ResultCache(disk_dir=str(tmp_path)).get('k') == [1, 2, 3]
+
+def test_get_or_compute_runs_once():
+    cache = ResultCache()
+    calls = []
+    for _ in range(3):
+        cache.get_or_compute('k', lambda: calls.append(1) or 'valor')
+    assert len(calls) == 1
+
+def test_disk_level_evicts_least_recently_used(tmp_path):
+    value = np.zeros(1000)
+    size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    cache = ResultCache(disk_dir=str(tmp_path), max_disk_bytes=3 * size)
+    for age, key in enumerate(('a', 'b', 'c')):
+        cache.put(key, value)
+        os.utime(tmp_path / f"{key}.pkl", (1000 + age, 1000 + age))
+    # Una lectura desde disco (con la memoria vacía) renueva la fecha de 'a'
+    cache.clear()
+    assert cache.get('a') is not None
+    cache.put('d', value)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['a.pkl', 'c.pkl', 'd.pkl']
+    assert cache.stats()['disk_bytes'] <= cache.max_disk_bytes
+
+def test_values_larger_than_the_disk_limit_are_not_written(tmp_path):
+    cache = ResultCache(disk_dir=str(tmp_path), max_disk_bytes=100)
+    cache.put('big', np.zeros(1000))
+    assert list(tmp_path.iterdir()) == []
+
+def test_hit_and_miss_counts_from_several_threads():
+    cache = ResultCache()
+    cache.put('k', 1)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda i: cache.get('k' if i % 2 else 'otro'), range(2000)))
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (1000, 1000)
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+import association_engine as engine
+
+ROWS = 40_000
+
+def within(observed, expected, rows, sigmas=5):
+    """Una proporción observada cae dentro de unas desviaciones estándar de la esperada"""
+    return abs(observed - expected) <= sigmas * np.sqrt(expected * (1 - expected) / rows)
+
+def test_shapes_names_and_values():
+    dense = engine.generate_synthetic_baskets(5, 1234, seed=1, chunk_size=500, item_names=list('ABCDE'))
+    assert dense.shape == (1234, 5)
+    assert list(dense.columns) == list('ABCDE')
+    assert set(np.unique(dense.to_numpy())) <= {0, 1}
+
+    sparse = engine.generate_synthetic_baskets(5, 1234, seed=1, chunk_size=500, item_names=list('ABCDE'), sparse=True)
+    assert engine.is_sparse_data(sparse)
+    np.testing.assert_array_equal(engine.preview_data(sparse, 1234).to_numpy(), dense.to_numpy())
+
+def test_same_seed_same_baskets():
+    first = engine.generate_synthetic_baskets(6, 500, seed=7)
+    assert first.equals(engine.generate_synthetic_baskets(6, 500, seed=7))
+    assert not first.equals(engine.generate_synthetic_baskets(6, 500, seed=8))
+
+def test_independent_items_follow_base_probabilities():
+    probs = [0.05, 0.2, 0.5, 0.8]
+    data = engine.generate_synthetic_baskets(4, ROWS, base_probs=probs, seed=2, chunk_size=7_000)
+    for observed, expected in zip(data.mean(), probs):
+        assert within(observed, expected, ROWS)
+
+def test_dependencies_raise_the_conditional_probability():
+    items = ['Pan', 'Mantequilla', 'Mermelada', 'Leche']
+    probs = [0.4, 0.2, 0.1, 0.3]
+    dependencies = {('Pan', 'Mantequilla'): 2.0, ('Mantequilla', 'Mermelada'): 3.0}
+    data = engine.generate_synthetic_baskets(
+        4, ROWS, base_probs=probs, dependencies=dependencies, seed=3, item_names=items
+    )
+    pan = data['Pan'] == 1
+    butter = data['Mantequilla'] == 1
+    assert within(data.loc[pan, 'Mantequilla'].mean(), 0.4, pan.sum())
+    assert within(data.loc[~pan, 'Mantequilla'].mean(), 0.2, (~pan).sum())
+    # Dependencia encadenada: Mermelada depende de Mantequilla, que depende de Pan
+    assert within(data.loc[butter, 'Mermelada'].mean(), 0.3, butter.sum())
+    assert within(data.loc[~butter, 'Mermelada'].mean(), 0.1, (~butter).sum())
+    # Los items sin dependencias quedan independientes
+    metrics = engine.calculate_metrics(data, 'Pan', 'Leche')
+    assert metrics['dependency_factors']['fd_1_1'] == pytest.approx(1.0, abs=0.05)
+
+def test_lift_matrix_equals_dictionary():
+    lifts = np.ones((3, 3))
+    lifts[0, 2] = 2.5
+    from_matrix = engine.generate_synthetic_baskets(3, 2000, base_probs=0.2, dependencies=lifts, seed=4)
+    from_dict = engine.generate_synthetic_baskets(3, 2000, base_probs=0.2, dependencies={(0, 2): 2.5}, seed=4)
+    assert from_matrix.equals(from_dict)
+
+def test_probabilities_are_capped():
+    data = engine.generate_synthetic_baskets(
+        2, ROWS, base_probs=[0.9, 0.6], dependencies={(0, 1): 10.0}, seed=5
+    )
+    present = data.iloc[:, 0] == 1
+    assert within(data.loc[present].iloc[:, 1].mean(), engine.MAX_ITEM_PROBABILITY, present.sum())
+
+def test_unknown_dependency_item():
+    with pytest.raises(ValueError):
+        engine.generate_synthetic_baskets(3, 10, dependencies={('Item_1', 'Otro'): 2.0})
+
+def test_parse_dependencies():
+    text = "Pan, Mantequilla, 2\n\n Queso ,Jamón, 1.5 "
+    assert engine.parse_dependencies(text) == {('Pan', 'Mantequilla'): 2.0, ('Queso', 'Jamón'): 1.5}
+    with pytest.raises(ValueError, match="Línea 1"):
+        engine.parse_dependencies("Pan, Mantequilla")
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+import association_engine as engine
+from conftest import random_baskets
+
+@pytest.fixture(scope='module')
+def catalogue():
+    return random_baskets(rows=500, items=45, density=0.3, seed=11)
+
+def full_sort(data, metric, k, min_support=1, min_coverage=0.0):
+    frame = engine.all_pairs_to_frame(engine.calculate_all_pairs_metrics(data), min_support=min_support)
+    frame = frame[(frame['Cobertura 1'] >= min_coverage) & (frame['Cobertura 2'] >= min_coverage)]
+    return frame.sort_values(metric, ascending=False, kind='stable').head(k)
+
+@pytest.mark.parametrize('source_type', ['data', 'sparse', 'counts'])
+def test_top_pairs_match_a_full_sort(catalogue, source_type):
+    source = {
+        'data': catalogue,
+        'sparse': engine.to_sparse_transactions(catalogue),
+        'counts': engine.counts_from_data(catalogue)
+    }[source_type]
+    top = engine.rank_top_pairs(source, k=25, tile_size=8, n_workers=3)
+    full = engine.all_pairs_to_frame(engine.calculate_all_pairs_metrics(catalogue)).set_index(['Item 1', 'Item 2'])
+    assert set(top) == set(engine.RANKING_METRICS)
+    for metric, frame in top.items():
+        expected = full_sort(catalogue, metric, 25)
+        assert len(frame) == 25
+        np.testing.assert_allclose(frame[metric].to_numpy(), expected[metric].to_numpy(), err_msg=metric)
+        # Cada par del ranking tiene las mismas métricas que en la tabla completa
+        for _, row in frame.iterrows():
+            assert full.loc[(row['Item 1'], row['Item 2']), 'Chi²'] == pytest.approx(row['Chi²'])
+
+def test_top_pairs_apply_the_filters(catalogue):
+    top = engine.rank_top_pairs(catalogue, k=10, metrics=('FD(1,1)',), min_support=40, min_coverage=0.1, tile_size=16)
+    frame = top['FD(1,1)']
+    expected = full_sort(catalogue, 'FD(1,1)', 10, min_support=40, min_coverage=0.1)
+    np.testing.assert_allclose(frame['FD(1,1)'].to_numpy(), expected['FD(1,1)'].to_numpy())
+    assert (frame['a'] >= 40).all()
+    assert ((frame['Cobertura 1'] >= 0.1) & (frame['Cobertura 2'] >= 0.1)).all()
+
+def test_k_larger_than_the_number_of_pairs():
+    data = random_baskets(rows=50, items=4)
+    top = engine.rank_top_pairs(data, k=100, metrics=('Chi²',), min_support=0)
+    assert len(top['Chi²']) == 6
+    assert top['Chi²']['Chi²'].is_monotonic_decreasing
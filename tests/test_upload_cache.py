@@ -0,0 +1,46 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+import association_engine as engine
+from conftest import assert_same_counts, random_baskets
+from upload_cache import UploadCache, read_excel_binary
+
+def excel_bytes(frame):
+    buffer = io.BytesIO()
+    frame.to_excel(buffer, index=False)
+    buffer.seek(0)
+    return buffer
+
+def test_streaming_reader_matches_binarize_data():
+    raw = random_baskets(rows=120, items=6).astype(object)
+    raw.iloc[0, 0] = 3
+    raw.iloc[1, 1] = None
+    data, report = read_excel_binary(excel_bytes(raw), 'ventas.xlsx', chunk_rows=50)
+    expected, expected_report = engine.binarize_data(pd.read_excel(excel_bytes(raw)))
+    np.testing.assert_array_equal(data.to_numpy(), expected.to_numpy())
+    assert list(report['Convertida']) == list(expected_report['Convertida'])
+
+def test_second_upload_reuses_the_converted_file(tmp_path):
+    data = random_baskets(rows=120, items=6)
+    cache = UploadCache(str(tmp_path))
+    native, _, error = cache.convert(excel_bytes(data), 'ventas.xlsx')
+    assert error is None
+    assert_same_counts(native['counts'], engine.counts_from_data(data.set_axis(native['items'], axis=1)))
+    again, _, _ = cache.convert(excel_bytes(data), 'ventas.xlsx')
+    assert again['fingerprint'] == native['fingerprint']
+    assert cache.stats()['hits'] == 1 and cache.stats()['files'] == 1
+
+def test_invalid_upload_is_not_stored(tmp_path):
+    cache = UploadCache(str(tmp_path))
+    native, _, error = cache.convert(excel_bytes(random_baskets(rows=3, items=6)), 'ventas.xlsx')
+    assert native is None and error
+    assert cache.stats()['files'] == 0
+
+def test_eviction_keeps_the_folder_under_its_limit(tmp_path):
+    cache = UploadCache(str(tmp_path), max_bytes=1)
+    for seed in range(3):
+        cache.convert(excel_bytes(random_baskets(rows=50, items=6, seed=seed)), 'ventas.xlsx')
+    # Solo queda el último archivo (el que se acaba de escribir nunca se borra)
+    assert cache.stats()['files'] == 1
@@ -0,0 +1,221 @@
+"""
+Conversión de los archivos Excel subidos a la app, una sola vez por archivo.
+
+Cada archivo se identifica por el hash de sus bytes: la primera vez se lee
+en modo de solo lectura (openpyxl, fila por fila), se binariza por bloques y
+se guarda en el formato nativo (.chsq) en una carpeta local. Si alguien vuelve
+a subir el mismo archivo, se abre el .chsq con mmap y no se lee el Excel. La
+carpeta tiene un límite de bytes y se borran primero los archivos usados hace
+más tiempo.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+from association_engine import (
+    NATIVE_EXTENSION, binarize_data, maybe_sparsify, open_native_dataset, validate_data, write_native_dataset
+)
+from result_cache import dataset_fingerprint
+
+# Límite por defecto de la carpeta de archivos convertidos
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+# Filas de Excel que se binarizan juntas (acota la memoria de la lectura)
+EXCEL_CHUNK_ROWS = 50_000
+# Carpeta por defecto (se puede cambiar con la variable de entorno UPLOAD_CACHE_DIR)
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "chicuadrado_uploads")
+_HASH_CHUNK_BYTES = 8 * 1024 * 1024
+
+def upload_digest(file):
+    """Hash (blake2b) de los bytes de un archivo abierto o subido; deja el cursor al inicio"""
+    digest = hashlib.blake2b(digest_size=20)
+    file.seek(0)
+    for chunk in iter(lambda: file.read(_HASH_CHUNK_BYTES), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+def _column_names(header):
+    """Nombres de columna como los pone pd.read_excel: 'Unnamed: i' si faltan y '.1', '.2' si se repiten"""
+    names = []
+    seen = {}
+    for position, name in enumerate(header):
+        name = f"Unnamed: {position}" if name is None else name
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+def iter_excel_chunks(file, chunk_rows=EXCEL_CHUNK_ROWS):
+    """
+    Lee la primera hoja de un .xlsx por bloques de filas (DataFrames).
+
+    Usa openpyxl en modo de solo lectura, que recorre el XML de la hoja sin
+    construir el libro completo en memoria. La primera fila son los nombres
+    de los items; las filas vacías se omiten.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = _column_names(header)
+        width = len(columns)
+        block = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            block.append(row[:width] + (None,) * (width - len(row)))
+            if len(block) == chunk_rows:
+                yield pd.DataFrame(block, columns=columns)
+                block = []
+        if block:
+            yield pd.DataFrame(block, columns=columns)
+    finally:
+        workbook.close()
+
+def read_excel_binary(file, name, chunk_rows=EXCEL_CHUNK_ROWS):
+    """
+    Lee y binariza un archivo Excel por bloques.
+
+    Cada bloque se convierte a uint8 (binarize_data) en cuanto se lee, así que
+    nunca se guarda la hoja completa con sus valores originales. Los .xls
+    (formato antiguo) no se pueden leer en modo streaming y se leen con
+    pd.read_excel. Devuelve (datos_binarios, reporte) como binarize_data.
+    """
+    if os.path.splitext(name)[1].lower() != '.xlsx':
+        file.seek(0)
+        return binarize_data(pd.read_excel(file))
+
+    blocks = []
+    report = None
+    for chunk in iter_excel_chunks(file, chunk_rows):
+        binary, chunk_report = binarize_data(chunk)
+        blocks.append(binary.to_numpy())
+        if report is None:
+            report = chunk_report
+        else:
+            report['Valores no binarios'] += chunk_report['Valores no binarios'].to_numpy()
+            report['Valores nulos'] += chunk_report['Valores nulos'].to_numpy()
+            report['Convertida'] |= chunk_report['Convertida'].to_numpy()
+    if report is None:
+        return pd.DataFrame(), pd.DataFrame(columns=['Item', 'Valores no binarios', 'Valores nulos', 'Convertida'])
+    return pd.DataFrame(np.concatenate(blocks), columns=list(report['Item'])), report
+
+def _report_to_metadata(report):
+    """Columnas convertidas del reporte, en un formato que se puede guardar como JSON"""
+    converted = report[report['Convertida']]
+    return [
+        {'Item': str(row['Item']), 'Valores no binarios': int(row['Valores no binarios']),
+         'Valores nulos': int(row['Valores nulos'])}
+        for _, row in converted.iterrows()
+    ]
+
+def converted_columns(native):
+    """Reporte de columnas convertidas guardado en un archivo nativo (DataFrame, puede estar vacío)"""
+    converted = native['metadata'].get('converted', [])
+    return pd.DataFrame(converted, columns=['Item', 'Valores no binarios', 'Valores nulos']).assign(Convertida=True)
+
+class UploadCache:
+    """
+    Carpeta de archivos Excel ya convertidos al formato nativo, indexada por el
+    hash de los bytes del archivo.
+
+    Al pasar del límite de bytes se borran los archivos usados hace más tiempo
+    (según su fecha de modificación, que se actualiza en cada uso). Los
+    archivos se escriben de forma atómica, así que varias sesiones o procesos
+    pueden compartir la misma carpeta.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path_for(self, digest):
+        return os.path.join(self.cache_dir, f"{digest}{NATIVE_EXTENSION}")
+
+    def get(self, digest):
+        """Ruta del archivo convertido, o None si ese Excel no se ha convertido"""
+        path = self.path_for(digest)
+        try:
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def convert(self, file, name, digest=None):
+        """
+        Devuelve el archivo nativo de un Excel subido: lo abre si ya se había
+        convertido o lo lee, valida y guarda si es nuevo.
+
+        Devuelve (native, reporte, mensaje_error); si los datos no son válidos,
+        native es None y no se guarda nada.
+        """
+        digest = digest or upload_digest(file)
+        path = self.get(digest)
+        if path is None:
+            data, report = read_excel_binary(file, name)
+            # read_excel_binary ya binarizó los datos: solo se revisa la forma
+            is_valid, message = validate_data(data, binary=True)
+            if not is_valid:
+                return None, report, message
+            # Los items se guardan como texto; así la huella guardada coincide con la del archivo reabierto
+            data = maybe_sparsify(data.set_axis([str(item) for item in data.columns], axis=1))
+            path = self.path_for(digest)
+            write_native_dataset(
+                data, path, fingerprint=dataset_fingerprint(data),
+                metadata={'converted': _report_to_metadata(report)}
+            )
+            self.evict(keep=path)
+        native = open_native_dataset(path)
+        return native, converted_columns(native), None
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(NATIVE_EXTENSION):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self, keep=None):
+        """Borra los archivos usados hace más tiempo hasta quedar dentro del límite"""
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+    def stats(self):
+        """Resumen del uso de la carpeta"""
+        entries = self._entries()
+        return {
+            'files': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses
+        }